@@ -1,8 +1,9 @@
 import cx_Oracle
 
-from src.consumers.basic_consumer import BasicConsumer
+from kafka_utils.consumer import BasicConsumer
 import logging
 
+from src.config_reader import config
 from src.db.oracle_repository import OracleRepository
 from src.db.relational_repository import RelationalRepository
 from src.domain.metadata import Metadata
@@ -11,11 +12,11 @@ from src.domain.smt_entry import SmtEntry
 
 class TableConsumer(BasicConsumer):
     def __init__(self, topic_name):
-        super().__init__(topic_name)
+        super().__init__(topic_name, config["kafka"], group_id='group1')
         self.repository: RelationalRepository = OracleRepository()
 
     def consume(self):
-        for message in self.consumer:
+        for message in self.messages():
             logging.info(f"{self.topic_name}: writing {message.value}")
             if self.topic_name == "Metadata":
                 try:
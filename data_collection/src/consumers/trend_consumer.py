@@ -1,17 +1,18 @@
-from src.consumers.basic_consumer import BasicConsumer
+from kafka_utils.consumer import BasicConsumer
 import logging
 
+from src.config_reader import config
 from src.db.influxdb_repository import InfluxDbRepository
 
 
 class TrendConsumer(BasicConsumer):
     def __init__(self, topic_name):
-        super().__init__(topic_name)
+        super().__init__(topic_name, config["kafka"], group_id='group1')
         self.ts_repository = InfluxDbRepository()
 
     def consume(self):
         i = 0 # going from 0 to 1000
-        for message in self.consumer:
+        for message in self.messages():
             i = (i + 1) % 10**3
             if i % 300 == 0:
                 logging.info(f"{self.topic_name}: writing {message.value}")
@@ -0,0 +1,91 @@
+import os
+import shutil
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+
+SHARD_SUFFIX = ".shard"
+
+# Dataset of feature groups (see preprocessing/src/batch/feature_dataset.py): a directory per group with a shard per
+# part, the metadata of a part is written last
+METADATA = "metadata"
+
+
+def write_shard(directory: str, name: str, columns: Mapping[str, np.ndarray]) -> str:
+    """
+    Writes the columns of a batch of paintings as a shard: a directory with one `.npy` file per column, so that each
+    column can be memory-mapped on its own. The shard appears atomically (it is written under a temporary name),
+    an existing shard of the same name is replaced.
+
+    Parameters
+    ----------
+    directory
+        Directory of the dataset.
+    name
+        Name of the shard, unique within the dataset.
+    columns
+        Column name -> array, usually with a row per painting (ragged data can be stored flat). Strings should be
+        unicode arrays.
+
+    Returns
+    -------
+    str
+        Path of the shard.
+    """
+    path = os.path.join(directory, name + SHARD_SUFFIX)
+    temporary_path = path + ".tmp"
+    shutil.rmtree(temporary_path, ignore_errors=True)
+    os.makedirs(temporary_path)
+    for column, values in columns.items():
+        # Plain dtype: datetime64 arrays received from another process carry dtype metadata, which `np.save` rejects
+        values = np.asarray(values).view(np.dtype(values.dtype.str))
+        np.save(os.path.join(temporary_path, column + ".npy"), values, allow_pickle=False)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(temporary_path, path)
+    return path
+
+
+def list_shards(directory: str) -> List[str]:
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(SHARD_SUFFIX))
+
+
+def read_shard(path: str, columns: Optional[Iterable[str]] = None, mmap_mode: Optional[str] = 'r') -> Dict[str, np.ndarray]:
+    """
+    Reads the columns of a shard (all of them by default), memory-mapped unless `mmap_mode` is None.
+    """
+    if columns is None:
+        columns = [name[:-len(".npy")] for name in sorted(os.listdir(path)) if name.endswith(".npy")]
+    return {column: np.load(os.path.join(path, column + ".npy"), mmap_mode=mmap_mode, allow_pickle=False)
+            for column in columns}
+
+
+def read_columns(directory: str, columns: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Reads the columns of all shards of the dataset and concatenates them.
+    """
+    shards = [read_shard(path, columns) for path in list_shards(directory)]
+    if not shards:
+        return {}
+    return {column: np.concatenate([shard[column] for shard in shards]) for column in shards[0]}
+
+
+def part_path(dataset_directory: str, group: str, part: str) -> str:
+    return os.path.join(dataset_directory, group, part + SHARD_SUFFIX)
+
+
+def dataset_parts(dataset_directory: str) -> List[str]:
+    """
+    Names of the parts of the dataset. Parts interrupted while being written have no metadata and are not listed.
+    """
+    return [os.path.basename(path)[:-len(SHARD_SUFFIX)]
+            for path in list_shards(os.path.join(dataset_directory, METADATA))]
+
+
+def read_part(dataset_directory: str, group: str, part: str,
+              columns: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Memory-mapped columns of a part of the group (all of them by default).
+    """
+    return read_shard(part_path(dataset_directory, group, part), columns)
@@ -0,0 +1,25 @@
+import numpy as np
+
+from dataset_utils.feature_shards import dataset_parts, read_columns, read_part, write_shard
+
+# Datetime arrays received from another process carry dtype metadata
+TIMES = np.arange(3).astype(np.dtype('datetime64[ms]', metadata={'source': 'worker'}))
+
+
+def test_columns_with_dtype_metadata_are_written(tmp_path):
+    write_shard(str(tmp_path), "part-00000", {"timeOfEvent": TIMES, "values": np.eye(3)})
+    write_shard(str(tmp_path), "part-00001", {"timeOfEvent": TIMES, "values": np.eye(3)})
+
+    columns = read_columns(str(tmp_path))
+    np.testing.assert_array_equal(columns["timeOfEvent"], np.concatenate([TIMES, TIMES]))
+    assert columns["values"].shape == (6, 3)
+
+
+def test_written_part_replaces_the_existing_one(tmp_path):
+    write_shard(str(tmp_path / "metadata"), "part-00000", {"timeOfEvent": TIMES, "carBodyId": np.arange(3)})
+    write_shard(str(tmp_path / "metadata"), "part-00000", {"timeOfEvent": TIMES[:2]})
+
+    assert dataset_parts(str(tmp_path)) == ["part-00000"]
+    part = read_part(str(tmp_path), "metadata", "part-00000")
+    assert list(part) == ["timeOfEvent"]
+    np.testing.assert_array_equal(part["timeOfEvent"], TIMES[:2])
@@ -1,4 +1,5 @@
-from src.consumers.basic_consumer import BasicConsumer
+from kafka_utils.consumer import BasicConsumer
+from src.config_reader import config
 from src.domain.alert_types import IncorrectPaintingProcess, IncorrectPaintingData, UnhandledAlert
 from src.domain.preprocessing_status import PreprocessingStatus
 import logging
@@ -6,14 +7,14 @@ import logging
 
 class AlertConsumer(BasicConsumer):
     def __init__(self, topic_name):
-        super().__init__(topic_name)
+        super().__init__(topic_name, config["kafka"], group_id='group3')
 
     @property
     def alerts_trigger_list(self):
         return [PreprocessingStatus.GAP_IN_READINGS.value, PreprocessingStatus.BAD_EXTRACTION.value, PreprocessingStatus.CAGE.value]
 
     def consume(self):
-        for message in self.consumer:
+        for message in self.messages():
             logging.debug(f"{self.topic_name}: received {message.value}")
             try:
                 if message.value['source'] == 'ANOMALY' or message.value['source'] == 'HUMAN_REPORTED':
@@ -0,0 +1,137 @@
+"""
+Benchmark of the Kafka clients of the services against a broker stand-in: messages are serialized and put into record
+batches exactly as the producer does before sending them (`MemoryRecordsBuilder`), the consumer side decodes
+the batches and deserializes the messages. Reported per service and topic: bytes sent to the broker, number of record
+batches (produce requests) and messages per second of client CPU time.
+
+Before: JSON, no compression and one message per batch (linger 0 at a moderate message rate).
+After: wire format and producer settings from the `config.yml` of the service, batches are filled up to `batch-size`
+(messages arriving within the linger time).
+
+Run from the root of the repository: python -m kafka_utils.benchmark_clients
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Mapping
+
+import numpy as np
+import yaml
+from kafka.record.default_records import DefaultRecordBatch
+from kafka.record.memory_records import MemoryRecordsBuilder, MemoryRecords
+
+from kafka_utils.producer import default_producer_settings
+from kafka_utils.serialization import JSON, serialize, deserialize
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+compression_codecs = {
+    None: DefaultRecordBatch.CODEC_NONE,
+    "gzip": DefaultRecordBatch.CODEC_GZIP,
+    "snappy": DefaultRecordBatch.CODEC_SNAPPY,
+    "lz4": DefaultRecordBatch.CODEC_LZ4,
+    "zstd": DefaultRecordBatch.CODEC_ZSTD,
+}
+
+
+def current_trend(i: int) -> Mapping:
+    timestamp = datetime(2021, 7, 6) + timedelta(seconds=i)
+    return {"timestamp": timestamp.strftime('%Y-%m-%d %H:%M:%S.%f'), f"current_on_busbar_{i % 4 + 1}": 300. + i % 97}
+
+
+def metadata(i: int) -> Mapping:
+    timestamp = datetime(2021, 7, 6) + timedelta(seconds=90 * i)
+    return {"timeOfEvent": timestamp.strftime('%Y-%m-%d %H:%M:%S.%f'), "inOut": "IN", "carBodyId": str(1000000 + i),
+            "carBodyType": "A", "voltageProgramType": "1", "skidId": i % 300, "pendulumId": i % 40}
+
+
+def alert(i: int) -> Mapping:
+    return {"source": "GAP_IN_READINGS", "metadata": metadata(i), "date_issued": "2021-07-06 10:00:00"}
+
+
+def preprocessing_result(i: int, readings: int = 160) -> Mapping:
+    rng = np.random.default_rng(i)
+    times = np.datetime64('2021-07-06T10:00:00', 'ms') + np.arange(readings).astype('timedelta64[s]')
+    buses = [f"K{b}" for b in range(1, 5)]
+    return {
+        "status": "CORRECT",
+        "payload": {"metadata": metadata(i),
+                    "histograms": [rng.uniform(size=20) for _ in buses],
+                    "tsfreshFeatures": [rng.uniform(size=26) for _ in buses],
+                    "customFeatures": [],
+                    "interpolationFeatures": [rng.uniform(size=32) for _ in buses]},
+        "rawData": {"values": {bus: 300 + 50 * rng.standard_normal(readings) for bus in buses},
+                    "times": {bus: times for bus in buses},
+                    "maxValues": {}, "minValues": {}, "maxTimes": {}, "minTimes": {}},
+    }
+
+
+# Topics produced (or consumed) by each service: topic -> message generator, key of the wire format in the config
+services = {
+    "orion-kafka-bridge": {"CurrentTrends": (current_trend, None), "Metadata": (metadata, None)},
+    "preprocessing": {"PreprocessingResults": (preprocessing_result, "preprocessing-results-format"),
+                      "Alerts": (alert, None)},
+    "processing": {"Alerts": (alert, None)},
+}
+
+
+def build_batches(messages: List[bytes], compression_type, batch_size: int, records_per_batch: int) -> List[bytes]:
+    batches, builder, records = [], None, 0
+    for message in messages:
+        if builder is not None and records < records_per_batch and \
+                builder.append(timestamp=None, key=None, value=message, headers=[]) is not None:
+            records += 1
+            continue
+        if builder is not None:
+            builder.close()
+            batches.append(bytes(builder.buffer()))
+        builder = MemoryRecordsBuilder(magic=2, compression_type=compression_codecs[compression_type],
+                                       batch_size=batch_size)
+        builder.append(timestamp=None, key=None, value=message, headers=[])  # The first message always fits
+        records = 1
+    if builder is not None:
+        builder.close()
+        batches.append(bytes(builder.buffer()))
+    return batches
+
+
+def read_batches(batches: List[bytes]) -> int:
+    count = 0
+    for batch in batches:
+        records = MemoryRecords(batch)
+        while records.has_next():
+            for record in records.next_batch():
+                deserialize(record.value)
+                count += 1
+    return count
+
+
+def run(generate: Callable[[int], Mapping], count: int, wire_format: str, settings: Mapping, full_batches: bool):
+    values = [generate(i) for i in range(count)]
+    start = time.perf_counter()
+    batches = build_batches([serialize(value, wire_format) for value in values], settings["compression-type"],
+                            settings["batch-size"], records_per_batch=count if full_batches else 1)
+    produced = time.perf_counter()
+    assert read_batches(batches) == count
+    consumed = time.perf_counter()
+    return sum(len(batch) for batch in batches), len(batches), count / (produced - start), count / (consumed - produced)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-messages', help='Number of messages per topic.', default=2000, type=int)
+    args = vars(parser.parse_args())
+
+    for service, topics in services.items():
+        with open(os.path.join(ROOT, service, "config.yml")) as config_file:
+            kafka_config = yaml.safe_load(config_file)["kafka"]
+        producer_settings = {**default_producer_settings, **kafka_config.get("producer", {})}
+        for topic, (generate, format_key) in topics.items():
+            count = args['messages'] // 10 if topic == "PreprocessingResults" else args['messages']
+            wire_format = kafka_config[format_key] if format_key else JSON
+            before = run(generate, count, JSON, default_producer_settings, full_batches=False)
+            after = run(generate, count, wire_format, producer_settings, full_batches=True)
+            for label, (size, batches, produce_rate, consume_rate) in [("before", before), ("after", after)]:
+                print(f"{service:>18} {topic:>20} {label:>6}: {size / 1024:8.1f} KiB in {batches:5d} batches, "
+                      f"produce {produce_rate:9.0f} msg/s, consume {consume_rate:9.0f} msg/s")
@@ -0,0 +1,118 @@
+import abc
+import logging
+from typing import Any, Iterator, List, Mapping, Optional
+
+from kafka import KafkaConsumer
+from kafka.consumer.fetcher import ConsumerRecord
+
+from kafka_utils.offset_tracker import OffsetTracker
+from kafka_utils.serialization import deserialize
+from kafka_utils.topic_counters import topic_counters
+
+# Settings used when the `consumer` section of the kafka configuration does not define them
+default_consumer_settings = {
+    "max-records": 500,  # maximal number of messages returned by one poll
+    "poll-timeout-ms": 1000,
+    "fetch-min-bytes": 1,
+    "fetch-max-wait-ms": 500,
+}
+
+
+class BasicConsumer:
+    """
+    Consumer of a single topic. Messages are deserialized with `kafka_utils.serialization` (JSON or msgpack)
+    and polled in batches. Offsets of a consumer group are committed manually, once all messages of a poll were
+    handled: messages being handled when the service stops are consumed again after the restart. Messages handled
+    later (e.g. queued in memory) are tracked with `offset_tracker`, only offsets of handled messages are committed.
+    """
+    def __init__(self, topic_name: str, kafka_config: Mapping, group_id: Optional[str] = None,
+                 auto_offset_reset: str = 'earliest', track_offsets: bool = False):
+        """
+        Parameters
+        ----------
+        topic_name
+            Name of the consumed topic.
+        kafka_config
+            `kafka` section of the configuration of the service: `bootstrap_servers` and optionally `consumer`
+            settings (see `default_consumer_settings`).
+        group_id
+            Consumer group. Without a group no offsets are committed.
+        auto_offset_reset
+            Where to start if the group has no committed offset: 'earliest' or 'latest'.
+        track_offsets
+            Whether the caller marks messages as handled with `offset_tracker` (see `OffsetTracker`).
+        """
+        settings = {**default_consumer_settings, **kafka_config.get("consumer", {})}
+        self.topic_name = topic_name
+        self.group_id = group_id
+        self.max_records = settings["max-records"]
+        self.poll_timeout_ms = settings["poll-timeout-ms"]
+        self.offset_tracker = OffsetTracker() if track_offsets else None
+        self.consumer = KafkaConsumer(
+            topic_name,
+            bootstrap_servers=kafka_config["bootstrap_servers"],
+            auto_offset_reset=auto_offset_reset,
+            enable_auto_commit=False,
+            group_id=group_id,
+            max_poll_records=self.max_records,
+            fetch_min_bytes=settings["fetch-min-bytes"],
+            fetch_max_wait_ms=settings["fetch-max-wait-ms"],
+            value_deserializer=self.deserializer)
+
+    def deserializer(self, m: bytes) -> Any:
+        try:
+            return deserialize(m)
+        except (ValueError, KeyError, TypeError):
+            topic_counters.count(self.topic_name, errors=1)
+            logging.error(f"Wrong format passed to consumer: {m}. Expecting JSON or msgpack format.")
+            return m
+
+    def poll(self) -> List[ConsumerRecord]:
+        """
+        Returns the next batch of messages (possibly empty), messages of each partition are in order.
+        """
+        batches = self.consumer.poll(timeout_ms=self.poll_timeout_ms, max_records=self.max_records)
+        records = [record for partition_records in batches.values() for record in partition_records]
+        if records:
+            topic_counters.count(self.topic_name, consumed=len(records),
+                                 consumed_bytes=sum(record.serialized_value_size for record in records))
+        return records
+
+    def messages(self) -> Iterator[ConsumerRecord]:
+        """
+        Yields messages one by one. Offsets are committed when the next batch is requested, i.e. after the caller
+        handled all messages of the previous one. Tracked offsets are committed after each poll, once they advanced.
+        """
+        while True:
+            records = self.poll()
+            yield from records
+            if records or self.offset_tracker is not None:
+                self.commit()
+
+    def batches(self) -> Iterator[List[ConsumerRecord]]:
+        """
+        Yields non-empty batches of messages, one per poll. Offsets are committed when the next batch is requested.
+        """
+        while True:
+            records = self.poll()
+            if records:
+                yield records
+                self.commit()
+
+    def commit(self):
+        if self.group_id is None:
+            return
+        if self.offset_tracker is None:
+            self.consumer.commit()
+            return
+        offsets = self.offset_tracker.uncommitted()
+        if offsets:
+            self.consumer.commit(offsets=offsets)
+            self.offset_tracker.set_committed(offsets)
+
+    def close(self):
+        self.consumer.close()
+
+    @abc.abstractmethod
+    def consume(self):
+        pass
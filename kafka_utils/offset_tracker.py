@@ -0,0 +1,59 @@
+from collections import defaultdict
+from threading import Lock
+from typing import Callable, Dict, Set
+
+from kafka import TopicPartition
+from kafka.consumer.fetcher import ConsumerRecord
+from kafka.structs import OffsetAndMetadata
+
+
+def offset_and_metadata(offset: int) -> OffsetAndMetadata:
+    # 'leader_epoch' was added to 'OffsetAndMetadata' in kafka-python 2.1
+    fields = {"offset": offset, "metadata": "", "leader_epoch": -1}
+    return OffsetAndMetadata(*(fields[field] for field in OffsetAndMetadata._fields))
+
+
+class OffsetTracker:
+    """
+    Offsets of messages which are handled after the consumer returned them, e.g. queued in memory. The committable
+    offset of a partition is the offset of its oldest message which is not handled yet, so messages still waiting
+    when the service stops are consumed again after the restart (handled messages after them are consumed again too).
+    Messages are handled from any thread.
+    """
+    def __init__(self):
+        self.lock = Lock()
+        self.pending: Dict[TopicPartition, Set[int]] = defaultdict(set)
+        self.next_offsets: Dict[TopicPartition, int] = {}
+        self.committed: Dict[TopicPartition, int] = {}
+
+    def track(self, record: ConsumerRecord) -> Callable[[], None]:
+        """
+        Marks the message as pending.
+
+        Returns
+        -------
+        Callable[[], None]
+            Function to call once the message is handled.
+        """
+        partition = TopicPartition(record.topic, record.partition)
+        with self.lock:
+            self.pending[partition].add(record.offset)
+            self.next_offsets[partition] = max(self.next_offsets.get(partition, 0), record.offset + 1)
+        return lambda: self.done(partition, record.offset)
+
+    def done(self, partition: TopicPartition, offset: int):
+        with self.lock:
+            self.pending[partition].discard(offset)
+
+    def uncommitted(self) -> Dict[TopicPartition, OffsetAndMetadata]:
+        """
+        Committable offsets of the partitions which changed since the last commit.
+        """
+        with self.lock:
+            offsets = {partition: min(self.pending[partition], default=next_offset)
+                       for partition, next_offset in self.next_offsets.items()}
+        return {partition: offset_and_metadata(offset) for partition, offset in offsets.items()
+                if self.committed.get(partition) != offset}
+
+    def set_committed(self, offsets: Dict[TopicPartition, OffsetAndMetadata]):
+        self.committed.update({partition: offset.offset for partition, offset in offsets.items()})
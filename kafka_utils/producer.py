@@ -0,0 +1,60 @@
+import abc
+from typing import Any, Mapping, Optional
+
+from kafka import KafkaProducer
+from kafka.producer.future import FutureRecordMetadata
+
+from kafka_utils.serialization import JSON, serialize
+from kafka_utils.topic_counters import topic_counters
+
+# Settings used when the `producer` section of the kafka configuration does not define them (kafka-python defaults)
+default_producer_settings = {
+    "linger-ms": 0,  # time to wait for further messages to send them in one batch
+    "batch-size": 16384,  # bytes
+    "compression-type": None,  # 'gzip', 'snappy', 'lz4' or 'zstd'
+}
+
+
+class BasicProducer:
+    """
+    Producer serializing messages with `kafka_utils.serialization` (JSON or msgpack). Producers are meant to be
+    long-lived: messages are sent asynchronously in batches, `close` (or `flush`) sends the remaining ones.
+    """
+    def __init__(self, topic_name: Optional[str], kafka_config: Mapping, wire_format: str = JSON):
+        """
+        Parameters
+        ----------
+        topic_name
+            Default topic of the messages.
+        kafka_config
+            `kafka` section of the configuration of the service: `bootstrap_servers` and optionally `producer`
+            settings (see `default_producer_settings`).
+        wire_format
+            Format of the messages, see `kafka_utils.serialization`.
+        """
+        settings = {**default_producer_settings, **kafka_config.get("producer", {})}
+        self.topic_name = topic_name
+        self.wire_format = wire_format
+        self.producer = KafkaProducer(bootstrap_servers=kafka_config["bootstrap_servers"],
+                                      linger_ms=settings["linger-ms"],
+                                      batch_size=settings["batch-size"],
+                                      compression_type=settings["compression-type"])
+
+    def send(self, value: Any, topic: Optional[str] = None) -> FutureRecordMetadata:
+        """
+        Serializes the message and sends it to the topic (the default one if not given).
+        """
+        topic = topic if topic is not None else self.topic_name
+        message = serialize(value, self.wire_format)
+        topic_counters.count(topic, produced=1, produced_bytes=len(message))
+        return self.producer.send(topic, value=message)
+
+    def flush(self):
+        self.producer.flush()
+
+    def close(self):
+        self.producer.close()
+
+    @abc.abstractmethod
+    def produce(self, message):
+        pass
@@ -0,0 +1,95 @@
+import json
+from typing import Any
+
+import msgpack
+import numpy as np
+
+# Formats of messages sent to Kafka and to the prediction API
+JSON = 'json'
+MSGPACK = 'msgpack'
+MIMETYPES = {JSON: 'application/json', MSGPACK: 'application/msgpack'}
+
+# Version of the binary format, increased on incompatible changes of the encoding
+WIRE_FORMAT_VERSION = 1
+
+# msgpack extension types of NumPy arrays: raw little-endian buffers
+FLOAT64_ARRAY = 1
+FLOAT32_ARRAY = 2
+EPOCH_MILLISECONDS_ARRAY = 3  # datetime64 arrays as int64 milliseconds since the epoch
+
+
+def encode_ndarray(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind == 'M':
+            return msgpack.ExtType(EPOCH_MILLISECONDS_ARRAY, obj.astype('datetime64[ms]').astype('<i8').tobytes())
+        if obj.dtype == np.float32:
+            return msgpack.ExtType(FLOAT32_ARRAY, obj.astype('<f4').tobytes())
+        return msgpack.ExtType(FLOAT64_ARRAY, obj.astype('<f8').tobytes())
+    if isinstance(obj, np.datetime64):
+        return int(obj.astype('datetime64[ms]').astype(np.int64))
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} cannot be encoded.")
+
+
+def decode_ndarray(code: int, data: bytes) -> Any:
+    if code == FLOAT64_ARRAY:
+        return np.frombuffer(data, dtype='<f8')
+    if code == FLOAT32_ARRAY:
+        return np.frombuffer(data, dtype='<f4')
+    if code == EPOCH_MILLISECONDS_ARRAY:
+        return np.frombuffer(data, dtype='<i8').astype('datetime64[ms]')
+    return msgpack.ExtType(code, data)
+
+
+def to_json_compatible(obj: Any) -> Any:
+    """
+    JSON representation of NumPy values: arrays become lists, timestamps '%Y-%m-%d %H:%M:%S' strings.
+    """
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind == 'M':
+            return [t.replace('T', ' ') for t in np.datetime_as_string(obj, unit='s')]
+        return obj.tolist()
+    if isinstance(obj, np.datetime64):
+        return str(np.datetime_as_string(obj, unit='s')).replace('T', ' ')
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def serialize(message: Any, wire_format: str = JSON) -> bytes:
+    """
+    Serializes a message.
+
+    Parameters
+    ----------
+    message
+        Dictionary, lists and NumPy arrays are allowed.
+    wire_format
+        JSON or MSGPACK. In msgpack, NumPy arrays are sent as raw buffers and the message is wrapped in
+        a `{"version": WIRE_FORMAT_VERSION, "message": message}` envelope.
+
+    Returns
+    -------
+    bytes
+        Serialized message.
+    """
+    if wire_format == MSGPACK:
+        return msgpack.packb({"version": WIRE_FORMAT_VERSION, "message": message},
+                             default=encode_ndarray, use_bin_type=True)
+    if wire_format == JSON:
+        return json.dumps(message, default=to_json_compatible).encode('utf-8')
+    raise ValueError(f"Unknown wire format: {wire_format}.")
+
+
+def deserialize(data: bytes) -> Any:
+    """
+    Deserializes a message in any of the formats, which is recognized by its first byte: JSON messages are objects,
+    msgpack ones are two-element maps (envelope). Arrays of msgpack messages are read-only NumPy arrays.
+    """
+    if data[:1] == b'{':
+        return json.loads(data.decode('utf-8'))
+    envelope = msgpack.unpackb(data, ext_hook=decode_ndarray, raw=False)
+    if envelope["version"] > WIRE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported wire format version: {envelope['version']}.")
+    return envelope["message"]
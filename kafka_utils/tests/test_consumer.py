@@ -0,0 +1,107 @@
+from collections import namedtuple
+
+import pytest
+from kafka import TopicPartition
+
+import kafka_utils.consumer
+from kafka_utils.consumer import BasicConsumer
+from kafka_utils.serialization import MSGPACK, serialize
+from kafka_utils.topic_counters import topic_counters
+
+Record = namedtuple("Record", ["value", "serialized_value_size", "topic", "partition", "offset"])
+
+
+class StandInKafkaConsumer:
+    """
+    Stand-in of `KafkaConsumer` returning the prepared batches of messages.
+    """
+    def __init__(self, topic_name, value_deserializer, **settings):
+        self.settings = settings
+        self.value_deserializer = value_deserializer
+        self.batches = []
+        self.commits = 0
+        self.committed_offsets = {}
+        self.next_offset = 0
+
+    def poll(self, timeout_ms, max_records):
+        if not self.batches:
+            return {}
+        batch = self.batches.pop(0)[:max_records]
+        records = [Record(self.value_deserializer(m), len(m), "topic", 0, self.next_offset + i)
+                   for i, m in enumerate(batch)]
+        self.next_offset += len(batch)
+        return {("topic", 0): records}
+
+    def commit(self, offsets=None):
+        self.commits += 1
+        if offsets is not None:
+            self.committed_offsets.update({partition: offset.offset for partition, offset in offsets.items()})
+
+
+class StandInConsumer(BasicConsumer):
+    def consume(self):
+        return self.messages()
+
+
+@pytest.fixture
+def stand_in_kafka(monkeypatch):
+    monkeypatch.setattr(kafka_utils.consumer, "KafkaConsumer", StandInKafkaConsumer)
+
+
+def test_offsets_are_committed_after_the_batch_is_handled(stand_in_kafka):
+    consumer = StandInConsumer("Metadata", {"bootstrap_servers": [], "consumer": {"max-records": 2}}, group_id="g")
+    consumer.consumer.batches = [[b'{"a": 1}', serialize({"a": 2}, MSGPACK)], [b'{"a": 3}']]
+    messages = consumer.consume()
+
+    assert next(messages).value == {"a": 1}
+    assert next(messages).value == {"a": 2}
+    assert consumer.consumer.commits == 0
+    assert next(messages).value == {"a": 3}
+    assert consumer.consumer.commits == 1
+    assert consumer.consumer.settings["enable_auto_commit"] is False
+    assert topic_counters.snapshot()["Metadata"]["consumed"] >= 3
+
+
+def test_consumer_without_group_does_not_commit(stand_in_kafka):
+    consumer = StandInConsumer("CurrentTrends", {"bootstrap_servers": []})
+    consumer.consumer.batches = [[b'{"a": 1}'], [b'not a message']]
+    messages = consumer.consume()
+
+    assert next(messages).value == {"a": 1}
+    assert next(messages).value == b'not a message'
+    assert consumer.consumer.commits == 0
+    assert topic_counters.snapshot()["CurrentTrends"]["errors"] == 1
+
+
+def test_batches_are_committed_after_they_are_handled(stand_in_kafka):
+    consumer = StandInConsumer("PreprocessingResults", {"bootstrap_servers": []}, group_id="g")
+    consumer.consumer.batches = [[b'{"a": 1}', b'{"a": 2}'], [], [b'{"a": 3}']]
+    batches = consumer.batches()
+
+    assert [record.value for record in next(batches)] == [{"a": 1}, {"a": 2}]
+    assert consumer.consumer.commits == 0
+    assert [record.value for record in next(batches)] == [{"a": 3}]
+    assert consumer.consumer.commits == 1
+
+
+def test_tracked_offsets_are_committed_up_to_the_oldest_pending_message(stand_in_kafka):
+    consumer = StandInConsumer("Metadata", {"bootstrap_servers": []}, group_id="g", track_offsets=True)
+    consumer.consumer.batches = [[b'{"a": 1}', b'{"a": 2}', b'{"a": 3}'], [b'{"a": 4}']]
+    messages = consumer.consume()
+    done = [consumer.offset_tracker.track(next(messages)) for _ in range(3)]
+    partition = TopicPartition("topic", 0)
+
+    done[1]()
+    done.append(consumer.offset_tracker.track(next(messages)))
+    assert consumer.consumer.committed_offsets == {partition: 0}
+
+    done[0]()
+    done[2]()
+    consumer.commit()
+    assert consumer.consumer.committed_offsets == {partition: 3}
+
+    consumer.commit()  # Nothing changed
+    done[3]()
+    consumer.commit()
+    assert consumer.consumer.committed_offsets == {partition: 4}
+    assert consumer.consumer.commits == 3
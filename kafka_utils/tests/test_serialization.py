@@ -0,0 +1,39 @@
+import msgpack
+import numpy as np
+import pytest
+
+from kafka_utils.serialization import JSON, MSGPACK, WIRE_FORMAT_VERSION, serialize, deserialize
+
+
+def message():
+    return {
+        "status": "CORRECT",
+        "features": [np.arange(3, dtype=np.float64), np.array([0.5, np.nan], dtype=np.float32)],
+        "times": np.array(["2021-07-06T10:00:00.250", "2021-07-06T10:00:01.750"], dtype="datetime64[ms]"),
+        "count": np.int64(2),
+    }
+
+
+def test_msgpack_round_trip():
+    decoded = deserialize(serialize(message(), MSGPACK))
+
+    assert decoded["status"] == "CORRECT"
+    assert decoded["count"] == 2
+    np.testing.assert_array_equal(decoded["features"][0], np.arange(3))
+    assert decoded["features"][1].dtype == np.float32
+    np.testing.assert_array_equal(decoded["features"][1], [0.5, np.nan])
+    np.testing.assert_array_equal(decoded["times"], message()["times"])
+
+
+def test_json_uses_lists_and_second_resolution_timestamps():
+    decoded = deserialize(serialize(message(), JSON))
+
+    assert decoded["features"][0] == [0., 1., 2.]
+    assert decoded["times"] == ["2021-07-06 10:00:00", "2021-07-06 10:00:01"]
+
+
+def test_newer_version_is_rejected():
+    data = msgpack.packb({"version": WIRE_FORMAT_VERSION + 1, "message": {}})
+
+    with pytest.raises(ValueError):
+        deserialize(data)
@@ -0,0 +1,11 @@
+from kafka_utils.topic_counters import TopicCounters
+
+
+def test_counters_are_kept_per_topic():
+    counters = TopicCounters(log_interval=0.)
+
+    counters.count("Metadata", consumed=2, consumed_bytes=100)
+    counters.count("Metadata", consumed=1, consumed_bytes=50)
+    counters.count("Alerts", produced=1)
+
+    assert counters.snapshot() == {"Metadata": {"consumed": 3, "consumed_bytes": 150}, "Alerts": {"produced": 1}}
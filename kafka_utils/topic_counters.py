@@ -0,0 +1,48 @@
+import logging
+import time
+from collections import defaultdict
+from threading import Lock
+from typing import Dict
+
+
+class TopicCounters:
+    """
+    Counters of the messages (and their bytes) produced and consumed on each topic by this process.
+    A summary with the rates since the previous one is logged every `log_interval` seconds.
+    """
+    def __init__(self, log_interval: float = 60.):
+        self.log_interval = log_interval
+        self.counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.lock = Lock()
+        self.last_logged_counts: Dict[str, Dict[str, int]] = {}
+        self.last_logged_at = time.monotonic()
+
+    def count(self, topic: str, **increments: int):
+        """
+        Increases the counters of the topic, e.g. `count("Metadata", consumed=10, consumed_bytes=2048)`.
+        """
+        with self.lock:
+            for counter, increment in increments.items():
+                self.counts[topic][counter] += increment
+        if time.monotonic() - self.last_logged_at >= self.log_interval:
+            self.log_summary()
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self.lock:
+            return {topic: dict(counters) for topic, counters in self.counts.items()}
+
+    def log_summary(self):
+        now = time.monotonic()
+        with self.lock:
+            elapsed, self.last_logged_at = now - self.last_logged_at, now
+        counts = self.snapshot()
+        for topic, counters in counts.items():
+            last_counters = self.last_logged_counts.get(topic, {})
+            rates = ", ".join(f"{counter}: {value} ({(value - last_counters.get(counter, 0)) / elapsed:.1f}/s)"
+                              for counter, value in sorted(counters.items()))
+            logging.info(f"Kafka topic {topic}: {rates}")
+        self.last_logged_counts = counts
+
+
+# Counters shared by all clients of the process
+topic_counters = TopicCounters()
@@ -2,8 +2,7 @@ from flask import Flask, request, Response
 from src.utils import set_up_logger
 from src.config_reader import config
 import logging
-from kafka import KafkaProducer
-from json import dumps
+from kafka_utils.producer import BasicProducer
 from datetime import datetime
 from src.subscriptions_setter import SubscriptionsSetter
 from src.device_controlled_properties_states import electric_current_state
@@ -101,9 +100,7 @@ def init_app():
     """
     global producer
     set_up_logger()
-    producer = KafkaProducer(bootstrap_servers=config["kafka"]["bootstrap_servers"],
-                             value_serializer=lambda x:
-                             dumps(x).encode('utf-8'))
+    producer = BasicProducer(topic_name=None, kafka_config=config["kafka"])
     # async
     SubscriptionsSetter().set_up_subscriptions()
     return app
@@ -1,5 +1,6 @@
 from time import sleep
 
+import pandas as pd
 import requests
 
 from src.utils.trend_reader import TrendReader
@@ -12,7 +13,7 @@ class TrendProducer:
     def __init__(self, trend_id, trend_name):
         self.trend_id = trend_id
         self.trend_name = trend_name
-        self.trend_values_df = TrendReader.read("../trends", trend_name)
+        self.times, self.values = TrendReader.read_arrays("../trends", trend_name)
 
         entity_creation_body = {
             "id": f"urn:ngsi-ld:Device:company-xyz:trends",
@@ -24,9 +25,8 @@ class TrendProducer:
             "controlledProperty": {"type": "Property",
                                    "value": ["electricCharge", "electricCurrent"]},
             "value": {"type": "Property",
-                      "value": [self.trend_values_df.iloc[0]['value'],
-                                self.trend_values_df.iloc[0]['value']],
-                      "observedAt": self.trend_values_df.iloc[0]['dt'].strftime("%Y-%m-%dT%H:%M:%S.%fZ")},
+                      "value": [float(self.values[0]), float(self.values[0])],
+                      "observedAt": pd.Timestamp(self.times[0]).strftime("%Y-%m-%dT%H:%M:%S.%fZ")},
             "@context": ["https://smartdatamodels.org/context.jsonld",
                          "https://raw.githubusercontent.com/shop4cf/data-models/master/docs/shop4cfcontext.jsonld"]
         }
@@ -37,14 +37,14 @@ class TrendProducer:
                                  headers={'Content-type': 'application/ld+json'})
 
     def produce(self):
-        for row in self.trend_values_df.iloc[1:].iterrows():
+        for time, value in zip(self.times[1:], self.values[1:]):
             sleep(config['general']['trends-sleep-time'])
             entity_update_body = {
                 "source": {"type": "Relationship",
                            "object": f"urn:ngsi-ld:Device:company-xyz:busbar-{self.trend_id[-1]}"},
                 "value": {"type": "Property",
-                          "value": [row[1]['value'], row[1]['value']],
-                          "observedAt": row[1]['dt'].strftime("%Y-%m-%dT%H:%M:%S.%fZ")},
+                          "value": [float(value), float(value)],
+                          "observedAt": pd.Timestamp(time).strftime("%Y-%m-%dT%H:%M:%S.%fZ")},
                 "@context": ["https://smartdatamodels.org/context.jsonld",
                              "https://raw.githubusercontent.com/shop4cf/data-models/master/docs/shop4cfcontext.jsonld"]
             }
@@ -1,24 +1,22 @@
-import glob
+from typing import Tuple
+
+import numpy as np
 import pandas as pd
 
+from trend_utils.trend_cache import load_trend, load_trend_frame
+
 
 class TrendReader:
     @staticmethod
     def read(base_directory_path,
-             trend_name):
-        df_list = []
-        folders = glob.glob(f"{base_directory_path}/*", recursive=True)
+             trend_name) -> pd.DataFrame:
+        # Loaded from the binary cache of the trend, converted from the CSV files when they change
+        return load_trend_frame(base_directory_path, trend_name)
 
-        # Iterate through folders and collect individual DataFrames into a list to later concatenate them all
-        for folder in folders:
-            datestr = folder[folder.rfind("/") + 1:]
-            df = pd.read_csv(f'{folder}/{trend_name}.csv', sep=";", header=None)[[0, 1]]
-            df[0] += f' {datestr}'
-            df_list.append(df)
-
-        # Concatenation of collected DataFrames
-        df = pd.concat(df_list)
-        df[0] = pd.to_datetime(df[0], format='%H:%M:%S %Y%m%d')
-        df = df.sort_values(0)
-        df.columns = ['dt', 'value']
-        return df
\ No newline at end of file
+    @staticmethod
+    def read_arrays(base_directory_path, trend_name) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Timestamps (datetime64[ns]) and values of the trend, memory-mapped from the cache (shared by the processes).
+        """
+        times, values = load_trend(base_directory_path, trend_name)
+        return times.view('datetime64[ns]'), values
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Packages shared by the services (kafka_utils, dataset_utils) are copied next to `src` in the image, locally they are
+# imported from the root of the repository
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,15 @@
+import gc
+
+from src.config_reader import config
+
+# Models are loaded once by the master process ('src.main:init_app()') and shared by the forked workers, if enabled
+# by 'preload-app' (config.yml). tensorflow is not fork-safe: 'init_app' fails if it was imported by the models.
+preload_app = bool(config['flask'].get('preload-app', False))
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    # Objects of the loaded models are not visited by the garbage collector of the workers, so their memory pages
+    # stay shared (not copied on write)
+    gc.freeze()
@@ -1,2 +1,3 @@
 from .bus_detection_results import BusDetectionResult
 from .detection_result import DetectionResult
+from .batch_detection_result import BatchDetectionResult
@@ -0,0 +1,137 @@
+from typing import Dict, List, Mapping
+
+import numpy as np
+
+from src.detection_results import BusDetectionResult
+from src.detection_results.detection_result import DetectionResult
+from src.config_reader import config
+
+# Fields of 'BusDetectionResult' aggregated by the weighted average
+BUS_RESULT_FIELDS = ('not_normalized_score', 'normalized_score', 'threshold', 'normalized_threshold')
+
+
+class BatchDetectionResult:
+    """
+    This class stores detection results of many paintings at once. Results of each bus are 'BusDetectionResult' with
+    arrays (a value per painting) instead of floats, they are aggregated the same way as in 'DetectionResult'.
+
+    Attributes
+    -----------
+    k1_result, k2_result, k3_result, k4_result
+        BusDetectionResult: detection results on the buses.
+    normalized_score
+        np.ndarray: normalized global detection results.
+    score
+        np.ndarray: not normalized global detection results.
+    anomaly
+        np.ndarray: true if waveform is anomalous.
+    """
+
+    def __init__(self, k1_result: BusDetectionResult, k2_result: BusDetectionResult,
+                 k3_result: BusDetectionResult, k4_result: BusDetectionResult):
+        self.k1_result: BusDetectionResult = k1_result
+        self.k2_result: BusDetectionResult = k2_result
+        self.k3_result: BusDetectionResult = k3_result
+        self.k4_result: BusDetectionResult = k4_result
+        self.aggregate()
+
+    @classmethod
+    def single_model_result(cls, buses_results: Mapping[str, BusDetectionResult]):
+        """
+        This method is used when only one type of model were used (see 'DetectionResult.single_model_result').
+        """
+        return cls(**buses_results)
+
+    @classmethod
+    def multiple_models_result(cls, buses_results: Mapping[str, Mapping[str, BusDetectionResult]]):
+        """
+        This method is used when more than one type of model were used, the results are aggregated as a weighted
+        average (see 'DetectionResult.multiple_models_result').
+        """
+        return cls(**cls.aggregate_multiple_results_as_weighted_average(buses_results))
+
+    @staticmethod
+    def aggregate_multiple_results_as_weighted_average(
+            buses_results: Mapping[str, Mapping[str, BusDetectionResult]]) -> Dict[str, BusDetectionResult]:
+        """
+        Vectorized 'DetectionResult.aggregate_multiple_results_as_weighted_average': for each bus and field the results
+        of the model types, stacked as an array of shape (model types, paintings), are reduced by a weighted sum.
+        """
+        models_weights = config['models']['aggregation_weights']
+        sum_of_weights = sum([weight for weight in models_weights.values()])
+        model_types = list(buses_results)
+        weights = np.array([models_weights[model_type.lower()] for model_type in model_types],
+                           dtype=np.float64) / sum_of_weights
+        buses_detection = dict()
+        for bus in buses_results[model_types[0]]:
+            model_results = [buses_results[model_type][bus] for model_type in model_types]
+            buses_detection[bus] = BusDetectionResult(**{
+                field: weights @ np.stack([np.asarray(getattr(result, field), dtype=np.float64)
+                                           for result in model_results])
+                for field in BUS_RESULT_FIELDS})
+        return buses_detection
+
+    @property
+    def buses_results(self) -> Dict[str, BusDetectionResult]:
+        return {'K1': self.k1_result, 'K2': self.k2_result, 'K3': self.k3_result, 'K4': self.k4_result}
+
+    @staticmethod
+    def bus_anomaly(bus_result: BusDetectionResult) -> np.ndarray:
+        """
+        Vectorized 'BusDetectionResult.anomaly'.
+        """
+        return np.asarray(bus_result.normalized_score > bus_result.normalized_threshold)
+
+    def aggregate(self):
+        """
+        This method is called during instance initialization. Global results are computed based on buses results.
+        """
+        buses_results = list(self.buses_results.values())
+        self.normalized_score = np.maximum.reduce([np.maximum(r.normalized_score, 0.0) for r in buses_results])
+        self.score = np.maximum.reduce([np.maximum(r.not_normalized_score, 0.0) for r in buses_results])
+        self.anomaly = np.logical_or.reduce([self.bus_anomaly(r) for r in buses_results])
+
+    def __len__(self):
+        return len(self.normalized_score)
+
+    def to_columns(self) -> Dict[str, np.ndarray]:
+        """
+        Results as columns: the same values as in 'DetectionResult.to_dict', e.g. 'score' and 'K1Score'.
+        """
+        columns = {'score': self.normalized_score, 'anomaly': self.anomaly}
+        for bus, bus_result in self.buses_results.items():
+            columns[f'{bus}Score'] = np.asarray(bus_result.normalized_score, dtype=np.float64)
+            columns[f'{bus}Anomaly'] = self.bus_anomaly(bus_result)
+        return columns
+
+    def detection_result(self, painting: int) -> DetectionResult:
+        """
+        'DetectionResult' of a single painting.
+        """
+        return DetectionResult(**{
+            f'{bus.lower()}_result': BusDetectionResult(
+                not_normalized_score=float(bus_result.not_normalized_score[painting]),
+                normalized_score=float(bus_result.normalized_score[painting]),
+                threshold=float(bus_result.threshold[painting]),
+                normalized_threshold=float(bus_result.normalized_threshold[painting]))
+            for bus, bus_result in self.buses_results.items()})
+
+    def to_dict(self, painting: int) -> Dict:
+        """
+        Result of a single painting, the same as 'DetectionResult.to_dict'.
+        """
+        result = {'score': float(self.normalized_score[painting]), 'anomaly': bool(self.anomaly[painting])}
+        for bus, bus_result in self.buses_results.items():
+            result[bus] = {'score': float(bus_result.normalized_score[painting]),
+                           'anomaly': bool(self.bus_anomaly(bus_result)[painting])}
+        return result
+
+    def to_dicts(self) -> List[Dict]:
+        """
+        Results of all paintings, the same as 'to_dict' of each painting.
+        """
+        columns = {column: values.tolist() for column, values in self.to_columns().items()}
+        buses = list(self.buses_results)
+        return [{'score': score, 'anomaly': anomaly,
+                 **{bus: {'score': columns[f'{bus}Score'][i], 'anomaly': columns[f'{bus}Anomaly'][i]} for bus in buses}}
+                for i, (score, anomaly) in enumerate(zip(columns['score'], columns['anomaly']))]
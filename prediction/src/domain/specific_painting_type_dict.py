@@ -1,5 +1,8 @@
 from collections import defaultdict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Set
 import logging
+import threading
 
 
 class SpecificPaintingTypeKey:
@@ -65,20 +68,147 @@ class GeneralModelsDict(defaultdict):
     dictionary, it returns a general-purpose model. This allows you to easily get models without worrying about
     whether they are in the dictionary.
     Main key of dictionary is "SpecificPaintingTypeKey" class.
+
+    Models can also be loaded on first use: keys are registered and their models are loaded by 'loader' when they are
+    retrieved. Loaded models are kept in an LRU cache limited by the number of keys and by their size, the least
+    recently used ones are unloaded first. General-purpose models and models set directly are never unloaded.
+    Dictionary methods (e.g. 'values') see only the loaded models. Models are loaded outside the lock of the
+    dictionary, so loading does not block retrieving the loaded ones; concurrent retrievals of a key being loaded
+    wait for that single load.
     """
-    def __init__(self, general_type):
+    def __init__(self, general_type, loader: Optional[Callable[['SpecificPaintingTypeKey'], Any]] = None,
+                 size_of: Optional[Callable[['SpecificPaintingTypeKey'], int]] = None,
+                 max_loaded: Optional[int] = None, max_size: Optional[int] = None):
         """
         Parameters
         ----------
         general_type
             The name on the basis of which the general-purpose model is saved.
+        loader
+            Function loading the models of a registered key.
+        size_of
+            Function returning the size (e.g. in bytes) of the models of a registered key.
+        max_loaded
+            Maximal number of loaded registered keys, unlimited if None.
+        max_size
+            Maximal total size of the models of the loaded registered keys, unlimited if None.
         """
         super().__init__(None)
         self.general_type = general_type
+        self.loader = loader
+        self.size_of = size_of
+        self.max_loaded = max_loaded
+        self.max_size = max_size
+        self.registered_keys: Set[SpecificPaintingTypeKey] = set()
+        self.sizes: Dict[SpecificPaintingTypeKey, int] = dict()
+        # Missing keys -> keys of the general-purpose models used for them
+        self.general_keys: Dict[SpecificPaintingTypeKey, SpecificPaintingTypeKey] = dict()
+        # Registered keys being loaded -> their models
+        self.loading: Dict[SpecificPaintingTypeKey, Future] = dict()
+        self.lock = threading.RLock()
+
+    def register(self, key: SpecificPaintingTypeKey):
+        """
+        Registers the key, its models are loaded on first use.
+        """
+        with self.lock:
+            self.registered_keys.add(key)
+            self.general_keys.pop(key, None)
+
+    def is_general(self, key: SpecificPaintingTypeKey) -> bool:
+        return key.car_body_type == self.general_type.upper() and key.voltage_program_type == self.general_type.upper()
+
+    def __setitem__(self, key: SpecificPaintingTypeKey, value):
+        with self.lock:
+            self.general_keys.pop(key, None)
+            super().__setitem__(key, value)
+
+    def __delitem__(self, key: SpecificPaintingTypeKey):
+        with self.lock:
+            self.sizes.pop(key, None)
+            super().__delitem__(key)
+
+    def __getitem__(self, key: SpecificPaintingTypeKey):
+        with self.lock:
+            key = self.general_keys.get(key, key)
+            if dict.__contains__(self, key):
+                value = dict.__getitem__(self, key)
+                if key in self.registered_keys:
+                    # Most recently used keys are at the end
+                    dict.__delitem__(self, key)
+                    dict.__setitem__(self, key, value)
+                return value
+            registered = key in self.registered_keys
+        if registered:
+            return self.load(key)
+        return self.__missing__(key)
+
+    def load(self, key: SpecificPaintingTypeKey):
+        """
+        Loads the models of a registered key, or waits for them if another thread is loading them.
+        """
+        with self.lock:
+            if dict.__contains__(self, key):
+                return dict.__getitem__(self, key)
+            loading = self.loading.get(key)
+            loads_in_this_thread = loading is None
+            if loads_in_this_thread:
+                loading = self.loading[key] = Future()
+        if not loads_in_this_thread:
+            return loading.result()
+        logging.info(f'Loading models: {key}.')
+        try:
+            value = self.loader(key)
+            size = self.models_size(key)
+        except BaseException as error:
+            with self.lock:
+                del self.loading[key]
+            loading.set_exception(error)
+            raise
+        self.set_loaded(key, value, size)
+        loading.set_result(value)
+        return value
+
+    def models_size(self, key: SpecificPaintingTypeKey) -> int:
+        """
+        Size of the models of the key (see 'size_of'), read from the disk, so it is called outside the lock.
+        """
+        return self.size_of(key) if self.size_of is not None else 0
+
+    def set_loaded(self, key: SpecificPaintingTypeKey, value, size: Optional[int] = None):
+        """
+        Stores already loaded models of a registered key (e.g. preloaded ones). The size of the models is read
+        before the lock is taken, unless it is given.
+        """
+        if size is None:
+            size = self.models_size(key)
+        with self.lock:
+            dict.__setitem__(self, key, value)
+            self.loading.pop(key, None)
+            self.sizes[key] = size
+            self.unload_least_recently_used()
+        return value
+
+    def unload_least_recently_used(self):
+        """
+        Unloads the least recently used models until the loaded models fit the limits.
+        """
+        unloadable = [key for key in self.keys() if key in self.registered_keys and not self.is_general(key)]
+        loaded = [key for key in self.keys() if key in self.registered_keys]
+        size = sum(self.sizes.get(key, 0) for key in loaded)
+        while unloadable[:-1] and ((self.max_loaded is not None and len(loaded) > self.max_loaded) or
+                                   (self.max_size is not None and size > self.max_size)):
+            # The most recently used key (just loaded) is kept
+            key = unloadable.pop(0)
+            logging.info(f'Unloading models: {key}.')
+            loaded.remove(key)
+            size -= self.sizes.get(key, 0)
+            del self[key]
 
     def __missing__(self, key: SpecificPaintingTypeKey):
         """
-        If key is missing (not in dictionary), the general-purpose model is returned.
+        If key is missing (not in dictionary), the general-purpose model is returned. The key of the general-purpose
+        model is remembered for the missing key.
 
         Parameters
         ----------
@@ -90,11 +220,14 @@ class GeneralModelsDict(defaultdict):
         -------
             general-purpose model.
         """
-        logging.info(
-            f'Received unsupported painting types: {key.car_body_type}, {key.voltage_program_type}. Using general model.')
         general_key = SpecificPaintingTypeKey(
             model_type=key.model_type,
             car_body_type=self.general_type,
             voltage_program_type=self.general_type)
-
-        return super(defaultdict, self).__getitem__(general_key)
+        with self.lock:
+            if general_key == key or not (dict.__contains__(self, general_key) or general_key in self.registered_keys):
+                raise KeyError(key)
+            logging.info(f'Received unsupported painting types: {key.car_body_type}, {key.voltage_program_type}. '
+                         f'Using general model.')
+            self.general_keys[key] = general_key
+        return self[general_key]
@@ -1,11 +1,14 @@
 import logging
+import sys
 
 from flask import Flask, request
 
 from src.models.models_handlers.single_type_models_handler import SingleTypeModelsHandler
 from src.models.models_handlers.multiple_types_models_handler import MultipleTypesModelsHandler
+from src.models.models_handlers.micro_batching_models_handler import MicroBatchingModelsHandler
 from src.utils import set_up_logger, check_if_ensemble
 from src.config_reader import config
+from kafka_utils.serialization import MIMETYPES, MSGPACK, deserialize
 
 app = Flask(__name__)
 
@@ -18,7 +21,10 @@ def predict():
     global json_id
     global models
     # May be useful: https://stackoverflow.com/questions/53548127/post-numpy-array-with-json-to-flask-app-with-requests
-    data = request.json
+    if request.mimetype == MIMETYPES[MSGPACK]:
+        data = deserialize(request.get_data())
+    else:
+        data = request.json
     logging.info("In /predict endpoint")
     logging.debug(f"Data: {data}")
 
@@ -29,6 +35,38 @@ def predict():
     return results.to_dict(), 200
 
 
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    """
+    Results of many preprocessing results ('preprocessingResults'), e.g. all of a Kafka poll, as 'predictionResults'
+    in the same order. Paintings which could not be predicted get null.
+    """
+    global models
+    if request.mimetype == MIMETYPES[MSGPACK]:
+        data = deserialize(request.get_data())
+    else:
+        data = request.json
+    preprocessing_results = data['preprocessingResults']
+    logging.info(f"In /predict_batch endpoint, {len(preprocessing_results)} paintings")
+
+    # Items without a payload get null like the other paintings which could not be predicted
+    results = models.predict_many([preprocessing_result.get('payload') if isinstance(preprocessing_result, dict)
+                                   else None for preprocessing_result in preprocessing_results])
+    logging.debug(f"Results: {results}")
+
+    return {'predictionResults': results}, 200
+
+
+def check_fork_safety():
+    """
+    Models loaded by the gunicorn master ('preload-app') are shared by the forked workers. tensorflow is not
+    fork-safe, it must not be imported before the fork: all autoencoders must be queried with NumPy.
+    """
+    if 'tensorflow' in sys.modules:
+        raise RuntimeError("tensorflow was imported while loading the models (some autoencoders are not supported by "
+                           "'NumpyAutoencoder'), it is not fork-safe: disable 'preload-app' in config.yml.")
+
+
 def init_app():
     """
     Initialization of component needed in this module.
@@ -48,6 +86,12 @@ def init_app():
     except FileNotFoundError as err:
         logging.exception(err)
         exit()
+    if config['flask'].get('preload-app'):
+        check_fork_safety()
+    micro_batching = config['models'].get('micro-batching') or {}
+    if micro_batching.get('enabled'):
+        models = MicroBatchingModelsHandler(models, max_batch_size=micro_batching['max-batch-size'],
+                                            max_wait_ms=micro_batching['max-wait-ms'])
 
     return app
 
@@ -1,6 +1,6 @@
 import abc
 
-from typing import Tuple
+from typing import Optional, Tuple
 from src.models.model_config import ModelConfig
 import numpy as np
 from src.domain.prediction_data import SingleBusPredictionData
@@ -79,6 +79,64 @@ class Model:
         """
         pass
 
+    def anomaly_scores(self, data: np.ndarray, car_body_type: str, voltage_program_type: str) -> np.ndarray:
+        """
+        This method compute the anomaly scores of many paintings of the same type at once. Subclasses override it
+        with a vectorized version, by default 'anomaly_score' is called for each painting.
+
+        Parameters
+        ---------
+        data
+            Array of shape (paintings, features) with valid prediction data of the paintings.
+        car_body_type
+            Car body type of the paintings.
+        voltage_program_type
+            Voltage program type of the paintings.
+
+        Returns
+        -------
+        np.ndarray
+            Array with anomaly score of each painting.
+        """
+        return np.array([self.anomaly_score(SingleBusPredictionData(painting_process_data=row,
+                                                                    car_body_type=car_body_type,
+                                                                    voltage_program_type=voltage_program_type))
+                         for row in data], dtype=np.float64)
+
+    def share_weights(self, directory: str):
+        """
+        This method moves read-only arrays of the model to memory-mapped files in the directory, so that processes
+        using the same model share the memory. Subclasses implement it for models which allow it.
+        """
+        pass
+
+    @property
+    def input_width(self) -> Optional[int]:
+        """
+        Number of features of the prediction data, None if unknown. Subclasses read it from the model.
+        """
+        return None
+
+    def warm_up(self, car_body_type: str, voltage_program_type: str):
+        """
+        This method queries the model with synthetic data (the mean of training data), through both the single
+        painting and the batch path. Lazy initialisation (e.g. of 'tensorflow' functions) is done before the first
+        request.
+
+        Parameters
+        ---------
+        car_body_type
+            Car body type of the model.
+        voltage_program_type
+            Voltage program type of the model.
+        """
+        if self.input_width is None:
+            return
+        data = np.broadcast_to(np.asarray(self.config.scaler_mean, dtype=np.float64), (self.input_width,)).copy()
+        self(SingleBusPredictionData(painting_process_data=data, car_body_type=car_body_type,
+                                     voltage_program_type=voltage_program_type))
+        self.score_batch(data[np.newaxis], car_body_type, voltage_program_type)
+
     def normalize_output_score(self, score_value: float) -> float:
         """
         This method is used to normalize the model response. If std_multiplication (value in config) has not been set,
@@ -96,11 +154,18 @@ class Model:
         """
         if self.config.std_multiplication is None:
             return score_value
-        result_value = min(score_value, self.config.result_upper_bound)
-        result_value = ((result_value - self.config.result_mean) / (
+        return float(self.normalize_output_scores(np.asarray(score_value, dtype=np.float64)))
+
+    def normalize_output_scores(self, score_values: np.ndarray) -> np.ndarray:
+        """
+        Vectorized version of 'normalize_output_score', normalizes an array of model responses.
+        """
+        if self.config.std_multiplication is None:
+            return score_values
+        result_values = np.minimum(score_values, self.config.result_upper_bound)
+        result_values = ((result_values - self.config.result_mean) / (
                 self.config.std_multiplication * np.sqrt(self.config.result_var)))
-        result_value = 1 / (1 + np.power(np.e, -result_value))
-        return float(result_value)
+        return 1 / (1 + np.power(np.e, -result_values))
 
     @staticmethod
     def is_valid(data: np.ndarray) -> bool:
@@ -144,6 +209,35 @@ class Model:
         else:
             return 1.0, 1.0
 
+    def score_batch(self, data: np.ndarray, car_body_type: str,
+                    voltage_program_type: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized version of '__call__' for many paintings of the same type: paintings with invalid data get
+        scores 1.0, the model is queried once for all the others.
+
+        Parameters
+        ----------
+        data
+            Array of shape (paintings, features) with prediction data of the paintings.
+        car_body_type
+            Car body type of the paintings.
+        voltage_program_type
+            Voltage program type of the paintings.
+
+        Returns
+        -------
+        Tuple
+            Tuple: arrays of scores and normalized scores
+        """
+        data = np.asarray(data, dtype=np.float64)
+        valid = np.isfinite(data).all(axis=1)
+        scores, normalized_scores = np.ones(len(data)), np.ones(len(data))
+        if valid.any():
+            valid_scores = self.anomaly_scores(data[valid], car_body_type, voltage_program_type)
+            scores[valid] = valid_scores
+            normalized_scores[valid] = self.normalize_output_scores(valid_scores)
+        return scores, normalized_scores
+
     def scale_input_data(self, data: np.ndarray) -> np.ndarray:
         """
         This function scale the input data. If it is not necessary, config default values allow
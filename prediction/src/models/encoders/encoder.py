@@ -1,4 +1,5 @@
 from src.models.encoders.encoder_config import EncoderConfig
+from typing import Dict, Sequence
 from joblib import load
 import numpy as np
 import logging
@@ -10,6 +11,7 @@ class Encoder:
     Class responsible for encoding the categorical data (car body type, voltage program type) into a representation
     acceptable by the model. While the received item to be encoded has not previously been seen in the fitting phase -
     an out of bucket (OOB) item is used (In this case, the most frequent item in the data for the general purpose model).
+    All items seen in the fitting phase are encoded when the encoder is loaded, so encoding is a dictionary lookup.
 
     Attributes
     ---------
@@ -17,6 +19,10 @@ class Encoder:
         Configuration of an encoder.
     encoder
         encoder to encode the value
+    codes
+        Dictionary of the encoded items seen in the fitting phase (read-only arrays).
+    oob_code
+        Encoded OOB item.
     """
 
     OOB = 'CG322000'
@@ -24,6 +30,9 @@ class Encoder:
     def __init__(self, encoder_config: EncoderConfig):
         self.encoder_config = encoder_config
         self.encoder = self.load_encoder()
+        self.codes = self.encode_classes()
+        self.oob_code = self.codes[Encoder.OOB] if Encoder.OOB in self.codes else self.read_only(
+            self.encoder.transform([Encoder.OOB]))
 
     def load_encoder(self):
         """
@@ -33,6 +42,19 @@ class Encoder:
                                     self.encoder_config.encoder_file_name)
         return load(encoder_path)
 
+    @staticmethod
+    def read_only(array: np.ndarray) -> np.ndarray:
+        array.flags.writeable = False
+        return array
+
+    def encode_classes(self) -> Dict[str, np.ndarray]:
+        """
+        This method encodes all items seen in the fitting phase with one call of the encoder.
+        """
+        classes = list(self.encoder.classes_)
+        encoded_classes = self.read_only(np.asarray(self.encoder.transform(classes)))
+        return {pair: encoded_classes[i:i + 1] for i, pair in enumerate(classes)}
+
     def transform(self, data: str) -> np.ndarray:
         """
         This method encodes the received data.
@@ -40,17 +62,29 @@ class Encoder:
         data:
             data to encode - in string. This is concatenation of car_body_type, voltage_program_type.
         """
-        if self.is_valid_pair(data):
-            transformed_data = self.encoder.transform([data])
-        else:
+        transformed_data = self.codes.get(data)
+        if transformed_data is None:
             logging.info(f'Data contains previously unseen pair: {data}')
-            transformed_data = self.encoder.transform([Encoder.OOB])
+            transformed_data = self.oob_code
         return transformed_data
 
+    def transform_many(self, data: Sequence[str]) -> np.ndarray:
+        """
+        Vectorized version of 'transform': encoded items are stacked, one row per item.
+        data:
+            data to encode - strings, concatenations of car_body_type, voltage_program_type.
+        """
+        if len(data) == 0:
+            return self.oob_code[:0].copy()
+        unseen_pairs = set(data).difference(self.codes)
+        if unseen_pairs:
+            logging.info(f'Data contains previously unseen pairs: {sorted(unseen_pairs)}')
+        return np.concatenate([self.codes.get(pair, self.oob_code) for pair in data])
+
     def is_valid_pair(self, pair: str) -> bool:
         """
         This method checks if the received data to be encoded is in the encoder dictionary.
         pair:
             data to encode
         """
-        return pair in self.encoder.classes_
+        return pair in self.codes
@@ -1,6 +1,13 @@
-from typing import Dict, Mapping
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Set, TypeVar
 import joblib
 import os
+import numpy as np
 from src.detection_results import BusDetectionResult
 from src.models.models_handlers.setup_config import SetupConfig
 from src.domain.specific_painting_type_dict import SpecificPaintingTypeKey, GeneralModelsDict
@@ -8,6 +15,8 @@ from src.models.model_config import ModelConfig
 import src.models.models_instances as models_instances
 from src.domain.prediction_data import NestedPredictionData
 
+T = TypeVar('T')
+
 
 class BasicModelsHandler:
     """
@@ -20,32 +29,130 @@ class BasicModelsHandler:
         List of all buses under analysis
     setup_config
         information about config
+    prediction_executor
+        Pool of threads querying the models of this process, None if models are queried sequentially.
     """
 
     def __init__(self):
+        start_time = time.perf_counter()
         self.buses = ['K1', 'K2', 'K3', 'K4']
         self.setup_config = SetupConfig()
+        self.prediction_executor: Optional[ThreadPoolExecutor] = None
+        self.prediction_executor_pid: Optional[int] = None
+        self.prediction_executor_lock = threading.Lock()
+        logging.info(f"Found models of {len(self.setup_config.models_paths)} painting types in "
+                     f"{time.perf_counter() - start_time:.2f} s.")
         self.models: GeneralModelsDict = self.initialize_models()
+        logging.info(f"Models handler ready in {time.perf_counter() - start_time:.2f} s.")
 
     def initialize_models(self) -> GeneralModelsDict:
         """
-        This method is required for models initialization. Model for each specific bus is initialize
-        with specific configuration and store in dictionary.
+        This method is required for models initialization. Painting types are registered in the dictionary and their
+        models are loaded on first use ('load_painting_type_models'). The general-purpose models, and the others
+        within the limits if 'preload_models' is set, are loaded at once. The number and size of loaded models are
+        limited according to the configuration.
 
         Returns
         -------
         models
-        Dictionary containing all loaded and configured models. Keys are stored as 'SpecificPaintingTypeKeys'.
-        """
-        models = GeneralModelsDict(general_type=SetupConfig.general_models)
-        for painting_type, path in self.setup_config.models_paths.items():
-            models[painting_type] = dict()
-            for features_dict, bus in self.get_bus_specific_model_building_features(painting_type):
-                model_config = ModelConfig(**features_dict)
-                model_instance = getattr(models_instances, painting_type.model_type)(model_config)
-                models[painting_type][bus] = model_instance
+        Dictionary containing all configured models. Keys are stored as 'SpecificPaintingTypeKeys'.
+        """
+        models = GeneralModelsDict(general_type=SetupConfig.general_models, loader=self.load_painting_type_models,
+                                   size_of=self.painting_type_models_size,
+                                   max_loaded=self.setup_config.max_loaded_painting_types,
+                                   max_size=self.setup_config.max_loaded_models_size)
+        for painting_type in self.setup_config.models_paths:
+            models.register(painting_type)
+        painting_types = sorted(self.setup_config.models_paths, key=lambda key: not models.is_general(key))
+        if not self.setup_config.preload_models:
+            painting_types = [painting_type for painting_type in painting_types if models.is_general(painting_type)]
+        elif self.setup_config.max_loaded_painting_types is not None:
+            general_types = sum(models.is_general(painting_type) for painting_type in painting_types)
+            painting_types = painting_types[:max(self.setup_config.max_loaded_painting_types, general_types)]
+        for painting_type, painting_type_models in self.load_painting_types_models(painting_types).items():
+            models.set_loaded(painting_type, painting_type_models)
         return models
 
+    def load_painting_type_models(self, painting_type: SpecificPaintingTypeKey) -> Dict:
+        """
+        This method loads models of the painting type (see 'load_painting_types_models').
+
+        Returns
+        -------
+        models
+        Dictionary containing loaded and configured model for every bus.
+        """
+        return self.load_painting_types_models([painting_type])[painting_type]
+
+    def load_painting_types_models(self, painting_types: Iterable[SpecificPaintingTypeKey]) -> Dict:
+        """
+        This method loads models of the painting types. Model for each specific bus is initialize with specific
+        configuration, artifacts (features, models and encoders) are loaded by a pool of threads. Each loaded model
+        is warmed up with synthetic data.
+
+        Returns
+        -------
+        models
+        Dictionary containing dictionary of loaded and configured model for every bus of every painting type.
+        """
+        painting_types = list(painting_types)
+        if not painting_types:
+            return dict()
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.setup_config.loading_threads) as executor:
+            features = executor.map(lambda painting_type: list(self.get_bus_specific_model_building_features(
+                painting_type)), painting_types)
+            futures = {(painting_type, bus): executor.submit(self.load_model, painting_type, features_dict)
+                       for painting_type, buses_features in zip(painting_types, features)
+                       for features_dict, bus in buses_features}
+            models = {painting_type: dict() for painting_type in painting_types}
+            for (painting_type, bus), future in futures.items():
+                models[painting_type][bus] = future.result()
+            load_time = time.perf_counter()
+            logging.info(f"Loaded {len(futures)} models of {len(painting_types)} painting types in "
+                         f"{load_time - start_time:.2f} s.")
+            list(executor.map(lambda item: self.warm_up_model(*item),
+                              [(painting_type, model) for painting_type, painting_type_models in models.items()
+                               for model in painting_type_models.values()]))
+        logging.info(f"Warmed up {len(futures)} models in {time.perf_counter() - load_time:.2f} s.")
+        return models
+
+    def load_model(self, painting_type: SpecificPaintingTypeKey, features_dict: Dict):
+        model_config = ModelConfig(**features_dict)
+        model = getattr(models_instances, painting_type.model_type)(model_config)
+        if self.setup_config.shared_weights_directory is not None:
+            model.share_weights(self.setup_config.shared_weights_directory)
+        return model
+
+    @staticmethod
+    def warm_up_model(painting_type: SpecificPaintingTypeKey, model):
+        try:
+            model.warm_up(painting_type.car_body_type, painting_type.voltage_program_type)
+        except Exception:
+            logging.exception(f"Warm-up of model {painting_type} {model.config.bus} failed.")
+
+    def painting_type_models_size(self, painting_type: SpecificPaintingTypeKey) -> int:
+        """
+        Size (in bytes) of the files of models and encoder of the painting type, an estimate of their memory usage.
+        """
+        size = 0
+        for directory in [self.setup_config.models_paths[painting_type],
+                          self.setup_config.body_voltage_pair_encoder_paths[painting_type]]:
+            for path, _, files in os.walk(directory or ''):
+                size += sum(os.path.getsize(os.path.join(path, file)) for file in files)
+        return size
+
+    def payload_field_names(self) -> Set[str]:
+        """
+        Names of payload fields used by the models of all painting types, loaded or not.
+        """
+        field_names = {model.config.payload_field_name_for_prediction_making
+                       for bus_models in list(self.models.values()) for model in bus_models.values()}
+        for painting_type in self.models.registered_keys - set(self.models.keys()):
+            features_dict = self.read_specific_painting_type_features(self.setup_config.features_paths[painting_type])
+            field_names.update(features_dict[bus]['payload_field_name_for_prediction_making'] for bus in self.buses)
+        return field_names
+
     def get_bus_specific_model_building_features(self, painting_type: SpecificPaintingTypeKey):
         """
         This method yield an extended features dictionary required for proper model configuration.
@@ -108,9 +215,30 @@ class BasicModelsHandler:
         loaded model for prediction making
         """
         metadata = data['metadata']
+        return self.get_specified_models_for_painting_type(model_type=model_type,
+                                                          car_body_type=metadata['carBodyType'],
+                                                          voltage_program_type=metadata['voltageProgramType'])
+
+    def get_specified_models_for_painting_type(self, model_type: str, car_body_type: str,
+                                               voltage_program_type: str) -> Dict:
+        """
+        This method load model based on the painting type.
+
+        Parameters
+        ----------
+        model_type : str
+            Model name used.
+        car_body_type : str
+            Car body type of the painting.
+        voltage_program_type : str
+            Voltage program type of the painting.
+        Returns
+        -------
+        loaded model for prediction making
+        """
         model_key = SpecificPaintingTypeKey(model_type=model_type,
-                                            car_body_type=metadata['carBodyType'],
-                                            voltage_program_type=metadata['voltageProgramType'])
+                                            car_body_type=car_body_type,
+                                            voltage_program_type=voltage_program_type)
         return self.models[model_key]
 
     def construct_prediction_data_for_models(self, data: Dict, models: Dict) -> NestedPredictionData:
@@ -153,10 +281,21 @@ class BasicModelsHandler:
         buses_detection
             Dictionary of 'BusDetectionResult' for each bus.
         """
+        return self.construct_buses_detection(models, self.run_concurrently(self.bus_predictions(data, models)))
+
+    def bus_predictions(self, data: NestedPredictionData, models: dict) -> List[Callable[[], Sequence[float]]]:
+        """
+        This method constructs the queries of the model of each bus (see 'compute_results').
+        """
+        return [partial(models[bus], single_bus_data) for bus, single_bus_data in zip(self.buses, data)]
+
+    def construct_buses_detection(self, models: dict,
+                                  scores: Sequence[Sequence[float]]) -> Mapping[str, BusDetectionResult]:
+        """
+        This method stores the scores of the model of each bus in 'BusDetectionResult' (see 'compute_results').
+        """
         buses_detection = dict()
-        data_iterator = iter(data)
-        for bus, single_bus_data in zip(self.buses, data_iterator):
-            not_normalized_score, normalized_score = models[bus](single_bus_data)
+        for bus, (not_normalized_score, normalized_score) in zip(self.buses, scores):
             normalized_threshold = models[bus].config.normalized_threshold
             threshold = models[bus].config.threshold
             key = f'{bus.lower()}_result'
@@ -166,3 +305,131 @@ class BasicModelsHandler:
                 threshold=threshold,
                 normalized_threshold=normalized_threshold)
         return buses_detection
+
+    def get_prediction_executor(self) -> Optional[ThreadPoolExecutor]:
+        """
+        This method returns the pool of threads querying the models, None if 'prediction_threads' of the configuration
+        is not set (or 1). Threads do not survive a fork: a handler created before gunicorn forks its workers
+        ('--preload') creates a pool in each worker on first use.
+        """
+        if not self.setup_config.prediction_threads or self.setup_config.prediction_threads <= 1:
+            return None
+        if self.prediction_executor_pid != os.getpid():
+            with self.prediction_executor_lock:
+                if self.prediction_executor_pid != os.getpid():
+                    self.prediction_executor = ThreadPoolExecutor(max_workers=self.setup_config.prediction_threads,
+                                                                  thread_name_prefix='prediction')
+                    self.prediction_executor_pid = os.getpid()
+        return self.prediction_executor
+
+    def run_concurrently(self, predictions: Sequence[Callable[[], T]]) -> List[T]:
+        """
+        This method runs the queries of the models in the pool of threads ('get_prediction_executor'), the models
+        release the GIL in native code. Results are returned in the order of the queries, the first error is raised.
+        Queries must not wait for other queries of the pool.
+        """
+        executor = self.get_prediction_executor()
+        if executor is None or len(predictions) < 2:
+            return [prediction() for prediction in predictions]
+        futures = [executor.submit(prediction) for prediction in predictions]
+        return [future.result() for future in futures]
+
+    def stack_payloads(self, payloads: Sequence[Dict], car_body_type: str,
+                       voltage_program_type: str) -> Dict[str, np.ndarray]:
+        """
+        This method stacks payloads of paintings of the same type into the data of 'compute_batch_results': fields
+        required by the models of the painting type as arrays of shape (paintings, buses, features).
+
+        Parameters
+        ----------
+        payloads
+            Payloads of the paintings.
+        car_body_type
+            Car body type of the paintings.
+        voltage_program_type
+            Voltage program type of the paintings.
+        """
+        data_working_names = set()
+        for model_type in self.setup_config.model_types:
+            models = self.get_specified_models_for_painting_type(model_type=model_type, car_body_type=car_body_type,
+                                                                 voltage_program_type=voltage_program_type)
+            data_working_names.add(models[self.buses[0]].config.payload_field_name_for_prediction_making)
+        return {name: np.array([payload[name] for payload in payloads], dtype=np.float64)
+                for name in data_working_names}
+
+    def compute_batch_results(self, data: Mapping[str, np.ndarray], car_body_type: str, voltage_program_type: str,
+                              models: dict) -> Mapping[str, BusDetectionResult]:
+        """
+        Vectorized version of 'compute_results' for many paintings of the same type: each bus model is queried once
+        for all paintings. Fields of the returned 'BusDetectionResult' are arrays with a value per painting.
+
+        Parameters
+        ----------
+        data
+            Payload field name -> array of shape (paintings, buses, features).
+        car_body_type
+            Car body type of the paintings.
+        voltage_program_type
+            Voltage program type of the paintings.
+        models
+            Dictionary of models for every buses. Only one model type.
+
+        Returns
+        -------
+        buses_detection
+            Dictionary of 'BusDetectionResult' for each bus.
+        """
+        buses_detection = dict()
+        data_working_name = models[self.buses[0]].config.payload_field_name_for_prediction_making
+        for i, bus in enumerate(self.buses):
+            not_normalized_scores, normalized_scores = models[bus].score_batch(
+                data[data_working_name][:, i], car_body_type, voltage_program_type)
+            paintings = len(normalized_scores)
+            key = f'{bus.lower()}_result'
+            buses_detection[key] = BusDetectionResult(
+                not_normalized_score=not_normalized_scores,
+                normalized_score=normalized_scores,
+                threshold=np.full(paintings, models[bus].config.threshold, dtype=np.float64),
+                normalized_threshold=np.full(paintings, models[bus].config.normalized_threshold, dtype=np.float64))
+        return buses_detection
+
+    def predict_many(self, payloads: Sequence[Dict]) -> List[Optional[Dict]]:
+        """
+        This method computes results of many paintings at once. Paintings are grouped by their type and each group is
+        predicted by 'predict_batch' of the handler.
+
+        Parameters
+        ----------
+        payloads
+            Payloads of the paintings.
+
+        Returns
+        -------
+        results
+            Result of each painting as 'DetectionResult.to_dict', None if the painting could not be predicted
+            (e.g. malformed payload).
+        """
+        results: List[Optional[Dict]] = [None] * len(payloads)
+        painting_types = defaultdict(list)
+        for i, payload in enumerate(payloads):
+            try:
+                metadata = payload['metadata']
+                painting_types[(metadata['carBodyType'], metadata['voltageProgramType'])].append(i)
+            except (KeyError, TypeError):
+                logging.exception(f"Painting {i} of the batch has no painting type.")
+        for (car_body_type, voltage_program_type), indices in painting_types.items():
+            try:
+                data = self.stack_payloads([payloads[i] for i in indices], car_body_type, voltage_program_type)
+                batch_results = self.predict_batch(data, car_body_type, voltage_program_type).to_dicts()
+            except Exception as error:
+                logging.warning(f"Paintings {car_body_type}, {voltage_program_type} could not be predicted together: "
+                                f"{error}")
+                for i in indices:
+                    try:
+                        results[i] = self(payloads[i]).to_dict()
+                    except Exception:
+                        logging.exception(f"Painting {i} of the batch could not be predicted.")
+                continue
+            for i, result in zip(indices, batch_results):
+                results[i] = result
+        return results
@@ -0,0 +1,145 @@
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence
+
+from src.detection_results import DetectionResult
+from src.models.models_handlers.basic_models_handler import BasicModelsHandler
+
+
+class PendingPrediction:
+    """
+    Request waiting for its result in 'MicroBatchingModelsHandler'.
+    """
+
+    def __init__(self, data: Dict):
+        self.data = data
+        self.result: Optional[DetectionResult] = None
+        self.error: Optional[Exception] = None
+        self.done = threading.Event()
+
+    def set_result(self, result: DetectionResult):
+        self.result = result
+        self.done.set()
+
+    def set_error(self, error: Exception):
+        self.error = error
+        self.done.set()
+
+
+class MicroBatchingModelsHandler:
+    """
+    This class wraps a models handler (single or multiple types) to predict concurrent requests together. Requests are
+    collected for up to 'max_wait_ms' milliseconds (or until 'max_batch_size' of them arrive), paintings of the same
+    type are predicted with 'predict_batch', so every model (model type and bus) of the painting type is queried once
+    for the whole group. Each request gets its own 'DetectionResult', the same as from the wrapped handler.
+
+    Attributes
+    ----------
+    models_handler
+        Wrapped models handler.
+    max_batch_size
+        Maximal number of requests predicted together.
+    max_wait_ms
+        Maximal time the first request of a batch waits for the others.
+    """
+
+    def __init__(self, models_handler: BasicModelsHandler, max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        self.models_handler = models_handler
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.requests: Optional["queue.Queue[PendingPrediction]"] = None
+        self.thread: Optional[threading.Thread] = None
+        self.pid: Optional[int] = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        """
+        This method starts the batching thread of this process. Threads do not survive a fork: a handler created
+        before gunicorn forks its workers ('--preload') starts a thread in each worker on first use.
+        """
+        with self.lock:
+            if self.pid != os.getpid():
+                self.requests = queue.Queue()
+                self.thread = threading.Thread(target=self.run, name='micro-batching', daemon=True)
+                self.thread.start()
+                self.pid = os.getpid()
+
+    def __call__(self, data: Dict) -> DetectionResult:
+        """
+        This method compute result of a single request, waiting until its batch is predicted.
+
+        Parameters
+        ----------
+        data
+            Dictionary containing data waveforms.
+
+        Returns
+        -------
+        detection_result
+            Result of detection stored in 'DetectionResult' class.
+        """
+        if self.pid != os.getpid():
+            self.start()
+        pending = PendingPrediction(data)
+        self.requests.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def predict_many(self, payloads: Sequence[Dict]) -> List[Optional[Dict]]:
+        """
+        Requests of many paintings are already batched, they are predicted by the wrapped handler.
+        """
+        return self.models_handler.predict_many(payloads)
+
+    def collect_batch(self) -> List[PendingPrediction]:
+        batch = [self.requests.get()]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        while True:
+            self.predict(self.collect_batch())
+
+    def predict(self, batch: List[PendingPrediction]):
+        """
+        This method predicts a batch of requests, grouped by the painting type.
+        """
+        groups = defaultdict(list)
+        for pending in batch:
+            try:
+                metadata = pending.data['metadata']
+                groups[(metadata['carBodyType'], metadata['voltageProgramType'])].append(pending)
+            except Exception as error:
+                pending.set_error(error)
+        for (car_body_type, voltage_program_type), group in groups.items():
+            if len(group) > 1:
+                try:
+                    data = self.models_handler.stack_payloads([pending.data for pending in group], car_body_type,
+                                                              voltage_program_type)
+                    batch_result = self.models_handler.predict_batch(data, car_body_type, voltage_program_type)
+                except Exception as error:
+                    # E.g. malformed payload in the group, the requests are predicted one by one
+                    logging.warning(f"Batch of {len(group)} paintings could not be predicted together: {error}")
+                else:
+                    for i, pending in enumerate(group):
+                        pending.set_result(batch_result.detection_result(i))
+                    continue
+            for pending in group:
+                try:
+                    pending.set_result(self.models_handler(pending.data))
+                except Exception as error:
+                    pending.set_error(error)
@@ -1,6 +1,8 @@
-from typing import Dict
+from functools import partial
+from typing import Dict, Mapping
+import numpy as np
 from src.models.models_handlers.basic_models_handler import BasicModelsHandler
-from src.detection_results import DetectionResult
+from src.detection_results import BatchDetectionResult, DetectionResult
 
 
 class MultipleTypesModelsHandler(BasicModelsHandler):
@@ -21,7 +23,8 @@ class MultipleTypesModelsHandler(BasicModelsHandler):
         """
         This method compute result. Here for every selected model types the model instance is picked based on constructed key
         and together with data is passing to parent class where the response is constructed.
-        Finally the result is aggregated and stored in 'DetectionResult' class.
+        Finally the result is aggregated and stored in 'DetectionResult' class. Models of all types and buses are queried
+        concurrently ('run_concurrently').
 
         Parameters
         ----------
@@ -33,10 +36,46 @@ class MultipleTypesModelsHandler(BasicModelsHandler):
         detection_result
             Result of detection stored in 'DetectionResult' class.
         """
-        results = dict()
+        models_types, predictions = dict(), dict()
         for model_type in self.setup_config.model_types:
             specified_models_type = self.get_specified_models_for_received_data(data=data, model_type=model_type)
             prediction_data = self.construct_prediction_data_for_models(data=data, models=specified_models_type)
-            results[model_type] = self.compute_results(data=prediction_data, models=specified_models_type)
+            models_types[model_type] = specified_models_type
+            predictions[model_type] = self.bus_predictions(data=prediction_data, models=specified_models_type)
+        scores = iter(self.run_concurrently([prediction for model_type_predictions in predictions.values()
+                                             for prediction in model_type_predictions]))
+        results = dict()
+        for model_type, specified_models_type in models_types.items():
+            results[model_type] = self.construct_buses_detection(
+                models=specified_models_type, scores=[next(scores) for _ in predictions[model_type]])
         detection_result = DetectionResult.multiple_models_result(results)
         return detection_result
+
+    def predict_batch(self, data: Mapping[str, np.ndarray], car_body_type: str,
+                      voltage_program_type: str) -> BatchDetectionResult:
+        """
+        Vectorized version of '__call__' for many paintings of the same type. Models of all types are queried
+        concurrently ('run_concurrently').
+
+        Parameters
+        ----------
+        data
+            Payload field name -> array of shape (paintings, buses, features).
+        car_body_type
+            Car body type of the paintings.
+        voltage_program_type
+            Voltage program type of the paintings.
+
+        Returns
+        -------
+        detection_result
+            Results of detection stored in 'BatchDetectionResult' class.
+        """
+        predictions = dict()
+        for model_type in self.setup_config.model_types:
+            specified_models_type = self.get_specified_models_for_painting_type(
+                model_type=model_type, car_body_type=car_body_type, voltage_program_type=voltage_program_type)
+            predictions[model_type] = partial(self.compute_batch_results, data=data, car_body_type=car_body_type,
+                                              voltage_program_type=voltage_program_type, models=specified_models_type)
+        results = dict(zip(predictions.keys(), self.run_concurrently(list(predictions.values()))))
+        return BatchDetectionResult.multiple_models_result(results)
@@ -27,6 +27,18 @@ class SetupConfig:
         main root of the data.
     general_models
         Name of subdirectory with the general-purpose model. Every model has its own general directory.
+    max_loaded_painting_types
+        Maximal number of painting types with loaded models, unlimited if None.
+    max_loaded_models_size
+        Maximal size (in bytes) of files of loaded models, unlimited if None.
+    preload_models
+        If models of all painting types (within the limits) are loaded at start, otherwise only the general ones.
+    loading_threads
+        Number of threads loading the models, default of 'ThreadPoolExecutor' if None.
+    shared_weights_directory
+        Directory of memory-mapped weights shared by processes using the same models, not shared if None.
+    prediction_threads
+        Number of threads of each process querying the models of a prediction concurrently, sequentially if None.
     """
     root_path = '../models_data/{}'
     general_models = 'general'
@@ -37,6 +49,13 @@ class SetupConfig:
         self.features_paths = defaultdict(str)
         self.body_voltage_pair_encoder_paths = defaultdict(lambda: None)
         self.std_multiplications = defaultdict(float)
+        self.max_loaded_painting_types = config['models'].get('max-loaded-painting-types')
+        max_loaded_models_mb = config['models'].get('max-loaded-models-mb')
+        self.max_loaded_models_size = None if max_loaded_models_mb is None else int(max_loaded_models_mb * 2 ** 20)
+        self.preload_models = config['models'].get('preload-models', True)
+        self.loading_threads = config['models'].get('loading-threads')
+        self.shared_weights_directory = config['models'].get('shared-weights-directory')
+        self.prediction_threads = config['models'].get('prediction-threads')
         self.initialize_paths()
 
     def initialize_paths(self) -> None:
@@ -1,6 +1,7 @@
-from typing import Dict
+from typing import Dict, Mapping
+import numpy as np
 from src.models.models_handlers.basic_models_handler import BasicModelsHandler
-from src.detection_results import DetectionResult
+from src.detection_results import BatchDetectionResult, DetectionResult
 
 
 class SingleTypeModelsHandler(BasicModelsHandler):
@@ -41,3 +42,30 @@ class SingleTypeModelsHandler(BasicModelsHandler):
         buses_result = self.compute_results(data=prediction_data, models=specified_models_type)
         detection_result = DetectionResult.single_model_result(buses_result)
         return detection_result
+
+    def predict_batch(self, data: Mapping[str, np.ndarray], car_body_type: str,
+                      voltage_program_type: str) -> BatchDetectionResult:
+        """
+        Vectorized version of '__call__' for many paintings of the same type.
+
+        Parameters
+        ----------
+        data
+            Payload field name -> array of shape (paintings, buses, features).
+        car_body_type
+            Car body type of the paintings.
+        voltage_program_type
+            Voltage program type of the paintings.
+
+        Returns
+        -------
+        detection_result
+            Results of detection stored in 'BatchDetectionResult' class.
+        """
+        specified_models_type = self.get_specified_models_for_painting_type(model_type=self.model_class_name,
+                                                                            car_body_type=car_body_type,
+                                                                            voltage_program_type=voltage_program_type)
+        buses_result = self.compute_batch_results(data=data, car_body_type=car_body_type,
+                                                  voltage_program_type=voltage_program_type,
+                                                  models=specified_models_type)
+        return BatchDetectionResult.single_model_result(buses_result)
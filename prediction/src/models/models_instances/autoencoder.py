@@ -1,10 +1,11 @@
-from tensorflow.keras.models import load_model
-
+import logging
 import os
+from typing import Optional
 import numpy as np
 
 from src.models.basic_model import Model
 from src.models.model_config import ModelConfig
+from src.models.models_instances.numpy_autoencoder import NumpyAutoencoder, UnsupportedModelError
 
 from src.domain.prediction_data import SingleBusPredictionData
 
@@ -12,7 +13,8 @@ from src.domain.prediction_data import SingleBusPredictionData
 class Autoencoder(Model):
     """
     This class manage single model for selected bus. This class support Autoencoder model implemented with
-    'tensorflow' package.
+    'tensorflow' package. Dense models are queried with NumPy ('NumpyAutoencoder'), models with other layers with
+    'tensorflow'.
 
     Attributes
     ---------
@@ -22,20 +24,48 @@ class Autoencoder(Model):
         model which is queried and based on its result, a decision is made about an anomaly on the selected bus
     """
 
+    # Number of paintings reconstructed at once by 'anomaly_scores' of a 'tensorflow' model
+    prediction_batch_size = 4096
+    # Models are converted to 'NumpyAutoencoder' if possible
+    numpy_backend = True
+
     def __init__(self, config: ModelConfig):
         super(Autoencoder, self).__init__(config)
+        if self.numpy_backend and self.model is not None and not isinstance(self.model, NumpyAutoencoder):
+            try:
+                self.model = NumpyAutoencoder.from_keras(self.model, self.config.scaler_mean, self.config.scaler_var)
+            except UnsupportedModelError as error:
+                logging.warning(f"Model of bus {self.config.bus} is queried with tensorflow: {error}")
 
     def load_model(self):
         """
-        This method loads model to the memory.
+        This method loads model to the memory. HDF5 files of dense models are read without 'tensorflow'.
 
         Returns
         -------
             returns loaded model.
         """
         model_path = os.path.join(self.config.models_dir, self.config.model_file_name)
+        if self.numpy_backend:
+            try:
+                return NumpyAutoencoder.from_h5(model_path, self.config.scaler_mean, self.config.scaler_var)
+            except UnsupportedModelError as error:
+                logging.warning(f"Model {model_path} is loaded with tensorflow: {error}")
+        from tensorflow.keras.models import load_model
         return load_model(model_path)
 
+    def share_weights(self, directory: str):
+        if isinstance(self.model, NumpyAutoencoder):
+            self.model.share_weights(directory)
+
+    @property
+    def input_width(self) -> Optional[int]:
+        # Autoencoders reconstruct their input
+        if isinstance(self.model, NumpyAutoencoder):
+            return self.model.output_width
+        output_shape = getattr(self.model, 'output_shape', None)
+        return int(output_shape[-1]) if output_shape is not None else None
+
     @staticmethod
     def reconstruction_score(true_value: np.ndarray, predicted_value: np.ndarray) -> float:
         """
@@ -73,6 +103,9 @@ class Autoencoder(Model):
         Float
             Float: the result that is the calculated model response which is understood as anomaly score.
         """
+        if isinstance(self.model, NumpyAutoencoder):
+            return float(self.anomaly_scores(self.extend_dimension(data.painting_process_data),
+                                             data.car_body_type, data.voltage_program_type)[0])
         scaled_prediction_data = self.scale_input_data(data.painting_process_data)
         extended_data = self.extend_dimension(scaled_prediction_data)
 
@@ -82,3 +115,21 @@ class Autoencoder(Model):
             body_program_code = self.body_voltage_pair_encoder.transform(data.encoding_pair)
             prediction_result = self.model((extended_data, body_program_code))
         return self.reconstruction_score(extended_data, prediction_result)
+
+    def anomaly_scores(self, data: np.ndarray, car_body_type: str, voltage_program_type: str) -> np.ndarray:
+        """
+        Vectorized version of 'anomaly_score': all paintings are reconstructed by the model in batches.
+        """
+        if isinstance(self.model, NumpyAutoencoder):
+            if self.body_voltage_pair_encoder is None:
+                return self.model.reconstruction_errors(data)
+            body_program_code = self.body_voltage_pair_encoder.transform(car_body_type + voltage_program_type)
+            return self.model.reconstruction_errors(data, np.repeat(body_program_code, len(data), axis=0))
+        scaled_prediction_data = self.scale_input_data(data)
+        if self.body_voltage_pair_encoder is None:
+            model_input = scaled_prediction_data
+        else:
+            body_program_code = self.body_voltage_pair_encoder.transform(car_body_type + voltage_program_type)
+            model_input = (scaled_prediction_data, np.repeat(body_program_code, len(data), axis=0))
+        prediction_result = self.model.predict(model_input, batch_size=self.prediction_batch_size, verbose=0)
+        return np.power(scaled_prediction_data - prediction_result, 2).mean(axis=1)
@@ -0,0 +1,124 @@
+import numpy as np
+
+from src.models.shared_arrays import shared_array
+
+
+def average_path_length(n_samples: np.ndarray) -> np.ndarray:
+    """
+    Average path length of an unsuccessful search in a binary search tree of 'n_samples' nodes, the same as
+    in 'sklearn.ensemble._iforest'.
+    """
+    n_samples = np.asarray(n_samples, dtype=np.float64)
+    result = np.zeros(n_samples.shape)
+    result[n_samples == 2] = 1.0
+    larger = n_samples > 2
+    result[larger] = (2.0 * (np.log(n_samples[larger] - 1.0) + np.euler_gamma)
+                      - 2.0 * (n_samples[larger] - 1.0) / n_samples[larger])
+    return result
+
+
+class FlatIsolationForest:
+    """
+    Fitted 'IsolationForest' packed into contiguous arrays: feature, threshold and children of the nodes of all trees
+    and the path length contribution of the leaves. Paths of a batch of rows through all trees are followed at once,
+    level by level, with NumPy instead of a Python loop over the trees ('score_samples' of scikit-learn).
+    'score_samples' gives exactly the same scores as scikit-learn.
+
+    Attributes
+    ----------
+    feature
+        Column of the data tested by each node, 0 for leaves.
+    threshold
+        Threshold of each node, rows with values lower or equal go to the left child.
+    children
+        Left and right child of each node, leaves are their own children.
+    leaf_depth
+        Path length of each leaf: its depth and the average path length of its training samples (minus one).
+    roots
+        Root node of each tree.
+    max_depth
+        Maximal depth of the trees.
+    denominator
+        Normalization of the sum of path lengths.
+    n_features_in_
+        Number of features of the data.
+    """
+
+    # Number of rows scored at once, limits the memory of paths (rows x trees)
+    chunk_size = 4096
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, children: np.ndarray, leaf_depth: np.ndarray,
+                 roots: np.ndarray, max_depth: int, denominator: float, n_features_in_: int):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.leaf_depth = leaf_depth
+        self.roots = roots
+        self.max_depth = max_depth
+        self.denominator = denominator
+        self.n_features_in_ = n_features_in_
+
+    @classmethod
+    def from_forest(cls, forest) -> 'FlatIsolationForest':
+        """
+        Packs the trees of a fitted 'IsolationForest'.
+        """
+        features, thresholds, children, leaf_depths, roots = [], [], [], [], []
+        offset, max_depth = 0, 0
+        for estimator, estimator_features in zip(forest.estimators_, forest.estimators_features_):
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+            # Number of nodes on the path to each node (the same as the sum of 'decision_path')
+            path_nodes = np.zeros(tree.node_count, dtype=np.int64)
+            path_nodes[0] = 1
+            for node in nodes[~is_leaf]:
+                path_nodes[tree.children_left[node]] = path_nodes[tree.children_right[node]] = path_nodes[node] + 1
+            features.append(np.where(is_leaf, 0, np.asarray(estimator_features)[np.maximum(tree.feature, 0)]))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            children.append(np.stack([np.where(is_leaf, nodes, tree.children_left),
+                                      np.where(is_leaf, nodes, tree.children_right)], axis=1) + offset)
+            leaf_depths.append(path_nodes + average_path_length(tree.n_node_samples) - 1.0)
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+        denominator = len(forest.estimators_) * float(average_path_length(np.array([forest.max_samples_]))[0])
+        return cls(feature=np.concatenate(features).astype(np.int64),
+                   threshold=np.concatenate(thresholds).astype(np.float64),
+                   children=np.concatenate(children).astype(np.int64),
+                   leaf_depth=np.concatenate(leaf_depths).astype(np.float64),
+                   roots=np.asarray(roots, dtype=np.int64),
+                   max_depth=max_depth, denominator=denominator, n_features_in_=forest.n_features_in_)
+
+    def share_weights(self, directory: str):
+        """
+        Replaces the arrays by read-only memory-mapped arrays (see 'shared_array').
+        """
+        for name in ['feature', 'threshold', 'children', 'leaf_depth', 'roots']:
+            setattr(self, name, shared_array(getattr(self, name), directory))
+
+    def leaves(self, data: np.ndarray) -> np.ndarray:
+        """
+        Leaf reached by each row in each tree, array of shape (trees, rows).
+        """
+        values = data.ravel()
+        row_offsets = np.arange(len(data)) * data.shape[1]
+        nodes = np.repeat(self.roots[:, np.newaxis], len(data), axis=1)
+        for _ in range(self.max_depth):
+            go_right = values[row_offsets + self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.children[nodes, go_right.view(np.int8)]
+        return nodes
+
+    def score_samples(self, data: np.ndarray) -> np.ndarray:
+        """
+        Opposite of the anomaly score of each row, the same as 'IsolationForest.score_samples'.
+        """
+        # Trees of scikit-learn compare float32 values
+        data = np.asarray(data, dtype=np.float32).astype(np.float64)
+        scores = np.empty(len(data))
+        for start in range(0, len(data), self.chunk_size):
+            # Path lengths are summed tree by tree, in the same order as by scikit-learn ('sum' may sum pairwise)
+            depths = np.cumsum(self.leaf_depth[self.leaves(data[start:start + self.chunk_size])], axis=0)[-1]
+            scores[start:start + self.chunk_size] = -2 ** (
+                -np.divide(depths, self.denominator, out=np.ones_like(depths), where=self.denominator != 0))
+        return scores
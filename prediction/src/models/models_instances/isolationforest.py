@@ -1,8 +1,11 @@
+from typing import Optional
 from joblib import load
 import os
 import numpy as np
+from sklearn.ensemble import IsolationForest
 from src.models.basic_model import Model
 from src.models.model_config import ModelConfig
+from src.models.models_instances.flat_isolation_forest import FlatIsolationForest
 
 from src.domain.prediction_data import SingleBusPredictionData
 
@@ -10,7 +13,7 @@ from src.domain.prediction_data import SingleBusPredictionData
 class Isolationforest(Model):
     """
     This class manage single model for selected bus. This class support IsolationForest model implemented with
-    'scikit-learn' library.
+    'scikit-learn' library. Fitted forests are queried as 'FlatIsolationForest', which scores the same.
 
     Attributes
     ---------
@@ -20,8 +23,13 @@ class Isolationforest(Model):
         model which is queried and based on its result, a decision is made about an anomaly on the selected bus
     """
 
+    # Forests are converted to 'FlatIsolationForest'
+    flat_forest = True
+
     def __init__(self, config: ModelConfig):
         super(Isolationforest, self).__init__(config)
+        if self.flat_forest and isinstance(self.model, IsolationForest):
+            self.model = FlatIsolationForest.from_forest(self.model)
 
     def load_model(self):
         """
@@ -34,6 +42,17 @@ class Isolationforest(Model):
         model_path = os.path.join(self.config.models_dir, self.config.model_file_name)
         return load(model_path)
 
+    def share_weights(self, directory: str):
+        if isinstance(self.model, FlatIsolationForest):
+            self.model.share_weights(directory)
+
+    @property
+    def input_width(self) -> Optional[int]:
+        width = getattr(self.model, 'n_features_in_', None)
+        if width is not None and self.body_voltage_pair_encoder is not None:
+            width -= self.body_voltage_pair_encoder.transform(self.body_voltage_pair_encoder.OOB).shape[1]
+        return width
+
     def anomaly_score(self, data: SingleBusPredictionData) -> float:
         """
         This method compute the anomaly score. Proper shape of the data is checked and prediction data are scaled.
@@ -60,3 +79,14 @@ class Isolationforest(Model):
             concatenated_input_data = np.concatenate((extended_data, body_program_code), axis=1)
             prediction_result = -self.model.score_samples(concatenated_input_data)[0]
         return prediction_result
+
+    def anomaly_scores(self, data: np.ndarray, car_body_type: str, voltage_program_type: str) -> np.ndarray:
+        """
+        Vectorized version of 'anomaly_score': the forest scores all paintings with one 'score_samples' call.
+        """
+        scaled_prediction_data = self.scale_input_data(data)
+        if self.body_voltage_pair_encoder is not None:
+            body_program_code = self.body_voltage_pair_encoder.transform(car_body_type + voltage_program_type)
+            scaled_prediction_data = np.concatenate(
+                (scaled_prediction_data, np.repeat(body_program_code, len(data), axis=0)), axis=1)
+        return -self.model.score_samples(scaled_prediction_data)
@@ -0,0 +1,295 @@
+import json
+import os
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.models.shared_arrays import shared_array
+
+
+class UnsupportedModelError(ValueError):
+    """
+    The Keras model contains layers (or a structure) which 'NumpyAutoencoder' does not implement.
+    """
+
+
+ACTIVATIONS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0.0),
+    'sigmoid': lambda x: 1.0 / (1.0 + np.exp(-x)),
+    'tanh': np.tanh,
+    'elu': lambda x: np.where(x > 0, x, np.expm1(np.minimum(x, 0.0))),
+    'selu': lambda x: 1.0507009873554805 * np.where(x > 0, x, 1.6732632423543772 * np.expm1(np.minimum(x, 0.0))),
+    'softplus': lambda x: np.logaddexp(x, 0.0),
+    'softsign': lambda x: x / (1.0 + np.abs(x)),
+    'exponential': np.exp,
+}
+
+# Layers without effect on inference
+IDENTITY_LAYERS = {'Dropout', 'GaussianDropout', 'AlphaDropout', 'GaussianNoise', 'ActivityRegularization'}
+
+
+class Layer:
+    """
+    Layer of the network: operation, its parameters and names of its input layers.
+    """
+
+    def __init__(self, name: str, operation: str, inputs: List[str], **parameters):
+        self.name = name
+        self.operation = operation
+        self.inputs = inputs
+        self.parameters = parameters
+
+    def __call__(self, *inputs: np.ndarray) -> np.ndarray:
+        if self.operation == 'dense':
+            outputs = inputs[0] @ self.parameters['kernel']
+            if self.parameters['bias'] is not None:
+                outputs += self.parameters['bias']
+            return ACTIVATIONS[self.parameters['activation']](outputs)
+        if self.operation == 'affine':
+            return inputs[0] * self.parameters['scale'] + self.parameters['offset']
+        if self.operation == 'activation':
+            return ACTIVATIONS[self.parameters['activation']](inputs[0])
+        if self.operation == 'leaky_relu':
+            return np.where(inputs[0] > 0, inputs[0], inputs[0] * self.parameters['alpha'])
+        if self.operation == 'concatenate':
+            return np.concatenate(inputs, axis=-1)
+        return inputs[0]
+
+
+def activation_name(config: Dict) -> str:
+    activation = config.get('activation', 'linear')
+    if not isinstance(activation, str) or activation not in ACTIVATIONS:
+        raise UnsupportedModelError(f"Activation {activation} is not supported.")
+    return activation
+
+
+def create_layer(class_name: str, config: Dict, weights: Sequence[np.ndarray], inputs: List[str]) -> Layer:
+    """
+    NumPy version of a Keras layer from its configuration and weights.
+    """
+    name = config['name']
+    if class_name == 'Dense':
+        if len(weights) != (2 if config.get('use_bias', True) else 1):
+            raise UnsupportedModelError(f"Weights of layer {name} are missing.")
+        bias = np.asarray(weights[1], dtype=np.float64) if config.get('use_bias', True) else None
+        return Layer(name, 'dense', inputs, kernel=np.asarray(weights[0], dtype=np.float64), bias=bias,
+                     activation=activation_name(config))
+    if class_name == 'Activation':
+        return Layer(name, 'activation', inputs, activation=activation_name(config))
+    if class_name == 'LeakyReLU':
+        return Layer(name, 'leaky_relu', inputs, alpha=float(config.get('alpha', 0.3)))
+    if class_name == 'ReLU' and not config.get('max_value') and not config.get('negative_slope') \
+            and not config.get('threshold'):
+        return Layer(name, 'activation', inputs, activation='relu')
+    if class_name == 'BatchNormalization' and config.get('axis') in (-1, [-1], 1, [1]):
+        weights = list(weights)
+        gamma = weights.pop(0) if config.get('scale', True) else 1.0
+        beta = weights.pop(0) if config.get('center', True) else 0.0
+        moving_mean, moving_variance = weights
+        scale = np.asarray(gamma, dtype=np.float64) / np.sqrt(np.asarray(moving_variance, dtype=np.float64)
+                                                               + config.get('epsilon', 1e-3))
+        return Layer(name, 'affine', inputs, scale=scale, offset=beta - moving_mean * scale)
+    if class_name == 'Concatenate' and config.get('axis', -1) in (-1, 1):
+        return Layer(name, 'concatenate', inputs)
+    if class_name in IDENTITY_LAYERS:
+        return Layer(name, 'identity', inputs)
+    raise UnsupportedModelError(f"Layer {class_name} is not supported.")
+
+
+def inbound_layer_names(layer_config: Dict) -> List[str]:
+    """
+    Names of the input layers of a layer of a functional model (Keras 2 configuration).
+    """
+    inbound_nodes = layer_config.get('inbound_nodes', [])
+    if len(inbound_nodes) != 1 or not isinstance(inbound_nodes[0], list):
+        raise UnsupportedModelError(f"Layer {layer_config['config']['name']} is shared or has unknown inputs.")
+    names = []
+    for inbound in inbound_nodes[0]:
+        if inbound[1] != 0 or inbound[2] != 0:
+            raise UnsupportedModelError(f"Layer {layer_config['config']['name']} uses a shared layer.")
+        names.append(inbound[0])
+    return names
+
+
+def parse_model(class_name: str, config: Dict,
+                weights: Dict[str, Sequence[np.ndarray]]) -> Tuple[List[Layer], List[str], str]:
+    """
+    Layers (in the order of evaluation), names of the inputs and name of the output of a Keras model.
+    """
+    layers, inputs = [], []
+    if class_name == 'Sequential':
+        previous = 'input'
+        inputs.append(previous)
+        for layer_config in config['layers']:
+            if layer_config['class_name'] == 'InputLayer':
+                continue
+            layer = create_layer(layer_config['class_name'], layer_config['config'],
+                                 weights.get(layer_config['config']['name'], []), [previous])
+            layers.append(layer)
+            previous = layer.name
+        return layers, inputs, previous
+    if class_name in ('Functional', 'Model'):
+        if len(config['output_layers']) != 1:
+            raise UnsupportedModelError("Only models with a single output are supported.")
+        for layer_config in config['layers']:
+            if layer_config['class_name'] == 'InputLayer':
+                continue
+            layers.append(create_layer(layer_config['class_name'], layer_config['config'],
+                                       weights.get(layer_config['config']['name'], []),
+                                       inbound_layer_names(layer_config)))
+        inputs = [input_layer[0] for input_layer in config['input_layers']]
+        return layers, inputs, config['output_layers'][0][0]
+    raise UnsupportedModelError(f"Model {class_name} is not supported.")
+
+
+class NumpyAutoencoder:
+    """
+    Inference of a dense Keras autoencoder with NumPy: weights are loaded once and the forward pass is computed as
+    plain matrix multiplications, without the dispatch overhead of TensorFlow (and its runtime, if the model is read
+    from a HDF5 file by 'from_h5').
+
+    Scaling of the input data ('Model.scale_input_data') is folded into the layers: into the weights of the Dense layers
+    reading the data input and, if the output layer is a linear Dense layer, its inverse into the output layer. The
+    reconstruction error is then computed on the raw data (weighted by the inverse of the scaler variance).
+
+    Attributes
+    ----------
+    layers
+        Layers in the order of evaluation.
+    inputs
+        Names of the inputs of the model, the first one is the data, the others e.g. the code of the painting type.
+    output
+        Name of the output layer.
+    """
+
+    def __init__(self, layers: List[Layer], inputs: List[str], output: str, scaler_mean=0.0, scaler_var=1.0):
+        self.layers = layers
+        self.inputs = inputs
+        self.output = output
+        self.scaler_mean = np.asarray(scaler_mean, dtype=np.float64)
+        self.scaler_std = np.sqrt(np.asarray(scaler_var, dtype=np.float64))
+        self.scaled_input = self.fold_input_scaling()
+        self.scaled_output = self.fold_output_scaling()
+
+    @classmethod
+    def from_keras(cls, model, scaler_mean=0.0, scaler_var=1.0) -> 'NumpyAutoencoder':
+        """
+        NumPy version of a loaded Keras model.
+        """
+        weights = {layer.name: layer.get_weights() for layer in model.layers}
+        config = json.loads(model.to_json())
+        return cls(*parse_model(config['class_name'], config['config'], weights), scaler_mean, scaler_var)
+
+    @classmethod
+    def from_h5(cls, path: str, scaler_mean=0.0, scaler_var=1.0) -> 'NumpyAutoencoder':
+        """
+        NumPy version of a Keras model saved as a HDF5 file, read without TensorFlow.
+        """
+        try:
+            import h5py
+        except ImportError:
+            raise UnsupportedModelError("h5py is not installed.")
+        if not (os.path.isfile(path) and h5py.is_hdf5(path)):
+            raise UnsupportedModelError(f"{path} is not a HDF5 file.")
+        with h5py.File(path, 'r') as f:
+            if 'model_config' not in f.attrs:
+                raise UnsupportedModelError(f"{path} contains no model configuration.")
+            model_config = f.attrs['model_config']
+            config = json.loads(model_config.decode('utf-8') if isinstance(model_config, bytes) else model_config)
+            weights_group = f['model_weights'] if 'model_weights' in f else f
+            weights = {}
+            for layer_name in weights_group:
+                layer_group = weights_group[layer_name]
+                weight_names = [name.decode('utf-8') if isinstance(name, bytes) else name
+                                for name in layer_group.attrs.get('weight_names', [])]
+                weights[layer_name] = [np.asarray(layer_group[name]) for name in weight_names]
+        return cls(*parse_model(config['class_name'], config['config'], weights), scaler_mean, scaler_var)
+
+    @property
+    def output_width(self) -> Optional[int]:
+        output_layer = next(layer for layer in self.layers if layer.name == self.output)
+        return output_layer.parameters['kernel'].shape[1] if output_layer.operation == 'dense' else None
+
+    def consumers(self, name: str) -> List[Layer]:
+        return [layer for layer in self.layers if name in layer.inputs]
+
+    def fold_input_scaling(self) -> bool:
+        """
+        Folds the input scaling into the Dense layers reading the data input, if all of its readers are Dense layers.
+
+        Returns
+        -------
+        Bool
+            True if the network expects scaled data.
+        """
+        readers = self.consumers(self.inputs[0])
+        if not readers or any(layer.operation != 'dense' or layer.inputs != [self.inputs[0]] for layer in readers):
+            return True
+        for layer in readers:
+            kernel = layer.parameters['kernel']
+            std = np.broadcast_to(self.scaler_std, kernel.shape[:1])
+            mean = np.broadcast_to(self.scaler_mean, kernel.shape[:1])
+            bias = layer.parameters['bias'] if layer.parameters['bias'] is not None else np.zeros(kernel.shape[1])
+            layer.parameters['kernel'] = kernel / std[:, np.newaxis]
+            layer.parameters['bias'] = bias - (mean / std) @ kernel
+        return False
+
+    def fold_output_scaling(self) -> bool:
+        """
+        Folds the inverse of the input scaling into the output layer, if it is a linear Dense layer.
+
+        Returns
+        -------
+        Bool
+            True if the network reconstructs scaled data.
+        """
+        output_layer = next(layer for layer in self.layers if layer.name == self.output)
+        if output_layer.operation != 'dense' or output_layer.parameters['activation'] != 'linear' \
+                or self.consumers(self.output):
+            return True
+        kernel = output_layer.parameters['kernel']
+        std = np.broadcast_to(self.scaler_std, kernel.shape[1:])
+        mean = np.broadcast_to(self.scaler_mean, kernel.shape[1:])
+        bias = output_layer.parameters['bias'] if output_layer.parameters['bias'] is not None else 0.0
+        output_layer.parameters['kernel'] = kernel * std
+        output_layer.parameters['bias'] = bias * std + mean
+        return False
+
+    def share_weights(self, directory: str):
+        """
+        Replaces the weights by read-only memory-mapped arrays (see 'shared_array').
+        """
+        for layer in self.layers:
+            for name, value in layer.parameters.items():
+                if isinstance(value, np.ndarray):
+                    layer.parameters[name] = shared_array(value, directory)
+
+    def __call__(self, *inputs: np.ndarray) -> np.ndarray:
+        """
+        Output of the network for the (not scaled) inputs.
+        """
+        values = dict(zip(self.inputs, [np.asarray(value, dtype=np.float64) for value in inputs]))
+        if self.scaled_input:
+            values[self.inputs[0]] = (values[self.inputs[0]] - self.scaler_mean) / self.scaler_std
+        for layer in self.layers:
+            values[layer.name] = layer(*[values[name] for name in layer.inputs])
+        return values[self.output]
+
+    def reconstruction_errors(self, data: np.ndarray, *other_inputs: np.ndarray) -> np.ndarray:
+        """
+        Mean squared error between the scaled data and their reconstruction, for each row of the data (the same as
+        'Autoencoder.reconstruction_score' of the Keras model).
+
+        Parameters
+        ----------
+        data
+            Array of shape (paintings, features) with not scaled data.
+        other_inputs
+            Other inputs of the model, e.g. the code of the painting type of each painting.
+        """
+        data = np.asarray(data, dtype=np.float64)
+        reconstruction = self(data, *other_inputs)
+        if self.scaled_output:
+            return np.square((data - self.scaler_mean) / self.scaler_std - reconstruction).mean(axis=1)
+        return (np.square(data - reconstruction) / np.square(self.scaler_std)).mean(axis=1)
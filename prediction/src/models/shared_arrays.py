@@ -0,0 +1,29 @@
+import hashlib
+import os
+
+import numpy as np
+
+
+def shared_array(array: np.ndarray, directory: str) -> np.ndarray:
+    """
+    Read-only memory-mapped copy of the array. The file is named by the content of the array, so processes loading
+    the same model map the same file and share its pages (e.g. gunicorn workers, also the ones which loaded the model
+    after the fork).
+
+    Parameters
+    ----------
+    array
+        Array to share.
+    directory
+        Directory of the files, preferably in memory (e.g. /dev/shm).
+    """
+    array = np.ascontiguousarray(array)
+    digest = hashlib.sha1(f"{array.dtype.str}{array.shape}".encode() + array.tobytes()).hexdigest()
+    path = os.path.join(directory, f"{digest}.npy")
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as f:
+            np.save(f, array, allow_pickle=False)
+        os.replace(temporary_path, path)
+    return np.load(path, mmap_mode='r')
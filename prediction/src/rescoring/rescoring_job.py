@@ -0,0 +1,174 @@
+import argparse
+import logging
+import multiprocessing
+import os
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from dataset_utils.feature_shards import METADATA, dataset_parts, read_part, write_shard
+from src.config_reader import config
+from src.models.models_handlers.basic_models_handler import BasicModelsHandler
+from src.models.models_handlers.multiple_types_models_handler import MultipleTypesModelsHandler
+from src.models.models_handlers.single_type_models_handler import SingleTypeModelsHandler
+from src.utils import check_if_ensemble, set_up_logger
+
+# State of the worker process: models handler, features of the dataset (payload field name -> memory-mapped parts)
+# and offsets of the parts
+worker_state: Optional[Tuple[BasicModelsHandler, Dict[str, List[np.ndarray]], np.ndarray]] = None
+
+
+def create_models_handler() -> BasicModelsHandler:
+    return MultipleTypesModelsHandler() if check_if_ensemble(config) else SingleTypeModelsHandler()
+
+
+def init_worker(dataset_directory: str, models_handler: Optional[BasicModelsHandler] = None):
+    """
+    Loads the models (unless a handler is given) and memory-maps the features they need.
+    """
+    global worker_state
+    models_handler = models_handler if models_handler is not None else create_models_handler()
+    fields = models_handler.payload_field_names()
+    parts = dataset_parts(dataset_directory)
+    features = {field: [read_part(dataset_directory, field, part, ["values"])["values"] for part in parts]
+                for field in fields}
+    lengths = [len(read_part(dataset_directory, METADATA, part, ["timeOfEvent"])["timeOfEvent"]) for part in parts]
+    worker_state = (models_handler, features, np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64))
+
+
+def gather_rows(parts: List[np.ndarray], offsets: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """
+    Rows of the dataset with the given (sorted) indices, read from the parts they are in.
+    """
+    part_of_row = np.searchsorted(offsets, indices, side='right') - 1
+    return np.concatenate([parts[part][indices[part_of_row == part] - offsets[part]]
+                           for part in np.unique(part_of_row)])
+
+
+def score_batch(batch: Tuple[str, str, np.ndarray]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Scores a batch of paintings of the same type in the worker process.
+    """
+    models_handler, features, offsets = worker_state
+    car_body_type, voltage_program_type, indices = batch
+    data = {field: gather_rows(parts, offsets, indices).reshape(len(indices), len(models_handler.buses), -1)
+            for field, parts in features.items()}
+    result = models_handler.predict_batch(data, car_body_type, voltage_program_type)
+    return indices, result.to_columns()
+
+
+class RescoringJob:
+    """
+    Offline scoring of the paintings of a training dataset (built by preprocessing, see `FeatureDataset`) by
+    the prediction models, e.g. after a model update.
+
+    Paintings are grouped by their type (car body type and voltage program type select the models, see
+    'SpecificPaintingTypeKey', and the encoding of the general models) and each group is scored in large batches by
+    'predict_batch' of the models handler. Batches are spread across worker processes, each with its own models.
+    Scores are written as a group of the dataset: a part per part of the dataset, with 'timeOfEvent' and the columns
+    of 'BatchDetectionResult.to_columns'.
+    """
+
+    def __init__(self, dataset_directory: str, output_directory: Optional[str] = None, workers: Optional[int] = None,
+                 batch_size: int = 8192):
+        """
+        Parameters
+        ----------
+        dataset_directory
+            Directory of the dataset.
+        output_directory
+            Directory of the scores, the 'scores' group of the dataset by default.
+        workers
+            Number of worker processes, the number of CPUs by default. With one worker, paintings are scored
+            in this process.
+        batch_size
+            Maximal number of paintings scored at once.
+        """
+        self.dataset_directory = dataset_directory
+        self.output_directory = output_directory or os.path.join(dataset_directory, 'scores')
+        self.workers = workers or os.cpu_count()
+        self.batch_size = batch_size
+
+    def read_metadata(self, column: str) -> np.ndarray:
+        parts = [read_part(self.dataset_directory, METADATA, part, [column])[column]
+                 for part in dataset_parts(self.dataset_directory)]
+        return np.concatenate(parts) if parts else np.array([])
+
+    def batches(self) -> Iterator[Tuple[str, str, np.ndarray]]:
+        """
+        Batches of paintings of the same type: car body type, voltage program type and sorted indices of the paintings.
+        """
+        painting_types = np.stack([self.read_metadata('carBodyType').astype(str),
+                                   self.read_metadata('voltageProgramType').astype(str)], axis=1)
+        if not len(painting_types):
+            return
+        types, inverse = np.unique(painting_types, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        groups = np.split(np.argsort(inverse, kind='stable'), np.cumsum(np.bincount(inverse))[:-1])
+        for (car_body_type, voltage_program_type), indices in zip(types, groups):
+            for start in range(0, len(indices), self.batch_size):
+                yield str(car_body_type), str(voltage_program_type), indices[start:start + self.batch_size]
+
+    def run(self, models_handler: Optional[BasicModelsHandler] = None) -> int:
+        """
+        Scores all paintings of the dataset and writes the scores.
+
+        Parameters
+        ----------
+        models_handler
+            Models used when paintings are scored in this process, loaded according to the configuration by default.
+
+        Returns
+        -------
+        int
+            Number of scored paintings.
+        """
+        start_time = time.perf_counter()
+        parts = dataset_parts(self.dataset_directory)
+        times_of_event = [read_part(self.dataset_directory, METADATA, part, ["timeOfEvent"])["timeOfEvent"]
+                          for part in parts]
+        paintings = sum(len(times) for times in times_of_event)
+        scores: Dict[str, np.ndarray] = {}
+
+        def collect(results):
+            for indices, columns in results:
+                for column, values in columns.items():
+                    if column not in scores:
+                        scores[column] = np.zeros(paintings, dtype=values.dtype)
+                    scores[column][indices] = values
+
+        if self.workers == 1:
+            init_worker(self.dataset_directory, models_handler)
+            collect(map(score_batch, self.batches()))
+        else:
+            # Models are loaded by each worker, forking a process with loaded models is not safe (e.g. tensorflow)
+            context = multiprocessing.get_context('spawn')
+            with context.Pool(processes=self.workers, initializer=init_worker,
+                              initargs=(self.dataset_directory,)) as pool:
+                collect(pool.imap_unordered(score_batch, self.batches()))
+
+        os.makedirs(self.output_directory, exist_ok=True)
+        offset = 0
+        for part, times in zip(parts, times_of_event):
+            write_shard(self.output_directory, part, {"timeOfEvent": np.asarray(times),
+                                                      **{column: values[offset:offset + len(times)]
+                                                         for column, values in scores.items()}})
+            offset += len(times)
+        elapsed = time.perf_counter() - start_time
+        logging.info(f"Scored {paintings} paintings in {elapsed:.1f} s ({paintings / max(elapsed, 1e-9) * 60:.0f} "
+                     f"paintings per minute).")
+        return paintings
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Scores the paintings of a dataset by the prediction models.")
+    parser.add_argument('dataset', help='Directory of the dataset.')
+    parser.add_argument('-output', help='Directory of the scores, the scores group of the dataset by default.',
+                        default=None)
+    parser.add_argument('-workers', help='Number of processes, the number of CPUs by default.', type=int,
+                        default=None)
+    parser.add_argument('-batch-size', help='Maximal number of paintings scored at once.', type=int, default=8192)
+    args = vars(parser.parse_args())
+    set_up_logger()
+    RescoringJob(args['dataset'], args['output'], args['workers'], args['batch_size']).run()
@@ -0,0 +1,27 @@
+import argparse
+import timeit
+
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+from src.models.models_instances.flat_isolation_forest import FlatIsolationForest
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-rows', help='Numbers of scored paintings.', default=[1, 64, 8192], nargs='+', type=int)
+    parser.add_argument('-trees', help='Number of trees of the forest.', default=100, type=int)
+    parser.add_argument('-features', help='Number of features.', default=12, type=int)
+    parser.add_argument('-repeat', help='Number of repetitions.', default=5, type=int)
+    args = vars(parser.parse_args())
+
+    rng = np.random.default_rng(0)
+    forest = IsolationForest(n_estimators=args['trees'], random_state=0).fit(rng.normal(size=(3000, args['features'])))
+    scorers = {"scikit-learn": forest.score_samples, "flat": FlatIsolationForest.from_forest(forest).score_samples}
+    for rows in args['rows']:
+        data = rng.normal(size=(rows, args['features']))
+        assert np.array_equal(scorers["flat"](data), scorers["scikit-learn"](data))
+        times = {name: min(timeit.repeat(lambda: score_samples(data), number=1, repeat=args['repeat']))
+                 for name, score_samples in scorers.items()}
+        print(f"Rows: {rows}, " + ", ".join(
+            f"{name}: {time * 1000:.2f} ms ({times['scikit-learn'] / time:.1f}x)" for name, time in times.items()))
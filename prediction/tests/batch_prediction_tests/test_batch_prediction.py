@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from tests.conftest import BUSES, FEATURES, assert_same_result
+
+
+def preprocessing_results(count):
+    features = np.random.default_rng(3).normal(size=(count, len(BUSES), FEATURES))
+    car_body_types = ['CG33', 'CG43', 'cg33']
+    return [{'status': 'CORRECT',
+             'payload': {'metadata': {'carBodyType': car_body_types[i % 3], 'voltageProgramType': '2000'},
+                         'interpolationFeatures': painting_features.tolist()}}
+            for i, painting_features in enumerate(features)]
+
+
+@pytest.mark.batch_prediction
+def test_predict_many_gives_the_same_results_as_single_paintings(models_handler):
+    payloads = [result['payload'] for result in preprocessing_results(10)]
+    payloads[4] = {**payloads[4], 'interpolationFeatures': payloads[4]['interpolationFeatures'][:3]}
+    payloads.append({'interpolationFeatures': []})
+
+    results = models_handler.predict_many(payloads)
+
+    assert len(results) == len(payloads)
+    assert results[4] is None and results[-1] is None
+    for i in [0, 1, 2, 3, 5, 9]:
+        assert_same_result(results[i], models_handler(payloads[i]).to_dict())
+
+
+@pytest.mark.batch_prediction
+def test_predict_batch_endpoint(models_handler, monkeypatch):
+    from src import main
+    monkeypatch.setattr(main, 'models', models_handler)
+    results = preprocessing_results(5)
+
+    response = main.app.test_client().post('/predict_batch', json={'preprocessingResults': results})
+
+    assert response.status_code == 200
+    prediction_results = response.get_json()['predictionResults']
+    assert len(prediction_results) == len(results)
+    for result, prediction_result in zip(results, prediction_results):
+        assert_same_result(prediction_result, models_handler(result['payload']).to_dict())
+
+
+@pytest.mark.batch_prediction
+def test_predict_batch_endpoint_gives_null_for_items_without_payload(models_handler, monkeypatch):
+    from src import main
+    monkeypatch.setattr(main, 'models', models_handler)
+    results = preprocessing_results(3)
+
+    response = main.app.test_client().post('/predict_batch', json={'preprocessingResults': [
+        results[0], {'status': 'CORRECT'}, None, 'painting', results[2]]})
+
+    assert response.status_code == 200
+    prediction_results = response.get_json()['predictionResults']
+    assert prediction_results[1:4] == [None, None, None]
+    assert_same_result(prediction_results[0], models_handler(results[0]['payload']).to_dict())
+    assert_same_result(prediction_results[4], models_handler(results[2]['payload']).to_dict())
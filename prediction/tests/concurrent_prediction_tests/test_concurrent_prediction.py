@@ -0,0 +1,75 @@
+import os
+import threading
+
+import numpy as np
+import pytest
+
+from tests.conftest import BUSES, FEATURES
+
+
+def payloads(count):
+    features = np.random.default_rng(3).normal(size=(count, len(BUSES), FEATURES))
+    features[1:2, 2, 0] = np.nan
+    car_body_types = ['CG33', 'CG43', 'CG99']
+    return [{'metadata': {'carBodyType': car_body_types[i % 3], 'voltageProgramType': '2000'},
+             'interpolationFeatures': painting_features.tolist()} for i, painting_features in enumerate(features)]
+
+
+def loaded_models(models_handler):
+    return [model for models in list(models_handler.models.values()) for model in models.values()]
+
+
+@pytest.mark.concurrent_prediction
+def test_concurrent_prediction_gives_the_same_results(models_handler):
+    requests = payloads(6)
+    expected = [models_handler(payload).to_dict() for payload in requests]
+    data = models_handler.stack_payloads(requests[:3:2], 'CG33', '2000')
+    expected_batch = models_handler.predict_batch(data, 'CG33', '2000').to_dicts()
+
+    models_handler.setup_config.prediction_threads = 4
+
+    assert [models_handler(payload).to_dict() for payload in requests] == expected
+    assert models_handler.predict_batch(data, 'CG33', '2000').to_dicts() == expected_batch
+    assert models_handler.prediction_executor is not None
+
+
+@pytest.mark.concurrent_prediction
+def test_models_of_all_types_and_buses_are_queried_concurrently(models_handler, monkeypatch):
+    request = payloads(1)[0]
+    expected = models_handler(request).to_dict()
+    queries = len(BUSES) * len(models_handler.setup_config.model_types)
+    # Every query waits for all the others, sequential queries would break the barrier
+    barrier = threading.Barrier(queries, timeout=10)
+    for model_class in {type(model) for model in loaded_models(models_handler)}:
+        def waiting_call(self, data, call=model_class.__call__):
+            barrier.wait()
+            return call(self, data)
+        monkeypatch.setattr(model_class, '__call__', waiting_call)
+
+    models_handler.setup_config.prediction_threads = queries
+
+    assert models_handler(request).to_dict() == expected
+
+
+@pytest.mark.concurrent_prediction
+def test_errors_of_concurrent_queries_are_raised(models_handler, monkeypatch):
+    models_handler.setup_config.prediction_threads = 4
+    model_class = type(loaded_models(models_handler)[0])
+
+    def failing_call(self, data):
+        raise ValueError('Model failed.')
+
+    monkeypatch.setattr(model_class, '__call__', failing_call)
+    with pytest.raises(ValueError, match='Model failed.'):
+        models_handler(payloads(1)[0])
+
+
+@pytest.mark.concurrent_prediction
+def test_pool_of_threads_is_created_in_each_process(models_handler):
+    models_handler.setup_config.prediction_threads = 4
+    executor = models_handler.get_prediction_executor()
+    assert models_handler.get_prediction_executor() is executor
+
+    # As in a worker forked after the handler was created
+    models_handler.prediction_executor_pid = os.getpid() + 1
+    assert models_handler.get_prediction_executor() is not executor
@@ -1,5 +1,10 @@
+import os
 import sys
+from importlib import reload
+
+import numpy as np
 import pytest
+from sklearn.ensemble import IsolationForest
 
 config = None
 
@@ -42,3 +47,82 @@ def setup_config_model_type():
         }
         sys.modules['src.config_reader'] = module
     return setup_config
+
+
+# Models of the 'models_handler' fixture: created in memory for the painting types, one per bus
+FEATURES = 8
+BUSES = ['K1', 'K2', 'K3', 'K4']
+PAINTING_TYPES = [('CG33', '2000'), ('general', 'general')]
+
+
+def training_data(seed):
+    return np.random.default_rng(seed).normal(size=(200, FEATURES))
+
+
+def isolation_forest(seed):
+    return IsolationForest(n_estimators=20, random_state=seed).fit(training_data(seed))
+
+
+def autoencoder(seed):
+    from tensorflow import keras
+    keras.utils.set_random_seed(seed)
+    model = keras.Sequential([keras.Input(shape=(FEATURES,)), keras.layers.Dense(3), keras.layers.Dense(FEATURES)])
+    model.compile(optimizer='adam', loss='mse')
+    return model
+
+
+def add_models(handler, model_type, monkeypatch):
+    # Modules of 'src' are imported once the configuration above replaces 'src.config_reader'
+    from src.domain.specific_painting_type_dict import SpecificPaintingTypeKey
+    from src.models.model_config import ModelConfig
+    from src.models.models_instances import Autoencoder, Isolationforest
+    model_class, create_model, std_multiplication = {
+        'Isolationforest': (Isolationforest, isolation_forest, None),
+        'Autoencoder': (Autoencoder, autoencoder, 1),
+    }[model_type]
+    for seed, (car_body_type, voltage_program_type) in enumerate(PAINTING_TYPES):
+        key = SpecificPaintingTypeKey(model_type=model_type, car_body_type=car_body_type,
+                                      voltage_program_type=voltage_program_type)
+        handler.models[key] = dict()
+        for i, bus in enumerate(BUSES):
+            monkeypatch.setattr(model_class, 'load_model', lambda self, m=create_model(10 * seed + i): m)
+            handler.models[key][bus] = model_class(ModelConfig(
+                bus=bus, threshold=0.5, model_file_name=None, models_dir=None,
+                payload_field_name_for_prediction_making='interpolationFeatures', result_mean=0.5, result_var=0.1,
+                std_multiplication=std_multiplication))
+
+
+def create_handler(model_type, setup_config_model_type, tmp_path, monkeypatch):
+    from src.detection_results import batch_detection_result, detection_result
+    from src.models.models_handlers import multiple_types_models_handler, setup_config, single_type_models_handler
+    setup_config_model_type(model_type)
+    reload(detection_result)
+    reload(batch_detection_result)
+    reload(single_type_models_handler)
+    reload(multiple_types_models_handler)
+    reload(setup_config)
+    # No models on disk, they are created in memory
+    setup_config.SetupConfig.root_path = os.path.join(str(tmp_path), 'models_data', '{}')
+    if ',' in model_type:
+        handler = multiple_types_models_handler.MultipleTypesModelsHandler()
+    else:
+        handler = single_type_models_handler.SingleTypeModelsHandler()
+    for single_model_type in handler.setup_config.model_types:
+        add_models(handler, single_model_type, monkeypatch)
+    return handler
+
+
+@pytest.fixture(params=['Isolationforest', 'Autoencoder,Isolationforest'])
+def models_handler(request, setup_config_model_type, tmp_path, monkeypatch):
+    return create_handler(request.param, setup_config_model_type, tmp_path, monkeypatch)
+
+
+def assert_same_result(actual, expected):
+    """
+    Compares two prediction results (dictionaries), scores up to the rounding of batched computations.
+    """
+    assert actual['anomaly'] == expected['anomaly']
+    assert actual['score'] == pytest.approx(expected['score'], rel=1e-5)
+    for bus in BUSES:
+        assert actual[bus]['anomaly'] == expected[bus]['anomaly']
+        assert actual[bus]['score'] == pytest.approx(expected[bus]['score'], rel=1e-5)
@@ -1,6 +1,8 @@
 import os
 
+import joblib
 import pytest
+from sklearn.preprocessing import LabelBinarizer
 
 from src.models.encoders.encoder import Encoder
 from src.models.encoders.encoder_config import EncoderConfig
@@ -20,3 +22,13 @@ def encoder_ae():
 @pytest.fixture
 def encoder_if():
     return Encoder(get_encoder_config('isolationforest'))
+
+
+PAIRS = ['CG322000', 'CG332000', 'CG332110', 'CG432000']
+
+
+@pytest.fixture
+def fitted_encoder(tmp_path):
+    sklearn_encoder = LabelBinarizer().fit(PAIRS)
+    joblib.dump(sklearn_encoder, os.path.join(str(tmp_path), 'encoder'))
+    return Encoder(EncoderConfig(encoder_dir=str(tmp_path), encoder_file_name='encoder')), sklearn_encoder
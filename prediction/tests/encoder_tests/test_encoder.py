@@ -1,3 +1,8 @@
+import numpy as np
+
+from src.models.encoders.encoder import Encoder
+
+
 def test_autencoder_encoder_valid_pair(encoder_ae):
     valid_pair = 'CG322000'
     assert encoder_ae.is_valid_pair(valid_pair)
@@ -32,3 +37,34 @@ def test_usage_oob_isolationforest(encoder_if):
     valid_pair = 'CG332110'
     assert (encoder_if.transform(oob) == encoder_if.transform(invalid_pair)).all()
     assert (encoder_if.transform(oob) != encoder_if.transform(valid_pair)).any()
+
+
+def test_lookup_table_encodes_as_sklearn(fitted_encoder):
+    encoder, sklearn_encoder = fitted_encoder
+    for pair in sklearn_encoder.classes_:
+        np.testing.assert_array_equal(encoder.transform(pair), sklearn_encoder.transform([pair]))
+    np.testing.assert_array_equal(encoder.transform('C1'), sklearn_encoder.transform([Encoder.OOB]))
+    assert encoder.is_valid_pair('CG432000') and not encoder.is_valid_pair('C1')
+
+
+def test_lookup_table_does_not_query_sklearn(fitted_encoder, monkeypatch):
+    encoder, sklearn_encoder = fitted_encoder
+    expected = sklearn_encoder.transform(['CG332000', Encoder.OOB])
+    monkeypatch.setattr(encoder.encoder, 'transform', None)
+
+    np.testing.assert_array_equal(encoder.transform('CG332000'), expected[:1])
+    np.testing.assert_array_equal(encoder.transform('C1'), expected[1:])
+
+
+def test_transform_many_stacks_encoded_pairs(fitted_encoder):
+    encoder, sklearn_encoder = fitted_encoder
+    pairs = ['CG432000', 'C1', 'CG332110', 'CG432000']
+
+    encoded = encoder.transform_many(pairs)
+
+    np.testing.assert_array_equal(encoded, sklearn_encoder.transform(['CG432000', Encoder.OOB, 'CG332110',
+                                                                      'CG432000']))
+    assert encoder.transform_many([]).shape == (0, len(sklearn_encoder.classes_))
+    # Stacked codes can be modified without changing the lookup table
+    encoded[:] = 0
+    np.testing.assert_array_equal(encoder.transform('CG432000'), sklearn_encoder.transform(['CG432000']))
@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from src.models.models_handlers.micro_batching_models_handler import MicroBatchingModelsHandler
+from tests.conftest import BUSES, FEATURES, assert_same_result
+
+
+def payloads(count):
+    features = np.random.default_rng(2).normal(size=(count, len(BUSES), FEATURES))
+    car_body_types = ['CG33', 'CG43', 'CG33', 'cg33']
+    return [{'metadata': {'carBodyType': car_body_types[i % 4], 'voltageProgramType': '2000'},
+             'interpolationFeatures': painting_features.tolist()} for i, painting_features in enumerate(features)]
+
+
+@pytest.mark.micro_batching
+def test_concurrent_requests_are_predicted_together(models_handler, monkeypatch):
+    requests = payloads(24)
+    expected = [models_handler(payload).to_dict() for payload in requests]
+
+    batch_sizes = []
+    predict_batch = models_handler.predict_batch
+
+    def counting_predict_batch(data, car_body_type, voltage_program_type):
+        batch_sizes.append(len(data['interpolationFeatures']))
+        return predict_batch(data, car_body_type, voltage_program_type)
+
+    monkeypatch.setattr(models_handler, 'predict_batch', counting_predict_batch)
+    micro_batching = MicroBatchingModelsHandler(models_handler, max_batch_size=8, max_wait_ms=200)
+    with ThreadPoolExecutor(max_workers=len(requests)) as executor:
+        actual = [result.to_dict() for result in executor.map(micro_batching, requests)]
+
+    assert batch_sizes and max(batch_sizes) > 1
+    for actual_result, expected_result in zip(actual, expected):
+        assert_same_result(actual_result, expected_result)
+
+
+@pytest.mark.micro_batching
+def test_malformed_request_fails_alone(models_handler):
+    requests = payloads(4)
+    requests[1]['interpolationFeatures'] = requests[1]['interpolationFeatures'][:2]
+    micro_batching = MicroBatchingModelsHandler(models_handler, max_batch_size=4, max_wait_ms=200)
+    with ThreadPoolExecutor(max_workers=len(requests)) as executor:
+        futures = [executor.submit(micro_batching, payload) for payload in requests]
+        with pytest.raises(Exception):
+            futures[1].result()
+        for i in [0, 2, 3]:
+            assert_same_result(futures[i].result().to_dict(), models_handler(requests[i]).to_dict())
+
+
+@pytest.mark.micro_batching
+def test_batching_thread_is_started_in_forked_process(models_handler, monkeypatch):
+    micro_batching = MicroBatchingModelsHandler(models_handler, max_wait_ms=1)
+    request = payloads(1)[0]
+    micro_batching(request)
+    thread = micro_batching.thread
+
+    # As in a worker forked by gunicorn
+    monkeypatch.setattr(micro_batching, 'pid', -1)
+    assert_same_result(micro_batching(request).to_dict(), models_handler(request).to_dict())
+    assert micro_batching.thread is not thread and micro_batching.thread.is_alive()
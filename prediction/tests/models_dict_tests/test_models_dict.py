@@ -1,4 +1,8 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
+from src.domain.specific_painting_type_dict import SpecificPaintingTypeKey, GeneralModelsDict
 
 
 @pytest.mark.models_specific_keys
@@ -13,3 +17,140 @@ def test_general_models_dict(general_dict, key_1, key_2, not_existing_key):
     assert general_dict[key_1] == 'key_1'
     assert general_dict[key_2] == 'key_2'
     assert general_dict[not_existing_key] == 'general_model'
+
+
+def key(car_body_type, voltage_program_type='2000'):
+    return SpecificPaintingTypeKey(model_type='autoencoder', car_body_type=car_body_type,
+                                   voltage_program_type=voltage_program_type)
+
+
+@pytest.fixture
+def lazy_dict():
+    loads = []
+
+    def loader(painting_type):
+        loads.append(str(painting_type))
+        return str(painting_type)
+
+    lazy_dict = GeneralModelsDict(general_type='general', loader=loader, size_of=lambda _: 10, max_loaded=3)
+    for painting_type in [key('general', 'general'), key('CG33'), key('CG43'), key('CG53')]:
+        lazy_dict.register(painting_type)
+    return lazy_dict, loads
+
+
+@pytest.mark.general_models_dict
+def test_models_are_loaded_on_first_use(lazy_dict):
+    general_dict, loads = lazy_dict
+    assert len(general_dict) == 0
+    assert general_dict[key('cg33')] == 'Autoencoder&CG33&2000'
+    assert general_dict[key('CG33')] == 'Autoencoder&CG33&2000'
+    assert loads == ['Autoencoder&CG33&2000']
+
+
+@pytest.mark.general_models_dict
+def test_least_recently_used_models_are_unloaded(lazy_dict):
+    general_dict, loads = lazy_dict
+    for car_body_type in ['general', 'CG33', 'CG43', 'CG33', 'CG53', 'CG43']:
+        general_dict[key(car_body_type, 'general' if car_body_type == 'general' else '2000')]
+    # CG43 was the least recently used model when CG53 was loaded, the general model is never unloaded
+    assert loads == ['Autoencoder&GENERAL&GENERAL', 'Autoencoder&CG33&2000', 'Autoencoder&CG43&2000',
+                     'Autoencoder&CG53&2000', 'Autoencoder&CG43&2000']
+    assert set(general_dict) == {key('general', 'general'), key('CG53'), key('CG43')}
+
+    general_dict.max_loaded, general_dict.max_size = None, 25
+    general_dict[key('CG33')]
+    assert set(general_dict) == {key('general', 'general'), key('CG33')}
+
+
+@pytest.mark.general_models_dict
+def test_missing_painting_type_is_resolved_once(lazy_dict, caplog):
+    general_dict, loads = lazy_dict
+    with caplog.at_level('INFO'):
+        for _ in range(3):
+            assert general_dict[key('CG99')] == 'Autoencoder&GENERAL&GENERAL'
+    assert len([record for record in caplog.records if 'unsupported' in record.message]) == 1
+    assert general_dict.general_keys == {key('CG99'): key('general', 'general')}
+    with pytest.raises(KeyError):
+        GeneralModelsDict(general_type='general')[key('CG99')]
+
+
+def slow_dict(fails=False):
+    """
+    Dictionary whose loader of CG43 waits until 'release' is set (and then fails if 'fails').
+    """
+    loads, started, release = [], threading.Event(), threading.Event()
+
+    def loader(painting_type):
+        loads.append(str(painting_type))
+        if painting_type == key('CG43'):
+            started.set()
+            if not release.wait(timeout=10) or fails:
+                raise OSError('Loading failed.')
+        return str(painting_type)
+
+    general_dict = GeneralModelsDict(general_type='general', loader=loader)
+    for painting_type in [key('CG33'), key('CG43')]:
+        general_dict.register(painting_type)
+    general_dict[key('CG33')]
+    return general_dict, loads, started, release
+
+
+@pytest.mark.general_models_dict
+def test_loading_does_not_block_loaded_models():
+    general_dict, loads, started, release = slow_dict()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        loading = executor.submit(general_dict.__getitem__, key('CG43'))
+        assert started.wait(timeout=10)
+        assert executor.submit(general_dict.__getitem__, key('CG33')).result(timeout=2) == 'Autoencoder&CG33&2000'
+        assert not loading.done()
+        release.set()
+        assert loading.result(timeout=10) == 'Autoencoder&CG43&2000'
+
+
+@pytest.mark.general_models_dict
+def test_concurrent_retrievals_wait_for_one_load():
+    general_dict, loads, started, release = slow_dict()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        retrievals = [executor.submit(general_dict.__getitem__, key('CG43')) for _ in range(4)]
+        assert started.wait(timeout=10)
+        release.set()
+        assert [retrieval.result(timeout=10) for retrieval in retrievals] == ['Autoencoder&CG43&2000'] * 4
+    assert loads.count('Autoencoder&CG43&2000') == 1
+
+
+@pytest.mark.general_models_dict
+def test_failed_load_is_raised_and_retried():
+    general_dict, loads, started, release = slow_dict(fails=True)
+    release.set()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        retrievals = [executor.submit(general_dict.__getitem__, key('CG43')) for _ in range(4)]
+        assert all(isinstance(retrieval.exception(timeout=10), OSError) for retrieval in retrievals)
+    assert not general_dict.loading
+    with pytest.raises(OSError):
+        general_dict[key('CG43')]
+    assert general_dict[key('CG33')] == 'Autoencoder&CG33&2000'
+
+
+@pytest.mark.general_models_dict
+def test_size_of_models_is_read_outside_the_lock():
+    sizes_read_unlocked = []
+
+    def lock_is_free():
+        if not general_dict.lock.acquire(timeout=1):
+            return False
+        general_dict.lock.release()
+        return True
+
+    def size_of(painting_type):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            sizes_read_unlocked.append(executor.submit(lock_is_free).result(timeout=10))
+        return 10
+
+    general_dict = GeneralModelsDict(general_type='general', loader=str, size_of=size_of)
+    for painting_type in [key('CG33'), key('CG43')]:
+        general_dict.register(painting_type)
+    general_dict[key('CG33')]
+    general_dict.set_loaded(key('CG43'), 'preloaded')
+
+    assert sizes_read_unlocked == [True, True]
+    assert general_dict.sizes == {key('CG33'): 10, key('CG43'): 10}
@@ -0,0 +1,83 @@
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import LabelBinarizer
+
+from src.models.model_config import ModelConfig
+from src.models.models_instances import Isolationforest
+from src.models.models_instances.flat_isolation_forest import FlatIsolationForest
+
+FEATURES = 6
+PAIRS = ['CG332000', 'CG432000', 'CG992000']
+
+
+def model_config(encoder_dir=None):
+    return ModelConfig(bus='K1', threshold=0.5, model_file_name=None, models_dir=None,
+                       payload_field_name_for_prediction_making='interpolationFeatures',
+                       encoder_file_name='encoder' if encoder_dir else None, encoder_dir=encoder_dir,
+                       scaler_mean=0.3, scaler_var=2.5, result_mean=0.5, result_var=0.1)
+
+
+def data(paintings=500, features=FEATURES, seed=2):
+    return np.random.default_rng(seed).normal(size=(paintings, features))
+
+
+def isolation_forests(forest, monkeypatch, **config):
+    """
+    The same forest queried as 'FlatIsolationForest' and with 'scikit-learn'.
+    """
+    monkeypatch.setattr(Isolationforest, 'load_model', lambda self: forest)
+    flat_isolation_forest = Isolationforest(model_config(**config))
+    monkeypatch.setattr(Isolationforest, 'flat_forest', False)
+    sklearn_isolation_forest = Isolationforest(model_config(**config))
+    return flat_isolation_forest, sklearn_isolation_forest
+
+
+@pytest.mark.parametrize('parameters', [dict(), dict(max_features=0.5), dict(max_samples=40, n_estimators=250),
+                                        dict(max_samples=2, bootstrap=True)])
+def test_flat_forest_gives_the_same_scores(parameters):
+    training_data = data(seed=0)
+    forest = IsolationForest(random_state=0, **parameters).fit(training_data)
+    flat_forest = FlatIsolationForest.from_forest(forest)
+    # Paintings of the training data reach the leaves exactly at the thresholds
+    prediction_data = np.concatenate([data(), training_data[:50]])
+
+    np.testing.assert_array_equal(flat_forest.score_samples(prediction_data), forest.score_samples(prediction_data))
+    np.testing.assert_array_equal(flat_forest.score_samples(prediction_data[:1]),
+                                  forest.score_samples(prediction_data[:1]))
+
+
+def test_flat_forest_scores_in_chunks(monkeypatch):
+    forest = IsolationForest(n_estimators=20, random_state=0).fit(data(seed=0))
+    flat_forest = FlatIsolationForest.from_forest(forest)
+    monkeypatch.setattr(FlatIsolationForest, 'chunk_size', 7)
+
+    np.testing.assert_array_equal(flat_forest.score_samples(data(100)), forest.score_samples(data(100)))
+
+
+def test_isolation_forest_with_encoder_gives_the_same_scores(tmp_path, monkeypatch):
+    joblib.dump(LabelBinarizer().fit(PAIRS), os.path.join(str(tmp_path), 'encoder'))
+    training_data = np.concatenate([data(seed=0), np.eye(len(PAIRS))[np.arange(500) % len(PAIRS)]], axis=1)
+    forest = IsolationForest(random_state=0).fit(training_data)
+    flat_isolation_forest, sklearn_isolation_forest = isolation_forests(forest, monkeypatch, encoder_dir=str(tmp_path))
+    assert isinstance(flat_isolation_forest.model, FlatIsolationForest)
+    assert flat_isolation_forest.input_width == sklearn_isolation_forest.input_width == FEATURES
+
+    for car_body_type in ['CG43', 'CG11']:
+        np.testing.assert_array_equal(flat_isolation_forest.anomaly_scores(data(), car_body_type, '2000'),
+                                      sklearn_isolation_forest.anomaly_scores(data(), car_body_type, '2000'))
+
+
+def test_shared_flat_forest_is_memory_mapped(tmp_path, monkeypatch):
+    forest = IsolationForest(n_estimators=20, random_state=0).fit(data(seed=0))
+    flat_isolation_forest, _ = isolation_forests(forest, monkeypatch)
+    expected = flat_isolation_forest.anomaly_scores(data(), 'CG33', '2000')
+
+    flat_isolation_forest.share_weights(str(tmp_path))
+
+    assert isinstance(flat_isolation_forest.model.children, np.memmap)
+    np.testing.assert_array_equal(flat_isolation_forest.anomaly_scores(data(), 'CG33', '2000'), expected)
+
@@ -0,0 +1,78 @@
+import os
+from importlib import reload
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest
+
+from src.domain.specific_painting_type_dict import SpecificPaintingTypeKey
+from src.models.models_handlers import setup_config, single_type_models_handler
+from src.models.models_instances import Isolationforest
+
+BUSES = ['K1', 'K2', 'K3', 'K4']
+PAINTING_TYPES = [('general',), ('CG33', '2000'), ('CG43', '2000')]
+
+
+def write_models_data(root):
+    for i, painting_type in enumerate(PAINTING_TYPES):
+        directory = os.path.join(root, 'isolationforest', *painting_type)
+        os.makedirs(os.path.join(directory, 'models'))
+        os.makedirs(os.path.join(directory, 'features'))
+        features = dict()
+        for j, bus in enumerate(BUSES):
+            model = IsolationForest(n_estimators=5, random_state=j).fit(np.random.default_rng(i).normal(size=(50, 3)))
+            joblib.dump(model, os.path.join(directory, 'models', bus))
+            features[bus] = {'threshold': 0.5, 'model_file_name': bus, 'scaler_mean': 0.1,
+                             'payload_field_name_for_prediction_making': 'interpolationFeatures'}
+        joblib.dump(features, os.path.join(directory, 'features', 'models_features'))
+
+
+@pytest.fixture
+def create_handler(setup_config_model_type, tmp_path, monkeypatch):
+    write_models_data(str(tmp_path))
+    warmed_up = []
+    warm_up = Isolationforest.warm_up
+
+    def counting_warm_up(self, car_body_type, voltage_program_type):
+        warm_up(self, car_body_type, voltage_program_type)
+        warmed_up.append((car_body_type, self.config.bus))
+
+    monkeypatch.setattr(Isolationforest, 'warm_up', counting_warm_up)
+
+    def create(**models_config):
+        setup_config_model_type('Isolationforest')
+        from src.config_reader import config
+        config['models'].update(models_config)
+        reload(setup_config)
+        reload(single_type_models_handler)
+        setup_config.SetupConfig.root_path = os.path.join(str(tmp_path), '{}')
+        return single_type_models_handler.SingleTypeModelsHandler(), warmed_up
+    return create
+
+
+def loaded_car_body_types(handler):
+    return sorted(painting_type.car_body_type for painting_type in handler.models.keys())
+
+
+def test_models_are_preloaded_and_warmed_up(create_handler):
+    handler, warmed_up = create_handler(**{'loading-threads': 3})
+
+    assert loaded_car_body_types(handler) == ['CG33', 'CG43', 'GENERAL']
+    assert sorted(warmed_up) == sorted((car_body_type, bus) for car_body_type in ['CG33', 'CG43', 'GENERAL']
+                                       for bus in BUSES)
+    assert handler.models[SpecificPaintingTypeKey('Isolationforest', 'CG33', '2000')]['K2'].input_width == 3
+
+
+def test_models_are_loaded_on_first_use_without_preloading(create_handler):
+    handler, warmed_up = create_handler(**{'preload-models': False, 'max-loaded-painting-types': 2})
+    assert loaded_car_body_types(handler) == ['GENERAL']
+
+    payload = {'metadata': {'carBodyType': 'CG43', 'voltageProgramType': '2000'},
+               'interpolationFeatures': np.zeros((len(BUSES), 3)).tolist()}
+    handler(payload)
+    assert loaded_car_body_types(handler) == ['CG43', 'GENERAL']
+    assert [car_body_type for car_body_type, _ in warmed_up] == ['GENERAL'] * 4 + ['CG43'] * 4
+
+    handler({**payload, 'metadata': {'carBodyType': 'CG33', 'voltageProgramType': '2000'}})
+    assert loaded_car_body_types(handler) == ['CG33', 'GENERAL']
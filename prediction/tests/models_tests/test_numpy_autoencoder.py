@@ -0,0 +1,138 @@
+import json
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.preprocessing import LabelBinarizer
+
+from src.models.model_config import ModelConfig
+from src.models.models_instances import Autoencoder
+from src.models.models_instances.numpy_autoencoder import NumpyAutoencoder
+
+FEATURES = 6
+PAIRS = ['CG332000', 'CG432000', 'CG992000']
+
+
+def model_config(models_dir=None, model_file_name=None, encoder_dir=None):
+    return ModelConfig(bus='K1', threshold=0.5, model_file_name=model_file_name, models_dir=models_dir,
+                       payload_field_name_for_prediction_making='interpolationFeatures',
+                       encoder_file_name='encoder' if encoder_dir else None, encoder_dir=encoder_dir,
+                       scaler_mean=0.3, scaler_var=2.5, result_mean=0.5, result_var=0.1)
+
+
+def dense_autoencoder(output_activation='linear'):
+    from tensorflow import keras
+    keras.utils.set_random_seed(0)
+    return keras.Sequential([keras.Input(shape=(FEATURES,)), keras.layers.Dense(4, activation='relu'),
+                             keras.layers.Dropout(0.2), keras.layers.BatchNormalization(),
+                             keras.layers.Dense(3, activation='tanh'),
+                             keras.layers.Dense(FEATURES, activation=output_activation)])
+
+
+def two_input_autoencoder():
+    from tensorflow import keras
+    keras.utils.set_random_seed(1)
+    data = keras.Input(shape=(FEATURES,))
+    code = keras.Input(shape=(len(PAIRS),))
+    hidden = keras.layers.Dense(4, activation='elu')(data)
+    hidden = keras.layers.Concatenate()([hidden, code])
+    hidden = keras.layers.Dense(3, activation='sigmoid')(hidden)
+    return keras.Model(inputs=[data, code], outputs=keras.layers.Dense(FEATURES)(hidden))
+
+
+def autoencoders(keras_model, monkeypatch, **config):
+    """
+    The same model queried with NumPy and with tensorflow.
+    """
+    monkeypatch.setattr(Autoencoder, 'load_model', lambda self: keras_model)
+    numpy_autoencoder = Autoencoder(model_config(**config))
+    monkeypatch.setattr(Autoencoder, 'numpy_backend', False)
+    tensorflow_autoencoder = Autoencoder(model_config(**config))
+    return numpy_autoencoder, tensorflow_autoencoder
+
+
+def data(paintings=20):
+    return np.random.default_rng(2).normal(size=(paintings, FEATURES))
+
+
+@pytest.mark.parametrize('output_activation', ['linear', 'sigmoid'])
+def test_dense_autoencoder_gives_the_same_scores(output_activation, monkeypatch):
+    numpy_autoencoder, tensorflow_autoencoder = autoencoders(dense_autoencoder(output_activation), monkeypatch)
+    assert isinstance(numpy_autoencoder.model, NumpyAutoencoder)
+    assert numpy_autoencoder.model.scaled_output == (output_activation != 'linear')
+
+    expected = tensorflow_autoencoder.anomaly_scores(data(), 'CG33', '2000')
+    np.testing.assert_allclose(numpy_autoencoder.anomaly_scores(data(), 'CG33', '2000'), expected, rtol=1e-4)
+
+
+def test_two_input_autoencoder_gives_the_same_scores(tmp_path, monkeypatch):
+    joblib.dump(LabelBinarizer().fit(PAIRS), os.path.join(str(tmp_path), 'encoder'))
+    numpy_autoencoder, tensorflow_autoencoder = autoencoders(two_input_autoencoder(), monkeypatch,
+                                                             encoder_dir=str(tmp_path))
+    assert isinstance(numpy_autoencoder.model, NumpyAutoencoder)
+
+    for car_body_type in ['CG43', 'CG11']:
+        expected = tensorflow_autoencoder.anomaly_scores(data(), car_body_type, '2000')
+        np.testing.assert_allclose(numpy_autoencoder.anomaly_scores(data(), car_body_type, '2000'), expected,
+                                   rtol=1e-4)
+
+
+def test_hdf5_model_is_loaded_without_tensorflow(tmp_path):
+    keras_model = dense_autoencoder()
+    keras_model.save(os.path.join(str(tmp_path), 'model.h5'))
+
+    autoencoder = Autoencoder(model_config(str(tmp_path), 'model.h5'))
+
+    assert isinstance(autoencoder.model, NumpyAutoencoder)
+    expected = np.square((data() - 0.3) / np.sqrt(2.5) - keras_model.predict((data() - 0.3) / np.sqrt(2.5),
+                                                                              verbose=0)).mean(axis=1)
+    np.testing.assert_allclose(autoencoder.anomaly_scores(data(), 'CG33', '2000'), expected, rtol=1e-4)
+
+
+def test_unsupported_model_is_queried_with_tensorflow(monkeypatch):
+    from tensorflow import keras
+    keras_model = keras.Sequential([keras.Input(shape=(FEATURES,)), keras.layers.LayerNormalization(),
+                                    keras.layers.Dense(FEATURES)])
+    numpy_autoencoder, tensorflow_autoencoder = autoencoders(keras_model, monkeypatch)
+
+    assert numpy_autoencoder.model is keras_model
+    np.testing.assert_allclose(numpy_autoencoder.anomaly_scores(data(), 'CG33', '2000'),
+                               tensorflow_autoencoder.anomaly_scores(data(), 'CG33', '2000'))
+
+
+@pytest.mark.single_model
+def test_models_of_the_handler_give_the_same_scores(single_models_handler, monkeypatch):
+    autoencoder_models = [(painting_type, models) for painting_type, models in single_models_handler.models.items()
+                          if painting_type.model_type == 'Autoencoder' and models]
+    if not autoencoder_models:
+        pytest.skip('The handler has no autoencoder models.')
+    from tensorflow.keras.models import load_model
+    with open(os.path.join('tests', 'test_data', 'CG33_2000_incorrect_bus'), 'r') as j:
+        payload = json.loads(j.read())['payload']
+    for painting_type, models in autoencoder_models:
+        for i, (bus, model) in enumerate(models.items()):
+            assert isinstance(model.model, NumpyAutoencoder)
+            features = np.asarray(payload[model.config.payload_field_name_for_prediction_making][i:i + 1])
+            keras_model = load_model(os.path.join(model.config.models_dir, model.config.model_file_name))
+            monkeypatch.setattr(model, 'model', keras_model)
+            expected = model.anomaly_scores(features, painting_type.car_body_type, painting_type.voltage_program_type)
+            monkeypatch.undo()
+            np.testing.assert_allclose(model.anomaly_scores(features, painting_type.car_body_type,
+                                                            painting_type.voltage_program_type), expected, rtol=1e-4)
+
+
+def test_shared_weights_are_memory_mapped(tmp_path, monkeypatch):
+    numpy_autoencoder, tensorflow_autoencoder = autoencoders(dense_autoencoder(), monkeypatch)
+    expected = numpy_autoencoder.anomaly_scores(data(), 'CG33', '2000')
+
+    numpy_autoencoder.share_weights(str(tmp_path))
+    files = sorted(os.listdir(str(tmp_path)))
+    other_autoencoder, _ = autoencoders(dense_autoencoder(), monkeypatch)
+    other_autoencoder.share_weights(str(tmp_path))
+
+    kernels = [layer.parameters['kernel'] for layer in numpy_autoencoder.model.layers if layer.operation == 'dense']
+    assert files and all(isinstance(kernel, np.memmap) for kernel in kernels)
+    # The same weights are mapped from the same files
+    assert sorted(os.listdir(str(tmp_path))) == files
+    np.testing.assert_array_equal(numpy_autoencoder.anomaly_scores(data(), 'CG33', '2000'), expected)
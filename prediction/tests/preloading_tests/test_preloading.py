@@ -0,0 +1,15 @@
+import sys
+import types
+
+import pytest
+
+
+@pytest.mark.preloading
+def test_preloading_fails_if_models_imported_tensorflow(monkeypatch):
+    from src import main
+    monkeypatch.delitem(sys.modules, 'tensorflow', raising=False)
+    main.check_fork_safety()
+
+    monkeypatch.setitem(sys.modules, 'tensorflow', types.ModuleType('tensorflow'))
+    with pytest.raises(RuntimeError, match='preload-app'):
+        main.check_fork_safety()
@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pytest
+
+from dataset_utils.feature_shards import dataset_parts, read_part, write_shard
+from src.rescoring.rescoring_job import RescoringJob
+from tests.conftest import BUSES, FEATURES
+
+
+def write_dataset(directory, paintings=50, parts=3):
+    rng = np.random.default_rng(0)
+    car_body_types = rng.choice(['CG33', 'CG43', 'cg33'], paintings)
+    features = rng.normal(size=(paintings, len(BUSES) * FEATURES))
+    features[7, 3] = np.nan
+    features[11] *= 10
+    times = np.datetime64('2021-07-06T10:00', 'ms') + np.arange(paintings).astype('timedelta64[m]')
+    for i, rows in enumerate(np.array_split(np.arange(paintings), parts)):
+        part = f"part-{i:05d}"
+        write_shard(os.path.join(directory, 'interpolationFeatures'), part,
+                    {'timeOfEvent': times[rows], 'values': features[rows]})
+        write_shard(os.path.join(directory, 'metadata'), part,
+                    {'timeOfEvent': times[rows], 'carBodyType': car_body_types[rows],
+                     'voltageProgramType': np.full(len(rows), '2000')})
+    return car_body_types, features
+
+
+@pytest.mark.rescoring
+def test_predict_batch_gives_the_same_results_as_single_paintings(models_handler):
+    features = np.random.default_rng(1).normal(size=(6, len(BUSES), FEATURES))
+    features[2, 1, 0] = np.inf
+    for car_body_type in ['CG33', 'CG43']:
+        batch_result = models_handler.predict_batch({'interpolationFeatures': features}, car_body_type, '2000')
+        for i, painting_features in enumerate(features):
+            payload = {'metadata': {'carBodyType': car_body_type, 'voltageProgramType': '2000'},
+                       'interpolationFeatures': painting_features.tolist()}
+            expected = models_handler(payload).to_dict()
+            actual = batch_result.to_dict(i)
+            assert actual['anomaly'] == expected['anomaly']
+            assert actual['score'] == pytest.approx(expected['score'], rel=1e-5)
+            for bus in BUSES:
+                assert actual[bus]['anomaly'] == expected[bus]['anomaly']
+                assert actual[bus]['score'] == pytest.approx(expected[bus]['score'], rel=1e-5)
+
+
+@pytest.mark.rescoring
+def test_rescoring_job_writes_scores_of_all_paintings(models_handler, tmp_path):
+    car_body_types, features = write_dataset(str(tmp_path))
+
+    job = RescoringJob(str(tmp_path), workers=1, batch_size=8)
+    assert job.run(models_handler) == len(features)
+
+    output_directory = os.path.join(str(tmp_path), 'scores')
+    assert dataset_parts(str(tmp_path)) == sorted(name[:-len('.shard')] for name in os.listdir(output_directory))
+    parts = [read_part(str(tmp_path), 'scores', part) for part in dataset_parts(str(tmp_path))]
+    scores = {column: np.concatenate([part[column] for part in parts]) for column in parts[0]}
+    assert len(scores['timeOfEvent']) == len(features)
+    assert scores['K1Score'][7] == 1.0
+    for i in [0, 7, 11, len(features) - 1]:
+        payload = {'metadata': {'carBodyType': car_body_types[i], 'voltageProgramType': '2000'},
+                   'interpolationFeatures': features[i].reshape(len(BUSES), FEATURES).tolist()}
+        expected = models_handler(payload).to_dict()
+        assert scores['score'][i] == pytest.approx(expected['score'], rel=1e-5)
+        assert scores['anomaly'][i] == expected['anomaly']
+        assert scores['K2Score'][i] == pytest.approx(expected['K2']['score'], rel=1e-5)
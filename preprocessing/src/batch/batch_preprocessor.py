@@ -0,0 +1,181 @@
+import logging
+import os
+from multiprocessing import Pool
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from dataset_utils.feature_shards import write_shard
+from src.domain.metadata import Metadata
+from src.domain.preprocessing_result import PreprocessingStatus
+from src.domain.waveform import Waveform
+from src.filters.metadata_filter import MetadataFilter
+from src.preprocessors.payload_pipeline import PayloadPipeline
+
+# Batch preprocessed by the pool: BatchPreprocessor, metadata, trends and window bounds. Set before the workers are
+# forked, so they share it with the parent process instead of receiving it with every chunk.
+shared_batch: Optional[Tuple] = None
+
+
+class BatchPreprocessor:
+    """
+    Preprocessing of historical paintings in bulk. Each painting gets the same features as from `TimeBasedPreprocessor`
+    (after the metadata filters, as in `SingleRowMetadataProcessor`), but the trends are given as sorted arrays,
+    the windows of all paintings are found at once and the paintings are preprocessed in chunks by a pool of processes.
+
+    Results are written as feature shards (see `dataset_utils.feature_shards`): metadata columns, `status` and feature
+    matrices `histograms`, `tsfreshFeatures` and `interpolationFeatures` (features of all buses in one row, NaN unless
+    the status is CORRECT).
+    """
+    def __init__(self, pipeline: PayloadPipeline, shifts: Mapping[str, Tuple[np.timedelta64, np.timedelta64]],
+                 metadata_filters: Sequence[MetadataFilter] = ()):
+        """
+        Parameters
+        ----------
+        pipeline
+            Pipeline calculating the features of a painting.
+        shifts
+            Bus -> start and end of its window relative to the entry time (as in `TimeBasedPreprocessor`).
+        metadata_filters
+            Filters applied before preprocessing, the status of the first fired one is assigned to the painting.
+        """
+        self.pipeline = pipeline
+        self.shifts = shifts
+        self.metadata_filters = metadata_filters
+
+    @property
+    def feature_widths(self) -> Dict[str, int]:
+        settings = self.pipeline.feature_extractor.config.settings
+        return {
+            "histograms": sum(self.pipeline.histograms_calculator.config.bins_no.values()),
+            "tsfreshFeatures": len(self.shifts) * sum(1 if p is None else len(p) for p in settings.values()),
+            "interpolationFeatures": sum(self.pipeline.interpolator.config.no_interp_points.values()),
+        }
+
+    def window_bounds(self, bus_times: Mapping[str, np.ndarray], entry_times: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Finds the readings of all paintings with one `np.searchsorted` per bus.
+
+        Parameters
+        ----------
+        bus_times
+            Bus -> sorted timestamps of its readings (datetime64[ns]).
+        entry_times
+            Entry times of the paintings (datetime64[ns]).
+
+        Returns
+        -------
+        Dict
+            Bus -> array of shape (paintings, 2): the readings of painting `i` are `bounds[i, 0]:bounds[i, 1]`
+            (both ends of the window included, as `DataFrame.loc`).
+        """
+        bounds = {}
+        for bus, (start, end) in self.shifts.items():
+            edges = np.stack([entry_times + start, entry_times + end + np.timedelta64(1, 'ns')], axis=1)
+            bounds[bus] = np.searchsorted(bus_times[bus], edges.ravel()).reshape(-1, 2)
+        return bounds
+
+    def preprocess_chunk(self, metadata: Sequence[Metadata], trends: Mapping[str, Tuple[np.ndarray, np.ndarray]],
+                         bounds: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Preprocesses paintings and returns their columns.
+
+        Parameters
+        ----------
+        metadata
+            Metadata of the paintings (time of event already shifted).
+        trends
+            Bus -> sorted timestamps (datetime64[ns]) and values of its readings.
+        bounds
+            Window bounds of the paintings, see `window_bounds`.
+        """
+        features = {name: np.full((len(metadata), width), np.nan) for name, width in self.feature_widths.items()}
+        statuses = []
+        for i, painting in enumerate(metadata):
+            fired_filters = [m_filter for m_filter in self.metadata_filters if m_filter.apply(painting)]
+            if fired_filters:
+                statuses.append(fired_filters[0].status.value)
+                continue
+            bus_to_extracted_waveform = {}
+            for bus in self.shifts:
+                times, values = trends[bus]
+                start, end = bounds[bus][i]
+                bus_to_extracted_waveform[bus] = Waveform(bus, values[start:end], times[start:end])
+            if any(end == start for start, end in (bounds[bus][i] for bus in self.shifts)):
+                statuses.append(PreprocessingStatus.GAP_IN_READINGS.value)
+                continue
+            payload = self.pipeline.construct_payload(painting, bus_to_extracted_waveform)
+            features["histograms"][i] = np.concatenate(payload.histograms)
+            features["tsfreshFeatures"][i] = np.concatenate(payload.tsfresh_features)
+            features["interpolationFeatures"][i] = np.concatenate(payload.interpolation_features)
+            statuses.append(PreprocessingStatus.CORRECT.value)
+        return {**metadata_columns(metadata), "status": np.array(statuses, dtype=str), **features}
+
+    def preprocess_to_shards(self, directory: str, name: str, metadata: List[Metadata],
+                             trends: Mapping[str, Tuple[np.ndarray, np.ndarray]], workers: Optional[int] = None,
+                             chunk_size: int = 1000) -> List[str]:
+        """
+        Preprocesses the paintings and writes a shard per chunk of `chunk_size` paintings.
+
+        Parameters
+        ----------
+        directory
+            Directory of the dataset.
+        name
+            Prefix of the names of the shards.
+        metadata
+            Metadata of the paintings (time of event already shifted).
+        trends
+            Bus -> sorted timestamps (datetime64[ns]) and values of its readings.
+        workers
+            Number of processes, the number of CPUs by default. With one worker, paintings are preprocessed
+            in this process.
+        chunk_size
+            Number of paintings in a shard.
+
+        Returns
+        -------
+        List
+            Paths of the shards.
+        """
+        global shared_batch
+        entry_times = np.array([m.time_of_event for m in metadata], dtype='datetime64[ns]')
+        bounds = self.window_bounds({bus: times for bus, (times, _) in trends.items()}, entry_times)
+        chunks = [(start, min(start + chunk_size, len(metadata))) for start in range(0, len(metadata), chunk_size)]
+        workers = workers if workers else os.cpu_count()
+        os.makedirs(directory, exist_ok=True)
+
+        shared_batch = (self, metadata, trends, bounds)
+        try:
+            if workers == 1:
+                results = map(preprocess_shared_chunk, chunks)
+                return [write_shard(directory, f"{name}-{i:05d}", columns) for i, columns in enumerate(results)]
+            with Pool(processes=workers) as pool:
+                paths = []
+                for i, columns in enumerate(pool.imap(preprocess_shared_chunk, chunks)):
+                    paths.append(write_shard(directory, f"{name}-{i:05d}", columns))
+                    logging.info(f"Written shard {i + 1}/{len(chunks)} of {name}.")
+                return paths
+        finally:
+            shared_batch = None
+
+
+def preprocess_shared_chunk(chunk: Tuple[int, int]) -> Dict[str, np.ndarray]:
+    batch_preprocessor, metadata, trends, bounds = shared_batch
+    start, end = chunk
+    return batch_preprocessor.preprocess_chunk(metadata[start:end], trends,
+                                               {bus: bus_bounds[start:end] for bus, bus_bounds in bounds.items()})
+
+
+def metadata_columns(metadata: Sequence[Metadata]) -> Dict[str, np.ndarray]:
+    """
+    Fields of the metadata as columns: `timeOfEvent` as datetime64[ms], numbers as they are, other values as strings.
+    """
+    columns = {}
+    for field in (metadata[0].json_dict if metadata else {}):
+        if field == "timeOfEvent":
+            columns[field] = np.array([m.time_of_event for m in metadata], dtype='datetime64[ms]')
+            continue
+        column = np.array([m.json_dict[field] for m in metadata])
+        columns[field] = column if column.dtype.kind in 'biuf' else column.astype(str)
+    return columns
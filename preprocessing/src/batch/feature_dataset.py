@@ -0,0 +1,184 @@
+import os
+import shutil
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dataset_utils.feature_shards import METADATA, dataset_parts, part_path, read_shard, write_shard
+from src.batch.batch_preprocessor import metadata_columns
+from src.domain.metadata import Metadata
+from src.domain.preprocessing_result import PreprocessingStatus
+
+FEATURE_GROUPS = ["histograms", "interpolationFeatures", "tsfreshFeatures"]
+RAW_DATA = "rawData"
+BUSES = ["K1", "K2", "K3", "K4"]
+
+# Paintings to append: metadata columns, feature group -> matrix (paintings, features), raw data (or None)
+Columns = Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray], Optional[Dict[str, np.ndarray]]]
+
+
+class FeatureDataset:
+    """
+    Dataset of preprocessed paintings for training models, built incrementally. Each group of columns is stored
+    separately as shards (see `dataset_utils.feature_shards`), so that only the needed groups are read (memory-mapped):
+
+    - `metadata` - fields of the metadata,
+    - `histograms`, `interpolationFeatures`, `tsfreshFeatures` - column `values` with a row of features per painting,
+    - `rawData` - waveforms of the paintings: `lengths` (paintings, buses) and flat `values` and `times` of all
+      paintings, bus after bus.
+
+    Every group has a `timeOfEvent` column and the rows of all groups are in the same order (raw data is optional,
+    it may be missing for some parts). Paintings are deduplicated on `timeOfEvent` when they are appended.
+    """
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def group_directory(self, group: str) -> str:
+        return os.path.join(self.directory, group)
+
+    def parts(self) -> List[str]:
+        """
+        Names of the appended parts. Metadata of a part is written last, so parts interrupted while being written
+        are not listed.
+        """
+        return dataset_parts(self.directory)
+
+    def shards(self, group: str, columns: Optional[Iterable[str]] = None) -> List[Dict[str, np.ndarray]]:
+        """
+        Memory-mapped columns of the group, a dictionary per part (parts without the group are skipped).
+        """
+        paths = [part_path(self.directory, group, part) for part in self.parts()]
+        return [read_shard(path, columns) for path in paths if os.path.isdir(path)]
+
+    def read(self, group: str, columns: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Columns of the group, concatenated over all parts.
+        """
+        shards = self.shards(group, columns)
+        if not shards:
+            return {}
+        return {column: np.concatenate([shard[column] for shard in shards]) for column in shards[0]}
+
+    def times_of_event(self) -> np.ndarray:
+        return self.read(METADATA, ["timeOfEvent"]).get("timeOfEvent", np.array([], dtype='datetime64[ms]'))
+
+    def read_frame(self, group: str) -> pd.DataFrame:
+        """
+        Group as a DataFrame indexed by the time of event: metadata fields or a column per feature.
+        """
+        columns = self.read(group)
+        index = pd.to_datetime(columns.get("timeOfEvent", np.array([], dtype='datetime64[ms]')))
+        if group == METADATA:
+            return pd.DataFrame(columns, index=index)
+        return pd.DataFrame(columns.get("values"), index=index)
+
+    def read_raw_data(self) -> Dict[np.datetime64, Dict[str, Dict[str, np.ndarray]]]:
+        """
+        Waveforms of the paintings: time of event -> {"values": bus -> values, "times": bus -> timestamps}.
+        """
+        result = {}
+        for shard in self.shards(RAW_DATA):
+            splits = np.cumsum(shard["lengths"].ravel())[:-1]
+            values, times = np.split(shard["values"], splits), np.split(shard["times"], splits)
+            for i, time_of_event in enumerate(shard["timeOfEvent"]):
+                buses = range(i * len(BUSES), (i + 1) * len(BUSES))
+                result[time_of_event] = {"values": {bus: values[j] for bus, j in zip(BUSES, buses)},
+                                         "times": {bus: times[j] for bus, j in zip(BUSES, buses)}}
+        return result
+
+    def append(self, metadata: Mapping[str, np.ndarray], features: Mapping[str, np.ndarray],
+               raw_data: Optional[Mapping[str, np.ndarray]] = None) -> int:
+        """
+        Appends paintings as a new part of the dataset. Paintings already in the dataset are skipped, of paintings
+        with the same time of event in `metadata` the last one is kept.
+
+        Parameters
+        ----------
+        metadata
+            Metadata columns of the paintings, `timeOfEvent` included.
+        features
+            Feature group -> matrix with a row per painting.
+        raw_data
+            Waveforms of the paintings (see the class description), optional.
+
+        Returns
+        -------
+        int
+            Number of appended paintings.
+        """
+        times = np.asarray(metadata.get("timeOfEvent", []), dtype='datetime64[ms]')
+        count = times.size
+        _, last_reversed = np.unique(times[::-1], return_index=True)
+        keep = np.zeros(count, dtype=bool)
+        keep[count - 1 - last_reversed] = True
+        keep &= ~np.isin(times, self.times_of_event())
+        if not keep.any():
+            return 0
+
+        part = f"part-{len(self.parts()):05d}"
+        # Leftovers of an interrupted part are replaced
+        for group in FEATURE_GROUPS + [RAW_DATA]:
+            shutil.rmtree(part_path(self.directory, group, part), ignore_errors=True)
+        for group, matrix in features.items():
+            self.write(group, part, {"timeOfEvent": times[keep], "values": np.asarray(matrix)[keep]})
+        if raw_data is not None:
+            lengths = np.asarray(raw_data["lengths"])
+            readings = np.repeat(np.repeat(keep, lengths.shape[1]), lengths.ravel())
+            self.write(RAW_DATA, part, {"timeOfEvent": times[keep], "lengths": lengths[keep],
+                                        "values": np.asarray(raw_data["values"])[readings],
+                                        "times": np.asarray(raw_data["times"], dtype='datetime64[ms]')[readings]})
+        self.write(METADATA, part, {**{field: np.asarray(column)[keep] for field, column in metadata.items()},
+                                    "timeOfEvent": times[keep]})
+        return int(keep.sum())
+
+    def write(self, group: str, part: str, columns: Mapping[str, np.ndarray]):
+        os.makedirs(self.group_directory(group), exist_ok=True)
+        write_shard(self.group_directory(group), part, columns)
+
+
+def results_to_columns(results: Sequence[Mapping], widths: Mapping[str, int]) -> Columns:
+    """
+    Converts preprocessing results (dictionaries, as sent to Kafka or saved as JSON) to columns of a `FeatureDataset`.
+    Results whose features do not have the expected widths (not preprocessed correctly) are left out.
+
+    Parameters
+    ----------
+    results
+        Preprocessing results.
+    widths
+        Feature group -> number of features of all buses.
+    """
+    complete = []
+    for result in results:
+        payload = result['payload']
+        rows = {group: np.concatenate([np.asarray(bus, dtype=np.float64).ravel() for bus in payload[group]])
+                if payload[group] else np.array([]) for group in widths}
+        if all(rows[group].size == width for group, width in widths.items()):
+            complete.append((result, rows))
+
+    metadata = metadata_columns([Metadata(result['payload']['metadata']) for result, _ in complete])
+    features = {group: np.array([rows[group] for _, rows in complete]).reshape(len(complete), width)
+                for group, width in widths.items()}
+    lengths, values, times = [], [], []
+    for result, _ in complete:
+        lengths.append([len(result['rawData']['values'].get(bus, [])) for bus in BUSES])
+        for bus in BUSES:
+            values.append(np.asarray(result['rawData']['values'].get(bus, []), dtype=np.float64))
+            times.append(np.asarray(result['rawData']['times'].get(bus, []), dtype='datetime64[ms]'))
+    raw_data = {"lengths": np.array(lengths, dtype=np.int64).reshape(len(complete), len(BUSES)),
+                "values": np.concatenate(values) if values else np.array([], dtype=np.float64),
+                "times": np.concatenate(times) if times else np.array([], dtype='datetime64[ms]')}
+    return metadata, features, raw_data
+
+
+def batch_shard_to_columns(shard: Mapping[str, np.ndarray]) -> Columns:
+    """
+    Converts a shard written by `BatchPreprocessor` to columns of a `FeatureDataset`: correctly preprocessed
+    paintings, without raw data (it is not kept by the batch preprocessing).
+    """
+    correct = np.asarray(shard["status"]) == PreprocessingStatus.CORRECT.value
+    metadata = {field: np.asarray(column)[correct] for field, column in shard.items()
+                if field != "status" and field not in FEATURE_GROUPS}
+    features = {group: np.asarray(shard[group])[correct] for group in FEATURE_GROUPS}
+    return metadata, features, None
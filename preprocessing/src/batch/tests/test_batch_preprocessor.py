@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataset_utils.feature_shards import list_shards, read_columns
+from src.batch.batch_preprocessor import BatchPreprocessor
+from src.domain.metadata import Metadata
+from src.domain.waveform import Waveform
+from src.filters.cage_filter import CageFilter
+from src.preprocessors.features_extractors.numpy_tsfresh_feature_extractor import NumpyTsfreshFeatureExtractor
+from src.preprocessors.features_extractors.tsfresh_feature_extractor_config import TsfreshConfig
+from src.preprocessors.histograms_calculators.histograms_calculator import HistogramsCalculator, \
+    HistogramsCalculatorConfig
+from src.preprocessors.interpolators.time_aware_shape_interpolator import TimeAwareShapeInterpolator
+from src.preprocessors.interpolators.time_aware_shape_interpolator_config import TimeAwareShapeInterpolatorConfig
+from src.preprocessors.payload_pipeline import PayloadPipeline
+
+START = np.datetime64('2021-07-06T10:00:00', 'ns')
+
+
+def pipeline():
+    interpolator = TimeAwareShapeInterpolator(TimeAwareShapeInterpolatorConfig.equal_number_of_interpolation_points(16),
+                                              smoother=None)
+    return PayloadPipeline(interpolator, HistogramsCalculator(HistogramsCalculatorConfig()),
+                           NumpyTsfreshFeatureExtractor(TsfreshConfig()))
+
+
+def batch_preprocessor():
+    shifts = TimeAwareShapeInterpolatorConfig.equal_number_of_interpolation_points(16).shifts
+    return BatchPreprocessor(pipeline(), shifts, [CageFilter()])
+
+
+def paintings(count=12):
+    metadata = []
+    for i in range(count):
+        time_of_event = pd.Timestamp(START + np.timedelta64(90 * i, 's')).strftime("%Y-%m-%d %H:%M:%S.%f")
+        caged = i == 3
+        metadata.append(Metadata({
+            "timeOfEvent": time_of_event, "inOut": "IN", "carBodyId": str(1000 + i),
+            "carBodyType": "0000" if caged else "A", "voltageProgramType": "TC00" if caged else "1",
+            "skidId": i, "pendulumId": i % 5, "paintingCyclesCount": 10 + i, "servicesCount": 1
+        }))
+    return metadata
+
+
+def trends(seconds=3000):
+    rng = np.random.default_rng(0)
+    result = {}
+    for bus in ["K1", "K2", "K3", "K4"]:
+        offsets = np.sort(rng.choice(seconds, size=seconds // 2, replace=False))
+        offsets = offsets[(offsets < 400) | (offsets > 1200)]  # Readings are missing for some paintings
+        result[bus] = (START + offsets.astype('timedelta64[s]'), rng.uniform(0, 800, offsets.size))
+    return result
+
+
+def reference_features(metadata, bus_trends):
+    # Windows selected as in TimeBasedPreprocessor
+    frames = {bus: pd.DataFrame({"value": values}, index=times) for bus, (times, values) in bus_trends.items()}
+    shifts = TimeAwareShapeInterpolatorConfig.equal_number_of_interpolation_points(16).shifts
+    entry_time = np.datetime64(metadata.time_of_event)
+    waveforms = {}
+    for bus, frame in frames.items():
+        sub_df = frame.loc[entry_time + shifts[bus][0]:entry_time + shifts[bus][1]]
+        waveforms[bus] = Waveform(bus, sub_df['value'].values, sub_df.index.values)
+    if any(w.values.size == 0 for w in waveforms.values()):
+        return None
+    return pipeline().construct_payload(metadata, waveforms)
+
+
+def test_window_bounds_include_both_ends():
+    times = START + np.arange(0, 600, 5).astype('timedelta64[s]')
+    bounds = batch_preprocessor().window_bounds({bus: times for bus in ["K1", "K2", "K3", "K4"]},
+                                                np.array([START, START + np.timedelta64(1, 's')]))
+    # K1 window is 5 s - 166 s: readings at 5, 10, ..., 165 s (and 10, ..., 165 s one second later)
+    np.testing.assert_array_equal(bounds["K1"], [[1, 34], [2, 34]])
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_shards_have_the_same_features_as_single_paintings(tmp_path, workers):
+    metadata, bus_trends = paintings(), trends()
+
+    paths = batch_preprocessor().preprocess_to_shards(str(tmp_path), "test", metadata, bus_trends,
+                                                      workers=workers, chunk_size=5)
+    assert paths == list_shards(str(tmp_path))
+    assert len(paths) == 3
+
+    columns = read_columns(str(tmp_path))
+    assert list(columns["carBodyId"]) == [m.car_body_id for m in metadata]
+    assert columns["timeOfEvent"].dtype == np.dtype('datetime64[ms]')
+    assert columns["status"][3] == "CAGE"
+    assert "GAP_IN_READINGS" in columns["status"]
+    for i, painting in enumerate(metadata):
+        if columns["status"][i] != "CORRECT":
+            assert np.isnan(columns["histograms"][i]).all()
+            continue
+        payload = reference_features(painting, bus_trends)
+        np.testing.assert_allclose(columns["histograms"][i], np.concatenate(payload.histograms))
+        np.testing.assert_allclose(columns["tsfreshFeatures"][i], np.concatenate(payload.tsfresh_features))
+        np.testing.assert_allclose(columns["interpolationFeatures"][i],
+                                   np.concatenate(payload.interpolation_features))
+    assert all(reference_features(m, bus_trends) is None
+               for m, status in zip(metadata, columns["status"]) if status == "GAP_IN_READINGS")
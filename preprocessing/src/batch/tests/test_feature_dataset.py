@@ -0,0 +1,65 @@
+import numpy as np
+
+from src.batch.feature_dataset import FeatureDataset, batch_shard_to_columns, results_to_columns
+
+WIDTHS = {"histograms": 8, "interpolationFeatures": 4, "tsfreshFeatures": 4}
+
+
+def result(second, car_body_id, readings=3, histogram_bins=2):
+    buses = ["K1", "K2", "K3", "K4"]
+    times = [f"2021-07-06 10:00:{s:02d}" for s in range(readings)]
+    return {
+        "status": "CORRECT",
+        "payload": {
+            "metadata": {"timeOfEvent": f"2021-07-06 10:{second:02d}:00.000000", "inOut": "IN",
+                         "carBodyId": car_body_id, "carBodyType": "A", "voltageProgramType": "1", "skidId": second,
+                         "pendulumId": 1, "paintingCyclesCount": 1, "servicesCount": 1},
+            "histograms": [[second] * histogram_bins for _ in buses],
+            "tsfreshFeatures": [[second] for _ in buses],
+            "customFeatures": [],
+            "interpolationFeatures": [[second] for _ in buses],
+        },
+        "rawData": {"values": {bus: [float(second + i)] * readings for i, bus in enumerate(buses)},
+                    "times": {bus: times for bus in buses}},
+    }
+
+
+def test_appended_paintings_are_deduplicated(tmp_path):
+    dataset = FeatureDataset(str(tmp_path))
+    appended = dataset.append(*results_to_columns([result(1, "a"), result(2, "b"), result(1, "c")], WIDTHS))
+    assert appended == 2
+    # Painting 2 is already in the dataset, painting 3 is incomplete
+    appended = dataset.append(*results_to_columns([result(2, "d"), result(3, "e", histogram_bins=3),
+                                                   result(4, "f")], WIDTHS))
+    assert appended == 1
+    assert dataset.append(*results_to_columns([result(4, "g")], WIDTHS)) == 0
+
+    metadata = dataset.read_frame("metadata")
+    assert list(metadata["carBodyId"]) == ["b", "c", "f"]
+    assert list(metadata.index.minute) == [2, 1, 4]
+    histograms = dataset.read_frame("histograms")
+    np.testing.assert_array_equal(histograms.values, np.repeat([[2], [1], [4]], 8, axis=1))
+    assert (histograms.index == metadata.index).all()
+
+    shards = dataset.shards("tsfreshFeatures", ["values"])
+    assert len(shards) == 2 and isinstance(shards[0]["values"], np.memmap)
+
+    raw_data = dataset.read_raw_data()
+    waveforms = raw_data[np.datetime64("2021-07-06T10:04:00", "ms")]
+    np.testing.assert_array_equal(waveforms["values"]["K3"], [6., 6., 6.])
+    assert waveforms["times"]["K1"][-1] == np.datetime64("2021-07-06T10:00:02", "ms")
+
+
+def test_only_correct_paintings_of_batch_shards_are_appended(tmp_path):
+    shard = {
+        "timeOfEvent": np.array(["2021-07-06T10:00", "2021-07-06T10:01"], dtype='datetime64[ms]'),
+        "carBodyId": np.array(["a", "b"]),
+        "status": np.array(["CORRECT", "CAGE"]),
+        "histograms": np.ones((2, 8)),
+        "interpolationFeatures": np.ones((2, 4)),
+        "tsfreshFeatures": np.ones((2, 4)),
+    }
+    dataset = FeatureDataset(str(tmp_path))
+    assert dataset.append(*batch_shard_to_columns(shard)) == 1
+    assert list(dataset.read("metadata")) == ["carBodyId", "timeOfEvent"]
+    assert dataset.read_raw_data() == {}
@@ -0,0 +1,30 @@
+from kafka_utils.consumer import BasicConsumer
+import logging
+
+import numpy as np
+
+from src.config_reader import config
+
+
+class CurrentTrendsConsumer(BasicConsumer):
+    """
+    Consumer of the current readings. It does not belong to any consumer group and starts from the newest messages,
+    because only the readings arriving while the module is running are of interest (older ones are read from Influx).
+    """
+    def __init__(self, topic_name):
+        super().__init__(topic_name, config["kafka"], group_id=None, auto_offset_reset='latest')
+
+    def consume(self):
+        """
+        Yields
+        -------
+        Tuple
+            Tuple: trend name, timestamp of the reading (np.datetime64) and its value.
+        """
+        for message in self.messages():
+            logging.debug(f"{self.topic_name}: received {message.value}")
+            try:
+                trend_name = [k for k in message.value.keys() if k != "timestamp"][0]
+                yield trend_name, np.datetime64(message.value["timestamp"]), float(message.value[trend_name])
+            except (TypeError, IndexError, ValueError, AttributeError) as err:
+                logging.error(f"Could not read current trend from message: {message}. Error: {err}")
@@ -1,18 +1,31 @@
-from src.consumers.basic_consumer import BasicConsumer
+from kafka_utils.consumer import BasicConsumer
 import logging
+from typing import Callable, Iterator, Tuple
+
+from src.config_reader import config
 
 from src.domain.metadata import Metadata
 
 
 class MetadataConsumer(BasicConsumer):
+    """
+    Consumer of painting metadata. Paintings wait for their data in memory, so offsets are committed only up to
+    the oldest painting which is not preprocessed yet: waiting paintings are consumed again after a restart.
+    """
     def __init__(self, topic_name):
-        super().__init__(topic_name)
+        super().__init__(topic_name, config["kafka"], group_id='group2', track_offsets=True)
 
-    def consume(self):
-        for message in self.consumer:
+    def consume(self) -> Iterator[Tuple[Metadata, Callable[[], None]]]:
+        """
+        Yields metadata of each painting together with the function to call once the painting is handled.
+        """
+        for message in self.messages():
+            done = self.offset_tracker.track(message)
             logging.info(f"{self.topic_name}: received {message.value}")
             try:
                 metadata = Metadata(metadata_json_dict=message.value)
-                yield metadata
             except TypeError as te:
-                logging.error(f"Could not construct Metadata object from message: {message}. Error: {te}")
\ No newline at end of file
+                logging.error(f"Could not construct Metadata object from message: {message}. Error: {te}")
+                done()
+                continue
+            yield metadata, done
\ No newline at end of file
@@ -0,0 +1,58 @@
+import logging
+from typing import List, Mapping
+
+import numpy as np
+import pandas as pd
+
+from src.db.influxdb_schema import schema
+from src.db.shared_trends_buffer import SharedTrendsBuffer
+from src.db.ts_repository import TimeSeriesRepository
+
+
+class BufferedTrendsRepository(TimeSeriesRepository):
+    """
+    Repository reading the trends from the shared memory buffer (see `SharedTrendsBuffer`). Trends which are not
+    buffered, or whose buffer does not cover the requested range (e.g. after a restart), are read from the fallback
+    repository.
+    """
+    def __init__(self, trends_buffer: SharedTrendsBuffer, measurement: str, fallback: TimeSeriesRepository):
+        """
+
+        Parameters
+        ----------
+        trends_buffer
+            Buffer of the newest readings.
+        measurement
+            Measurement the buffered trends belong to.
+        fallback
+            Repository used when the buffer does not cover the request.
+        """
+        self.trends_buffer = trends_buffer
+        self.measurement = measurement
+        self.fallback = fallback
+
+    def get_trends_values(self, time_from, time_to,
+                          trends: Mapping[str, List[str]] = None) -> Mapping[str, Mapping[str, pd.DataFrame]]:
+        trends = trends if trends is not None else schema
+        result = {measurement: {} for measurement in trends}
+        missing_trends = {}
+        for measurement, trend_names in trends.items():
+            for trend_name in trend_names:
+                window = self.trends_buffer.window(trend_name, np.datetime64(time_from), np.datetime64(time_to)) \
+                    if measurement == self.measurement else None
+                if window is None:
+                    missing_trends.setdefault(measurement, []).append(trend_name)
+                else:
+                    timestamps, values = window
+                    result[measurement][trend_name] = pd.DataFrame(
+                        {"value": values}, index=pd.DatetimeIndex(timestamps, name="dt"))
+
+        if missing_trends:
+            logging.info(f"Trends buffer does not cover {missing_trends}, reading them from the fallback repository.")
+            for measurement, trends_values in self.fallback.get_trends_values(time_from, time_to,
+                                                                              missing_trends).items():
+                result[measurement].update(trends_values)
+        return result
+
+    def get_latest_timestamps(self, measurement: str, trend_names: List[str], time_from) -> Mapping[str, np.datetime64]:
+        return self.fallback.get_latest_timestamps(measurement, trend_names, time_from)
@@ -0,0 +1,72 @@
+from typing import IO, List, Mapping, Union
+
+import numpy as np
+import pandas as pd
+from influxdb_client import Dialect
+
+# Plain CSV (a header row, no annotation rows) - parsed directly by pandas
+flux_csv_dialect = Dialect(header=True, delimiter=",", annotations=[], date_time_format="RFC3339Nano")
+
+flux_csv_columns = ["_time", "_value", "_measurement", "trend_name"]
+
+
+def empty_trend_df() -> pd.DataFrame:
+    return pd.DataFrame({"value": np.array([], dtype=np.float64)},
+                        index=pd.DatetimeIndex(np.array([], dtype="datetime64[ns]"), name="dt"))
+
+
+def decode_flux_csv(csv: Union[IO, str]) -> pd.DataFrame:
+    """
+    Decodes Flux query result in CSV format (see `flux_csv_dialect`) into a single pandas Dataframe.
+    The whole response is parsed by the C parser of pandas, no Python object is created per record.
+
+    Parameters
+    ----------
+    csv
+        File-like object (e.g. HTTP response of `QueryApi.query_raw`) or path with the CSV.
+
+    Returns
+    -------
+    pd.Dataframe
+        Dataframe with `_measurement`, `trend_name` and `value` (float64) columns,
+        indexed by `dt` (UTC, timezone-naive datetime64[ns]) and sorted by it.
+    """
+    try:
+        df = pd.read_csv(csv, usecols=flux_csv_columns, skip_blank_lines=True)
+    except pd.errors.EmptyDataError:  # No rows extracted from Influx
+        df = pd.DataFrame(columns=flux_csv_columns)
+
+    if df["_time"].dtype == object and (df["_time"] == "_time").any():
+        # Header is repeated when schema of the tables changes, drop these rows
+        df = df[df["_time"] != "_time"]
+
+    dt = pd.to_datetime(df["_time"], utc=True).dt.tz_localize(None).values
+    order = np.argsort(dt, kind="stable")
+    return pd.DataFrame({
+        "_measurement": df["_measurement"].values[order],
+        "trend_name": df["trend_name"].values[order],
+        "value": df["_value"].values.astype(np.float64)[order],
+    }, index=pd.DatetimeIndex(dt[order], name="dt"))
+
+
+def split_trends(df: pd.DataFrame, trends: Mapping[str, List[str]]) -> Mapping[str, Mapping[str, pd.DataFrame]]:
+    """
+    Splits decoded Flux query result (see `decode_flux_csv`) into Dataframes of separate trends.
+
+    Parameters
+    ----------
+    df
+        Decoded Flux query result.
+    trends
+        Dictionary: measurement -> names of its trends.
+
+    Returns
+    -------
+    Mapping
+        Dictionary of dictionaries: measurement -> trend name -> pd.Dataframe with sorted readings (`value` column).
+        Trends without readings get an empty Dataframe.
+    """
+    groups = {key: group[["value"]] for key, group in df.groupby(["_measurement", "trend_name"], sort=False)}
+    return {measurement: {trend_name: groups.get((measurement, trend_name), empty_trend_df())
+                          for trend_name in trend_names}
+            for measurement, trend_names in trends.items()}
@@ -1,8 +1,10 @@
 from typing import Mapping, List
 from influxdb_client import InfluxDBClient
 from src.db.influxdb_schema import schema
-from collections import defaultdict
+from src.db.flux_csv_decoder import decode_flux_csv, flux_csv_dialect, split_trends
 import logging
+import re
+import numpy as np
 import pandas as pd
 
 from src.config_reader import config
@@ -14,60 +16,95 @@ class InfluxDbRepository(TimeSeriesRepository):
         self.influx_client = InfluxDBClient(url=config["influx"]["url"], token=config["influx"]["token"], org=config["influx"]["org"])
         self.query_api = self.influx_client.query_api()
 
-    def get_trends_values(self, time_from, time_to) -> Mapping[str, Mapping[str, pd.DataFrame]]:
-        result = {}
-        for measurement, trend_names in schema.items():
-            sub_res = {}
-            for trend_name in trend_names:
-                query = 'from(bucket: "'+config["influx"]["bucket"]+'")' \
-                        '|> range(start: '+time_from.strftime("%Y-%m-%dT%H:%M:%SZ")+', stop: '+time_to.strftime("%Y-%m-%dT%H:%M:%SZ")+')' \
-                        '|> filter(fn: (r) => r["_measurement"] == "'+measurement+'")' \
-                        '|> filter(fn: (r) => r["trend_name"] == "'+trend_name+'")' \
-                        '|> filter(fn: (r) => r["_field"] == "value")'
-
-                logging.debug(f"Query: {query}")
-                influx_result_tables = self.query_api.query(org=config["influx"]["org"], query=query)
-
-                df = self.tables_to_df(influx_result_tables)
-                sub_res[trend_name] = df
-            result[measurement] = sub_res
+    def get_trends_values(self, time_from, time_to,
+                          trends: Mapping[str, List[str]] = None) -> Mapping[str, Mapping[str, pd.DataFrame]]:
+        """
+        Reads values of the trends from the given time range. All trends are read with a single query.
 
-        return result
+        Parameters
+        ----------
+        time_from
+            Beginning of the time range.
+        time_to
+            End of the time range.
+        trends
+            Dictionary: measurement -> names of its trends which should be read. All trends from the schema are read
+            by default.
+
+        Returns
+        -------
+        Mapping
+            Dictionary of dictionaries: measurement -> trend name -> pd.Dataframe with readings,
+            indexed by `dt` (UTC, timezone-naive) and sorted by it.
+        """
+        trends = trends if trends is not None else schema
+        query = 'from(bucket: "'+config["influx"]["bucket"]+'")' \
+                '|> range(start: '+time_from.strftime("%Y-%m-%dT%H:%M:%SZ")+', stop: '+time_to.strftime("%Y-%m-%dT%H:%M:%SZ")+')' \
+                '|> filter(fn: (r) => '+self.trends_predicate(trends)+')' \
+                '|> filter(fn: (r) => r["_field"] == "value")' \
+                '|> keep(columns: ["_time", "_value", "_measurement", "trend_name"])' \
+                '|> group(columns: ["_measurement", "trend_name"])'
+
+        logging.debug(f"Query: {query}")
+        response = self.query_api.query_raw(query=query, org=config["influx"]["org"], dialect=flux_csv_dialect)
+        try:
+            trends_df = decode_flux_csv(response)
+        finally:
+            response.release_conn()
+
+        return split_trends(trends_df, trends)
 
     @staticmethod
-    def tables_to_df(result) -> pd.DataFrame:
+    def trends_predicate(trends: Mapping[str, List[str]]) -> str:
         """
-        Converts InfluxDB tables result to pandas Dataframe.
+        Builds Flux predicate matching the given trends. Trend names are matched with a regular expression,
+        which (unlike `contains`) is pushed down to the storage engine.
+
         Parameters
         ----------
-        result
-            A dictionary of dictionaries (measurement -> dictionary).
-            Each child dictionary contains values of specific trend names of a given measurement.
-
-            Example: {
-                "PositionTrends" {
-                    "position_of_car_body_on_busbar_1": pd.Dataframe (with position readings),
-                    ...
-                    },
-                ...
-                }
+        trends
+            Dictionary: measurement -> names of its trends.
 
         Returns
         -------
-        pd.Dataframe
-            Pandas Dataframe with the readings
+        str
+            Flux predicate, e.g. `(r["_measurement"] == "CurrentTrends" and r["trend_name"] =~ /^(a|b)$/)`.
         """
-        res = {
-            "dt": [],
-            "value": []
-        }
-        for table in result:
-            for record in table.records:
-                res["dt"].append(record.get_time())
-                res["value"].append(record.get_value())
-        result_df = pd.DataFrame.from_dict(res)
-        if 'dt' in result_df:  # Some rows WERE extracted from Influx
-            return result_df.set_index('dt').sort_index()
-        else:  # No rows extracted from Influx -> return empty Dataframe.
-            return result_df
+        return ' or '.join('(r["_measurement"] == "' + measurement + '" and r["trend_name"] =~ /^(' +
+                           '|'.join(re.escape(trend_name) for trend_name in trend_names) + ')$/)'
+                           for measurement, trend_names in trends.items())
 
+    def get_latest_timestamps(self, measurement: str, trend_names: List[str], time_from) -> Mapping[str, np.datetime64]:
+        """
+        Returns timestamp of the newest persisted reading of each of the given trends.
+
+        Parameters
+        ----------
+        measurement
+            Measurement the trends belong to (e.g. "CurrentTrends").
+        trend_names
+            Names of the trends to check.
+        time_from
+            Readings older than this time are not taken into account.
+
+        Returns
+        -------
+        Mapping
+            Dictionary: trend name -> timestamp (UTC, timezone-naive np.datetime64) of the newest reading.
+            Trends without any reading after `time_from` are not included.
+        """
+        query = 'from(bucket: "'+config["influx"]["bucket"]+'")' \
+                '|> range(start: '+time_from.strftime("%Y-%m-%dT%H:%M:%SZ")+')' \
+                '|> filter(fn: (r) => '+self.trends_predicate({measurement: trend_names})+')' \
+                '|> filter(fn: (r) => r["_field"] == "value")' \
+                '|> group(columns: ["trend_name"])' \
+                '|> last()'
+
+        logging.debug(f"Query: {query}")
+        influx_result_tables = self.query_api.query(org=config["influx"]["org"], query=query)
+
+        result = {}
+        for table in influx_result_tables:
+            for record in table.records:
+                result[record.values["trend_name"]] = np.datetime64(record.get_time().replace(tzinfo=None))
+        return result
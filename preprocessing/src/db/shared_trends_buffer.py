@@ -0,0 +1,134 @@
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class SharedTrendsBuffer:
+    """
+    Ring buffer of the newest readings of the trends, kept in shared memory (`multiprocessing.shared_memory`).
+    There is a single writer (thread consuming the trends Kafka stream, see `CurrentTrendsConsumer`) and any number
+    of readers in the worker processes. The buffer should be created before the workers are forked.
+
+    Memory layout: counts of readings written so far (int64, one per trend), then timestamps (int64 nanoseconds since
+    epoch, UTC) and values (float64), `capacity` slots per trend. Readers do not take any lock: a window is valid if
+    the count of written readings shows that no buffered reading was overwritten while the window was being copied.
+    """
+    def __init__(self, trend_names: List[str], capacity: int):
+        """
+
+        Parameters
+        ----------
+        trend_names
+            Names of the buffered trends.
+        capacity
+            Number of the newest readings kept for each trend.
+        """
+        self.trend_names = list(trend_names)
+        self.capacity = capacity
+        self.owner = True
+        self.shm = SharedMemory(create=True, size=self.size(len(self.trend_names), capacity))
+        self.map_arrays()
+
+    @staticmethod
+    def size(trends: int, capacity: int) -> int:
+        return 8 * (trends + 2 * trends * capacity)
+
+    def map_arrays(self):
+        trends = len(self.trend_names)
+        self.trend_to_index = {trend_name: i for i, trend_name in enumerate(self.trend_names)}
+        self.counts = np.ndarray((trends,), dtype=np.int64, buffer=self.shm.buf)
+        self.timestamps = np.ndarray((trends, self.capacity), dtype=np.int64, buffer=self.shm.buf, offset=8 * trends)
+        self.values = np.ndarray((trends, self.capacity), dtype=np.float64, buffer=self.shm.buf,
+                                 offset=8 * (trends + trends * self.capacity))
+
+    def __getstate__(self):
+        # Pickled buffer (e.g. with 'spawn' start method) attaches to the same shared memory
+        return {"name": self.shm.name, "trend_names": self.trend_names, "capacity": self.capacity}
+
+    def __setstate__(self, state):
+        self.trend_names = state["trend_names"]
+        self.capacity = state["capacity"]
+        self.owner = False
+        self.shm = SharedMemory(name=state["name"])
+        self.map_arrays()
+
+    def append(self, trend_name: str, timestamp: np.datetime64, value: float):
+        """
+        Appends reading of the trend. Readings of trends which are not buffered and readings older than the newest
+        buffered one are ignored, so the readings of each trend stay sorted by time.
+        """
+        index = self.trend_to_index.get(trend_name)
+        if index is None:
+            return
+        timestamp_ns = int(timestamp.astype('datetime64[ns]').astype(np.int64))
+        count = int(self.counts[index])
+        if count and timestamp_ns < self.timestamps[index, (count - 1) % self.capacity]:
+            return
+        slot = count % self.capacity
+        self.timestamps[index, slot] = timestamp_ns
+        self.values[index, slot] = value
+        self.counts[index] = count + 1  # Published after the slot is written
+
+    def latest_timestamp(self, trend_name: str) -> Optional[np.datetime64]:
+        index = self.trend_to_index[trend_name]
+        count = int(self.counts[index])
+        if not count:
+            return None
+        return np.datetime64(int(self.timestamps[index, (count - 1) % self.capacity]), 'ns')
+
+    def window(self, trend_name: str, time_from: np.datetime64,
+               time_to: np.datetime64) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Returns readings of the trend from the range [time_from, time_to).
+
+        Returns
+        -------
+        Optional
+            Tuple: timestamps (datetime64[ns]) and values (float64) of the readings (copies of the buffer slots,
+            so they stay valid after the slots are reused), or None if the buffer does not hold all readings
+            since `time_from` (e.g. shortly after the start or when the window is older than the buffer horizon).
+        """
+        index = self.trend_to_index.get(trend_name)
+        if index is None:
+            return None
+        from_ns = int(np.datetime64(time_from, 'ns').astype(np.int64))
+        to_ns = int(np.datetime64(time_to, 'ns').astype(np.int64))
+        timestamps, values = self.timestamps[index], self.values[index]
+
+        for _ in range(3):  # Retry if the writer overwrote the slots being read
+            count = int(self.counts[index])
+            oldest = max(0, count - self.capacity)
+            if count == 0 or timestamps[oldest % self.capacity] > from_ns:
+                return None
+
+            begin = oldest + self.search(index, oldest, count, from_ns)
+            end = oldest + self.search(index, oldest, count, to_ns)
+            slots = np.arange(begin, end) % self.capacity
+            window_timestamps, window_values = timestamps[slots], values[slots]
+
+            if oldest >= int(self.counts[index]) - self.capacity:  # Nothing was overwritten in the meantime
+                return window_timestamps.view('datetime64[ns]'), window_values
+        return None
+
+    def search(self, index: int, oldest: int, count: int, timestamp_ns: int) -> int:
+        """
+        Returns number of the buffered readings (from `oldest` to `count`) older than the timestamp.
+        The ring is searched in place, as two sorted segments.
+        """
+        older_segment = self.timestamps[index, oldest % self.capacity:self.capacity if count > self.capacity
+                                        else count]
+        position = int(np.searchsorted(older_segment, timestamp_ns, side='left'))
+        if position < len(older_segment) or count <= self.capacity:
+            return position
+        newer_segment = self.timestamps[index, :count % self.capacity]
+        return position + int(np.searchsorted(newer_segment, timestamp_ns, side='left'))
+
+    def close(self):
+        """
+        Releases the shared memory, it is removed when closed by the process which created it.
+        """
+        self.counts = self.timestamps = self.values = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
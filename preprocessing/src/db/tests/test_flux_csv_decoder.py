@@ -0,0 +1,42 @@
+from io import StringIO
+
+import numpy as np
+
+from src.db.flux_csv_decoder import decode_flux_csv, split_trends
+
+flux_csv = (
+    ",result,table,_time,_value,_measurement,trend_name\r\n"
+    ",_result,0,2020-01-01T00:00:02.5Z,12.5,CurrentTrends,current_on_busbar_1\r\n"
+    ",_result,0,2020-01-01T00:00:01Z,10,CurrentTrends,current_on_busbar_1\r\n"
+    ",_result,1,2020-01-01T00:00:01.000000001Z,20,CurrentTrends,current_on_busbar_2\r\n"
+    "\r\n"
+    ",result,table,_time,_value,_measurement,trend_name\r\n"
+    ",_result,2,2020-01-01T00:00:03Z,30,CurrentTrends,current_on_busbar_1\r\n"
+)
+
+
+def test_decode_flux_csv_sorted_naive_index():
+    trends = split_trends(decode_flux_csv(StringIO(flux_csv)),
+                          {"CurrentTrends": ["current_on_busbar_1", "current_on_busbar_2", "current_on_busbar_3"]})
+
+    busbar_1 = trends["CurrentTrends"]["current_on_busbar_1"]
+    assert list(busbar_1.columns) == ["value"]
+    assert busbar_1.index.name == "dt"
+    assert busbar_1.index.is_monotonic_increasing
+    assert busbar_1.index.tz is None
+    np.testing.assert_array_equal(busbar_1.index.values, np.array(["2020-01-01T00:00:01", "2020-01-01T00:00:02.5",
+                                                                   "2020-01-01T00:00:03"], dtype="datetime64[ns]"))
+    np.testing.assert_array_equal(busbar_1["value"].values, [10., 12.5, 30.])
+
+    busbar_2 = trends["CurrentTrends"]["current_on_busbar_2"]
+    assert busbar_2.index.values[0] == np.datetime64("2020-01-01T00:00:01.000000001")
+    assert busbar_2["value"].dtype == np.float64
+
+    busbar_3 = trends["CurrentTrends"]["current_on_busbar_3"]
+    assert busbar_3.empty
+    assert busbar_3.loc[np.datetime64("2020-01-01T00:00:00"):np.datetime64("2020-01-01T00:10:00")].empty
+
+
+def test_decode_flux_csv_empty_response():
+    trends = split_trends(decode_flux_csv(StringIO("\r\n")), {"CurrentTrends": ["current_on_busbar_1"]})
+    assert trends["CurrentTrends"]["current_on_busbar_1"].empty
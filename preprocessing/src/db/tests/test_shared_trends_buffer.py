@@ -0,0 +1,94 @@
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.db.buffered_trends_repository import BufferedTrendsRepository
+from src.db.shared_trends_buffer import SharedTrendsBuffer
+from src.db.ts_repository import TimeSeriesRepository
+
+start = np.datetime64("2020-01-01T00:00:00", "ns")
+
+
+@pytest.fixture
+def trends_buffer():
+    trends_buffer = SharedTrendsBuffer(["current_on_busbar_1", "current_on_busbar_2"], capacity=10)
+    yield trends_buffer
+    trends_buffer.close()
+
+
+def fill(trends_buffer, trend_name, seconds):
+    for second in seconds:
+        trends_buffer.append(trend_name, start + np.timedelta64(second, "s"), float(second))
+
+
+def test_shared_trends_buffer_window(trends_buffer):
+    fill(trends_buffer, "current_on_busbar_1", range(5))
+    trends_buffer.append("current_on_busbar_1", start, -1.)  # late reading, ignored
+
+    timestamps, values = trends_buffer.window("current_on_busbar_1", start + np.timedelta64(1, "s"),
+                                              start + np.timedelta64(3, "s"))
+
+    np.testing.assert_array_equal(timestamps, start + np.array([1, 2], dtype="timedelta64[s]"))
+    np.testing.assert_array_equal(values, [1., 2.])
+    assert trends_buffer.latest_timestamp("current_on_busbar_1") == start + np.timedelta64(4, "s")
+    assert trends_buffer.latest_timestamp("current_on_busbar_2") is None
+    assert trends_buffer.window("current_on_busbar_2", start, start + np.timedelta64(3, "s")) is None
+    # Readings before the first buffered one may be missing
+    assert trends_buffer.window("current_on_busbar_1", start - np.timedelta64(1, "s"), start) is None
+
+
+def test_shared_trends_buffer_window_after_wrap_around(trends_buffer):
+    fill(trends_buffer, "current_on_busbar_1", range(0, 46, 2))  # 23 readings, 10 newest are kept (26s - 44s)
+
+    timestamps, values = trends_buffer.window("current_on_busbar_1", start + np.timedelta64(31, "s"),
+                                              start + np.timedelta64(60, "s"))
+
+    np.testing.assert_array_equal(values, [32., 34., 36., 38., 40., 42., 44.])
+    assert np.all(np.diff(timestamps) > np.timedelta64(0, "s"))
+    assert trends_buffer.window("current_on_busbar_1", start + np.timedelta64(25, "s"),
+                                start + np.timedelta64(60, "s")) is None
+
+
+def read_window_in_child(trends_buffer, queue):
+    queue.put(trends_buffer.window("current_on_busbar_1", start, start + np.timedelta64(10, "s"))[1].tolist())
+
+
+def test_shared_trends_buffer_is_visible_to_forked_process(trends_buffer):
+    fill(trends_buffer, "current_on_busbar_1", range(3))
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    process = context.Process(target=read_window_in_child, args=(trends_buffer, queue))
+    process.start()
+    assert queue.get(timeout=10) == [0., 1., 2.]
+    process.join()
+
+
+class FallbackRepository(TimeSeriesRepository):
+    def __init__(self):
+        self.requested_trends = None
+
+    def get_trends_values(self, time_from, time_to, trends=None):
+        self.requested_trends = trends
+        return {measurement: {trend_name: pd.DataFrame({"value": [0.]}, index=pd.DatetimeIndex([time_from], name="dt"))
+                              for trend_name in trend_names} for measurement, trend_names in trends.items()}
+
+    def get_latest_timestamps(self, measurement, trend_names, time_from):
+        return {}
+
+
+def test_buffered_trends_repository_falls_back_for_uncovered_trends(trends_buffer):
+    fill(trends_buffer, "current_on_busbar_1", range(5))
+    fill(trends_buffer, "current_on_busbar_2", range(3, 5))
+    fallback = FallbackRepository()
+    repository = BufferedTrendsRepository(trends_buffer, measurement="CurrentTrends", fallback=fallback)
+
+    trends = repository.get_trends_values(pd.Timestamp(start).to_pydatetime(),
+                                          pd.Timestamp(start + np.timedelta64(2, "s")).to_pydatetime(),
+                                          {"CurrentTrends": ["current_on_busbar_1", "current_on_busbar_2"]})
+
+    assert fallback.requested_trends == {"CurrentTrends": ["current_on_busbar_2"]}
+    np.testing.assert_array_equal(trends["CurrentTrends"]["current_on_busbar_1"]["value"].values, [0., 1.])
+    assert trends["CurrentTrends"]["current_on_busbar_1"].index.name == "dt"
+    np.testing.assert_array_equal(trends["CurrentTrends"]["current_on_busbar_2"]["value"].values, [0.])
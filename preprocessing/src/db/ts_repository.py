@@ -1,9 +1,15 @@
 import abc
+import numpy as np
 import pandas as pd
-from typing import Mapping
+from typing import List, Mapping
 
 
 class TimeSeriesRepository:
     @abc.abstractmethod
-    def get_trends_values(self, time_from, time_to) -> Mapping[str, pd.DataFrame]:
+    def get_trends_values(self, time_from, time_to,
+                          trends: Mapping[str, List[str]] = None) -> Mapping[str, Mapping[str, pd.DataFrame]]:
+        pass
+
+    @abc.abstractmethod
+    def get_latest_timestamps(self, measurement: str, trend_names: List[str], time_from) -> Mapping[str, np.datetime64]:
         pass
@@ -24,27 +24,45 @@ class RawData:
     A class containing data which was extracted by waveform extractor from each bus.
     """
     def __init__(self, waveforms: Mapping[str, Waveform] = None):
-        self.values, self.times, self.max_values, self.min_values, self.max_times, self.min_times = {}, {}, {}, {}, {}, {}
-        if waveforms:  # Waveforms is optional: in case a shape is filtered, we don't do waveform extraction
-            self.values = {k: list(w.values) for k, w in waveforms.items()}
-            self.times = {k: list(pd.to_datetime(w.timestamps).strftime('%Y-%m-%d %H:%M:%S')) for k, w in waveforms.items()}
-            for k, w in waveforms.items():
-                if w.values.size:  # values may be empty, looking for max inside such array is nonsense and gives error
-                    self.max_values[k] = float(max(w.values))
-                    self.min_values[k] = float(min(w.values))
-                    self.max_times[k] = self.np_dt64_to_str(w.timestamps[np.argmax(w.values)])
-                    self.min_times[k] = self.np_dt64_to_str(w.timestamps[np.argmin(w.values)])
+        # Waveforms is optional: in case a shape is filtered, we don't do waveform extraction
+        self.waveforms = waveforms if waveforms else {}
 
     def to_dict(self):
+        values, times, max_values, min_values, max_times, min_times = {}, {}, {}, {}, {}, {}
+        for k, w in self.waveforms.items():
+            values[k] = list(w.values)
+            times[k] = list(pd.to_datetime(w.timestamps).strftime('%Y-%m-%d %H:%M:%S'))
+            if w.values.size:  # values may be empty, looking for max inside such array is nonsense and gives error
+                max_values[k] = float(max(w.values))
+                min_values[k] = float(min(w.values))
+                max_times[k] = self.np_dt64_to_str(w.timestamps[np.argmax(w.values)])
+                min_times[k] = self.np_dt64_to_str(w.timestamps[np.argmin(w.values)])
         return {
-            "values": self.values,
-            "times": self.times,
-            "maxValues": self.max_values,
-            "minValues": self.min_values,
-            "maxTimes": self.max_times,
-            "minTimes": self.min_times
+            "values": values,
+            "times": times,
+            "maxValues": max_values,
+            "minValues": min_values,
+            "maxTimes": max_times,
+            "minTimes": min_times
         }
 
+    def to_binary_dict(self):
+        """
+        The same as `to_dict`, but values are float64 arrays and timestamps datetime64 arrays (see `wire_formats`).
+        """
+        result = {"values": {}, "times": {}, "maxValues": {}, "minValues": {}, "maxTimes": {}, "minTimes": {}}
+        for k, w in self.waveforms.items():
+            values = np.asarray(w.values, dtype=np.float64)
+            timestamps = np.asarray(w.timestamps, dtype='datetime64[ms]')
+            result["values"][k] = values
+            result["times"][k] = timestamps
+            if values.size:
+                result["maxValues"][k] = float(values.max())
+                result["minValues"][k] = float(values.min())
+                result["maxTimes"][k] = timestamps[np.argmax(values)]
+                result["minTimes"][k] = timestamps[np.argmin(values)]
+        return result
+
     @staticmethod
     def np_dt64_to_str(np_dt):
         return pd.to_datetime(str(np_dt)).strftime('%Y-%m-%d %H:%M:%S')
@@ -75,6 +93,15 @@ class PreprocessingPayload:
             "interpolationFeatures": self.interpolation_features if self.interpolation_features else [],
         }
 
+    def to_binary_dict(self):
+        """
+        The same as `to_dict`, but features of each bus are float64 arrays (see `wire_formats`).
+        """
+        result = self.to_dict()
+        for features in ["histograms", "tsfreshFeatures", "customFeatures", "interpolationFeatures"]:
+            result[features] = [np.asarray(bus_features, dtype=np.float64) for bus_features in result[features]]
+        return result
+
 
 class PreprocessingResult:
     """
@@ -96,4 +123,9 @@ class PreprocessingResult:
         }
         return result
 
-
+    def to_binary_dict(self) -> dict:
+        return {
+            "status": self.status.value,
+            "payload": self.payload.to_binary_dict(),
+            "rawData": self.raw_data.to_binary_dict()
+        }
@@ -0,0 +1,48 @@
+import json
+
+import numpy as np
+from kafka_utils.serialization import JSON, MSGPACK, serialize, deserialize
+
+from src.domain.metadata import Metadata
+from src.domain.preprocessing_result import PreprocessingResult, PreprocessingStatus, PreprocessingPayload, RawData
+from src.domain.waveform import Waveform
+
+
+def preprocessing_result():
+    rng = np.random.default_rng(0)
+    metadata = Metadata({
+        'timeOfEvent': '2021-07-06 10:00:00.000', 'inOut': 'in', 'carBodyId': 1, 'carBodyType': 'A',
+        'voltageProgramType': 1, 'skidId': 1, 'pendulumId': 1, 'paintingCyclesCount': 1, 'servicesCount': 1
+    })
+    waveforms = {bus: Waveform(bus, rng.uniform(0, 800, 50),
+                               np.datetime64('2021-07-06T10:00:05.250', 'ns') + np.arange(50).astype('timedelta64[s]'))
+                 for bus in ["K1", "K2", "K3", "K4"]}
+    payload = PreprocessingPayload(metadata,
+                                   histograms=[rng.uniform(size=10).tolist() for _ in waveforms],
+                                   tsfresh_features=[rng.uniform(size=26).tolist() + [np.nan] for _ in waveforms],
+                                   custom_features=[],
+                                   interpolation_features=[rng.uniform(size=32).tolist() for _ in waveforms])
+    return PreprocessingResult(PreprocessingStatus.CORRECT, payload, RawData(waveforms))
+
+
+def test_msgpack_round_trip_keeps_arrays():
+    result = preprocessing_result()
+
+    decoded = deserialize(serialize(result.to_binary_dict(), MSGPACK))
+
+    assert decoded["status"] == "CORRECT"
+    assert decoded["payload"]["metadata"] == result.payload.metadata.to_dict()
+    np.testing.assert_array_equal(np.array(decoded["payload"]["tsfreshFeatures"]),
+                                  np.array(result.payload.tsfresh_features))
+    waveform = result.raw_data.waveforms["K2"]
+    np.testing.assert_array_equal(decoded["rawData"]["values"]["K2"], waveform.values)
+    np.testing.assert_array_equal(decoded["rawData"]["times"]["K2"], waveform.timestamps.astype('datetime64[ms]'))
+    assert decoded["rawData"]["maxTimes"]["K2"] == waveform.timestamps[np.argmax(waveform.values)].astype(
+        'datetime64[ms]').astype(np.int64)
+
+
+def test_json_of_binary_dict_is_the_same_as_of_dict():
+    result = preprocessing_result()
+
+    assert serialize(result.to_binary_dict(), JSON) == json.dumps(result.to_dict()).encode('utf-8')
+    assert deserialize(serialize(result.to_dict(), JSON)) == json.loads(json.dumps(result.to_dict()))
@@ -1,15 +1,23 @@
 import logging
 import pandas as pd
 
+from src.consumers.current_trends_consumer import CurrentTrendsConsumer
 from src.consumers.metadata_consumer import MetadataConsumer
 from src.db.influxdb_repository import InfluxDbRepository
+from src.db.shared_trends_buffer import SharedTrendsBuffer
 from src.filters.cage_filter import CageFilter
 from src.preprocessors.preprocessor import Preprocessor
 from src.preprocessors.time_based_preprocessor import TimeBasedPreprocessor
-from src.utils import set_up_logger
+from src.readiness.data_readiness_trigger import DataReadinessTrigger
+from src.readiness.trends_watermark import TrendsWatermark, InfluxDbTrendsWatermark, SharedTrendsWatermark, \
+    BufferedTrendsWatermark
+from src.scheduling.due_time_scheduler import DueTimeScheduler
+from src.scheduling.preprocessing_workers_pool import PreprocessingWorkersPool
+from src.utils import set_up_logger, exit_on_sigterm
 from src.single_row_metadata_processor import SingleRowMetadataProcessorConfig, SingleRowMetadataProcessor
 from src.config_reader import config
-from multiprocessing import Process
+from threading import Thread
+from typing import Optional
 
 APPLY_METADATA_TIME_SHIFT = True
 winter_times = [(pd.to_datetime("2020-10-25 02:00"), pd.to_datetime("2021-03-28 02:00"))]
@@ -17,13 +25,59 @@ winter_times = [(pd.to_datetime("2020-10-25 02:00"), pd.to_datetime("2021-03-28
 
 def manage_processing_metadata_rows():
     """
-    This function starts the process processing metadata (one process for each new car body in the paint bath).
-    This is because there can be more than one car body in the paint bath at the same time.
-    They have to be considered separately and it takes some time to drive through the bathtub.
+    This function schedules processing of metadata (each new car body in the paint bath).
+    There can be more than one car body in the paint bath at the same time and it takes some time to drive through
+    the bathtub. Car bodies wait in the scheduler until their trends are available and are then preprocessed
+    by the fixed-size pool of workers. Metadata is committed once the car body is preprocessed.
     """
-    for metadata in metadata_consumer.consume():
+    for metadata, done in metadata_consumer.consume():
         if metadata.in_out == "IN":  # Preconditions
-            Process(target=metadata_row_processor.produce_processed_metadata_row, args=(metadata,)).start()
+            metadata_row_processor.add_winter_time_shift_if_required(metadata)
+            scheduler.schedule(metadata, metadata_row_processor.required_coverage(metadata), on_done=done)
+        else:
+            done()
+
+
+def create_trends_buffer() -> Optional[SharedTrendsBuffer]:
+    """
+    Creates shared memory buffer of the newest current trends (if enabled in the configuration).
+    The buffer has to be created before the workers are forked.
+    """
+    if not config["trends-buffer"]["enabled"]:
+        return None
+    capacity = int(config["trends-buffer"]["horizon"] * config["trends-buffer"]["max-readings-per-second"])
+    return SharedTrendsBuffer(list(preprocessor.bus_to_trend_name.values()), capacity)
+
+
+def create_trends_watermark() -> TrendsWatermark:
+    """
+    Creates the watermark of current trends, based on the source selected in the configuration:\n
+    - influx -> newest readings persisted in Influx are checked (by the scheduler, for each waiting painting),
+    - kafka -> current trends topic is consumed in a background thread, newest readings are kept in shared memory.\n
+    If the trends buffer is enabled, the topic is consumed into the buffer regardless of the watermark source.
+    """
+    trend_names = list(preprocessor.bus_to_trend_name.values())
+    if trends_buffer is not None:
+        current_trends_consumer = CurrentTrendsConsumer(topic_name=config["kafka"]["current-trends-topic"])
+        Thread(target=fill_trends_buffer, args=(current_trends_consumer, trends_buffer), daemon=True).start()
+        if config["readiness"]["watermark-source"] == "kafka":
+            return BufferedTrendsWatermark(trends_buffer)
+    elif config["readiness"]["watermark-source"] == "kafka":
+        watermark = SharedTrendsWatermark(trend_names)
+        current_trends_consumer = CurrentTrendsConsumer(topic_name=config["kafka"]["current-trends-topic"])
+        Thread(target=update_trends_watermark, args=(current_trends_consumer, watermark), daemon=True).start()
+        return watermark
+    return InfluxDbTrendsWatermark(ts_repo, preprocessor.current_trends_measurement_name)
+
+
+def update_trends_watermark(current_trends_consumer: CurrentTrendsConsumer, watermark: SharedTrendsWatermark):
+    for trend_name, timestamp, _ in current_trends_consumer.consume():
+        watermark.update(trend_name, timestamp)
+
+
+def fill_trends_buffer(current_trends_consumer: CurrentTrendsConsumer, trends_buffer: SharedTrendsBuffer):
+    for trend_name, timestamp, value in current_trends_consumer.consume():
+        trends_buffer.append(trend_name, timestamp, value)
 
 
 if __name__ == '__main__':
@@ -32,15 +86,9 @@ if __name__ == '__main__':
     set_up_logger()
     logging.info("Container started.")
 
-    # Initialize time series repo
-    ts_repo = InfluxDbRepository()
-
     # Init preprocessor
     preprocessor: Preprocessor = TimeBasedPreprocessor()
 
-    # Connect to topic
-    metadata_consumer = MetadataConsumer(topic_name=config["kafka"]["metadata-topic"])
-
     # Define Metadata filters
     metadata_filters = [
         CageFilter()
@@ -51,8 +99,39 @@ if __name__ == '__main__':
                                                        apply_metadata_time_shift=APPLY_METADATA_TIME_SHIFT,
                                                        winter_times=winter_times)
 
+    # Shared memory buffer of the newest current trends, read by the workers
+    trends_buffer = create_trends_buffer()
+
+    # Start workers (before any thread is started in this process, workers are forked)
+    workers_pool = PreprocessingWorkersPool(workers=config["general"]["workers"],
+                                            processor_config=m_processor_cfg,
+                                            preprocessor=preprocessor,
+                                            trends_buffer=trends_buffer)
+
+    # Metadata row processor of this process is used only for scheduling, workers query the trends
     metadata_row_processor = SingleRowMetadataProcessor(config=m_processor_cfg,
-                                                        preprocessor=preprocessor,
-                                                        ts_repo=ts_repo)
+                                                        preprocessor=preprocessor)
+
+    # Initialize time series repo
+    ts_repo = InfluxDbRepository()
+
+    # Define trigger starting preprocessing once the data is available
+    readiness_trigger = DataReadinessTrigger(watermark=create_trends_watermark(),
+                                             timeout=config["readiness"]["timeout"],
+                                             poll_interval=config["readiness"]["poll-interval"])
+
+    # Start scheduler passing paintings with ready data to workers
+    scheduler = DueTimeScheduler(readiness_trigger=readiness_trigger, dispatch=workers_pool.submit)
+    Thread(target=scheduler.run, daemon=True).start()
+
+    # Connect to topic
+    metadata_consumer = MetadataConsumer(topic_name=config["kafka"]["metadata-topic"])
 
-    manage_processing_metadata_rows()
+    # Stop on `docker stop`: workers finish the paintings passed to them and flush their producers
+    exit_on_sigterm()
+    try:
+        manage_processing_metadata_rows()
+    finally:
+        workers_pool.close()
+        if trends_buffer is not None:
+            trends_buffer.close()
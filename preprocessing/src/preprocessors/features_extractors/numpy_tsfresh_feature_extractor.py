@@ -0,0 +1,250 @@
+from typing import Callable, List, Mapping, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import welch
+
+from src.domain.waveform import Waveform
+from src.preprocessors.features_extractors.basic_feature_extractor import BasicFeatureExtractor
+from src.preprocessors.features_extractors.tsfresh_feature_extractor_config import TsfreshConfig
+
+
+class NumpyTsfreshFeatureExtractor(BasicFeatureExtractor):
+    """
+    Feature extraction computing the `tsfresh` feature calculators directly with NumPy/SciPy.
+    Results (and their order) are the same as of `TsfreshFeatureExtractor`, without building a DataFrame and going
+    through `tsfresh.extract_features` for each bus. Only the calculators listed in `calculators` are supported.
+    """
+
+    def __init__(self, config: TsfreshConfig):
+        super(NumpyTsfreshFeatureExtractor, self).__init__(config=config)
+        unsupported = set(self.config.settings) - set(calculators)
+        if unsupported:
+            raise ValueError(f"Feature calculators not supported by NumpyTsfreshFeatureExtractor: {unsupported}")
+
+    def extract_features(self, bus_to_extracted_waveform: Mapping[str, Waveform]) -> List:
+        return [self.extract_waveform_features(np.asarray(waveform.values, dtype=np.float64))
+                for waveform in bus_to_extracted_waveform.values()]
+
+    def extract_waveform_features(self, x: np.ndarray) -> List[float]:
+        result = []
+        with np.errstate(divide="ignore", invalid="ignore"):  # Degenerate waveforms give NaN, as in tsfresh
+            for name, parameters in self.config.settings.items():
+                calculator = calculators[name]
+                if parameters is None:
+                    result.append(calculator(x))
+                else:
+                    result.extend(calculator(x, **p) for p in parameters)
+        return [float(feature) for feature in result]
+
+
+def zero_out_fperr(value: float) -> float:
+    # Same treatment of floating point errors as in pandas
+    return 0. if np.abs(value) < 1e-14 else value
+
+
+def kurtosis(x: np.ndarray) -> float:
+    # Bias corrected, as `pd.Series.kurtosis` used by tsfresh
+    n = x.size
+    if n < 4:
+        return np.nan
+    adjusted2 = (x - x.sum() / n) ** 2
+    m2, m4 = adjusted2.sum(), (adjusted2 ** 2).sum()
+    numerator = zero_out_fperr(n * (n + 1) * (n - 1) * m4)
+    denominator = zero_out_fperr((n - 2) * (n - 3) * m2 ** 2)
+    if denominator == 0:
+        return 0.
+    return numerator / denominator - 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+
+
+def skewness(x: np.ndarray) -> float:
+    # Bias corrected, as `pd.Series.skew` used by tsfresh
+    n = x.size
+    if n < 3:
+        return np.nan
+    adjusted = x - x.sum() / n
+    adjusted2 = adjusted ** 2
+    m2, m3 = zero_out_fperr(adjusted2.sum()), zero_out_fperr((adjusted2 * adjusted).sum())
+    if m2 == 0:
+        return 0.
+    return (n * (n - 1) ** 0.5 / (n - 2)) * (m3 / m2 ** 1.5)
+
+
+def large_standard_deviation(x: np.ndarray, r: float) -> float:
+    return float(np.std(x) > (r * (np.max(x) - np.min(x))))
+
+
+def cid_ce(x: np.ndarray, normalize: bool) -> float:
+    if normalize:
+        s = np.std(x)
+        if s == 0:
+            return 0.
+        x = (x - np.mean(x)) / s
+    x = np.diff(x)
+    return np.sqrt(np.dot(x, x))
+
+
+def mean_change(x: np.ndarray) -> float:
+    return (x[-1] - x[0]) / (x.size - 1) if x.size > 1 else np.nan
+
+
+def mean_second_derivative_central(x: np.ndarray) -> float:
+    return (x[-1] - x[-2] - x[1] + x[0]) / (2 * (x.size - 2)) if x.size > 2 else np.nan
+
+
+def longest_strike(mask: np.ndarray) -> float:
+    """
+    Length of the longest run of True values.
+    """
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    return float((ends - starts).max()) if starts.size else 0.
+
+
+def longest_strike_below_mean(x: np.ndarray) -> float:
+    return longest_strike(x < np.mean(x)) if x.size else 0.
+
+
+def longest_strike_above_mean(x: np.ndarray) -> float:
+    return longest_strike(x > np.mean(x)) if x.size else 0.
+
+
+def fft_coefficient(x: np.ndarray, coeff: int, attr: str) -> float:
+    fft = np.fft.rfft(x)
+    if coeff >= fft.size:
+        return np.nan
+    return {"real": fft[coeff].real, "imag": fft[coeff].imag, "abs": np.abs(fft[coeff]),
+            "angle": np.angle(fft[coeff], deg=True)}[attr]
+
+
+def fft_aggregated(x: np.ndarray, aggtype: str) -> float:
+    y = np.abs(np.fft.rfft(x))
+    powers = np.arange(y.size, dtype=float)
+    moments = [y.dot(powers ** moment) / y.sum() for moment in range(4)]  # moments[0] == 1
+    centroid = moments[1]
+    variance = moments[2] - centroid ** 2
+    if aggtype == "centroid":
+        return centroid
+    if aggtype == "variance":
+        return variance
+    if variance < 0.5:  # Skew and kurtosis blow up in the discrete limit of dirac delta
+        return np.nan
+    if aggtype == "skew":
+        return (moments[3] - 3 * centroid * variance - centroid ** 3) / variance ** 1.5
+    return (y.dot(powers ** 4) / y.sum() - 4 * centroid * moments[3] + 6 * moments[2] * centroid ** 2
+            - 3 * centroid) / variance ** 2
+
+
+def number_peaks(x: np.ndarray, n: int) -> float:
+    if x.size < 2 * n + 1:
+        return 0.
+    windows = sliding_window_view(x, 2 * n + 1)
+    center = windows[:, n]
+    return float(np.sum((center > windows[:, :n].max(axis=1)) & (center > windows[:, n + 1:].max(axis=1))))
+
+
+def benford_correlation(x: np.ndarray) -> float:
+    x = np.abs(np.nan_to_num(x))
+    first_digits = np.zeros(x.size)
+    positive = x > 0
+    exponents = np.floor(np.log10(x[positive]))
+    mantissas = np.where(exponents >= 0, x[positive] / 10 ** np.abs(exponents), x[positive] * 10 ** np.abs(exponents))
+    # Correct rounding of the logarithm at powers of 10
+    mantissas = np.where(mantissas >= 10, mantissas / 10, np.where(mantissas < 1, mantissas * 10, mantissas))
+    first_digits[positive] = np.floor(mantissas)
+
+    benford_distribution = np.log10(1 + 1 / np.arange(1, 10))
+    data_distribution = (first_digits[:, np.newaxis] == np.arange(1, 10)).mean(axis=0)
+    return np.corrcoef(benford_distribution, data_distribution)[0, 1]
+
+
+def fourier_entropy(x: np.ndarray, bins: int) -> float:
+    _, pxx = welch(x, nperseg=min(x.size, 256))
+    pxx = pxx / np.max(pxx)
+    if np.isnan(pxx).any():
+        return np.nan
+    probs = np.histogram(pxx, bins=bins)[0] / pxx.size
+    probs[probs == 0] = 1.0
+    return -np.sum(probs * np.log(probs))
+
+
+def sample_entropy(x: np.ndarray, dense_max_size: int = 256) -> float:
+    """
+    Sample entropy with template length 2 and tolerance 0.2 * std (as in tsfresh).
+    Short waveforms compare all pairs of templates at once (see `count_matching_templates_dense`), longer ones only
+    the pairs close in the first value (see `count_matching_templates_banded`).
+    """
+    if np.isnan(x).any():
+        return np.nan
+    tolerance = 0.2 * np.std(x)
+    if x.size <= dense_max_size:
+        b, a = count_matching_templates_dense(x, tolerance)
+    else:
+        b, a = count_matching_templates_banded(x, tolerance)
+    return -np.log(np.float64(a) / np.float64(b))
+
+
+def count_matching_templates_dense(x: np.ndarray, tolerance: float) -> Tuple[int, int]:
+    """
+    Counts ordered pairs of distinct templates of length 2 and 3 within the tolerance (Chebyshev distance).
+    """
+    n = x.size
+    if n < 2:
+        return 0, 0
+    distance = np.maximum(np.abs(x[:n - 1, np.newaxis] - x[np.newaxis, :n - 1]),
+                          np.abs(x[1:, np.newaxis] - x[np.newaxis, 1:]))
+    b = np.count_nonzero(distance <= tolerance) - (n - 1)  # Templates are not matched with themselves
+    if n < 3:
+        return b, 0
+    distance = np.maximum(distance[:n - 2, :n - 2], np.abs(x[2:, np.newaxis] - x[np.newaxis, 2:]))
+    return b, np.count_nonzero(distance <= tolerance) - (n - 2)
+
+
+def count_matching_templates_banded(x: np.ndarray, tolerance: float) -> Tuple[int, int]:
+    """
+    Same as `count_matching_templates_dense`, but the templates are sorted by their first value: only the pairs
+    whose first values are within the tolerance (a band along the sorted order) are checked on the remaining values.
+    """
+    n = x.size
+    order = np.argsort(x[:n - 1], kind="stable")  # Templates of length 2 start at 0..n-2
+    first_values = x[order]
+    b = a = 0
+    active = np.arange(max(n - 2, 0))
+    offset = 1
+    while active.size:
+        active = active[active + offset < order.size]
+        active = active[first_values[active + offset] - first_values[active] <= tolerance]
+        i, j = order[active], order[active + offset]
+        matching = np.abs(x[i + 1] - x[j + 1]) <= tolerance
+        b += np.count_nonzero(matching)
+        i, j = i[matching], j[matching]
+        extendable = (i < n - 2) & (j < n - 2)  # Templates of length 3 start at 0..n-3
+        a += np.count_nonzero(np.abs(x[i[extendable] + 2] - x[j[extendable] + 2]) <= tolerance)
+        offset += 1
+    return 2 * b, 2 * a  # Every unordered pair is counted twice
+
+
+calculators: Mapping[str, Callable[..., float]] = {
+    "mean": np.mean,
+    "standard_deviation": np.std,
+    "minimum": np.min,
+    "maximum": np.max,
+    "kurtosis": kurtosis,
+    "large_standard_deviation": large_standard_deviation,
+    "sum_values": lambda x: np.sum(x) if x.size else 0.,
+    "abs_energy": lambda x: np.dot(x, x),
+    "cid_ce": cid_ce,
+    "mean_abs_change": lambda x: np.mean(np.abs(np.diff(x))) if x.size > 1 else np.nan,
+    "mean_change": mean_change,
+    "mean_second_derivative_central": mean_second_derivative_central,
+    "skewness": skewness,
+    "median": np.median,
+    "longest_strike_below_mean": longest_strike_below_mean,
+    "longest_strike_above_mean": longest_strike_above_mean,
+    "fft_coefficient": fft_coefficient,
+    "fft_aggregated": fft_aggregated,
+    "number_peaks": number_peaks,
+    "benford_correlation": benford_correlation,
+    "fourier_entropy": fourier_entropy,
+    "sample_entropy": sample_entropy,
+}
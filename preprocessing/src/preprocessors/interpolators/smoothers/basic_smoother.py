@@ -1,4 +1,6 @@
 from abc import abstractmethod
+from typing import List
+
 from numpy import ndarray
 
 from src.preprocessors.interpolators.smoothers.basic_smoother_config import BasicSmootherConfig
@@ -11,3 +13,9 @@ class BasicSmoother:
     @abstractmethod
     def smooth_out(self, data: ndarray) -> ndarray:
         pass
+
+    def smooth_out_many(self, data: List[ndarray]) -> List[ndarray]:
+        """
+        Smooths out several series (e.g. shapes on all buses). Smoothers able to do it at once should override it.
+        """
+        return [self.smooth_out(series) for series in data]
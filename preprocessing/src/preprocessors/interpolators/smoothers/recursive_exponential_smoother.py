@@ -0,0 +1,66 @@
+from typing import List, Union
+
+import numpy as np
+import pandas as pd
+from numpy import ndarray
+from scipy.signal import lfilter
+
+from src.preprocessors.interpolators.smoothers.basic_smoother import BasicSmoother
+from src.preprocessors.interpolators.smoothers.simple_exponential_smoother_config import SimpleExponentialSmootherConfig
+
+
+class RecursiveExponentialSmoother(BasicSmoother):
+    """
+    Simple Exponential Smoothing computed with a recursive (IIR) filter, without building and fitting
+    a `statsmodels` model. Fitted values are the same as of `SimpleExponentialSmoother` with a fixed smoothing level:
+    the initial level is the heuristic one (Hyndman et al., section 2.6) or, if `optimized`, the one minimizing
+    the sum of squared errors - which is what `statsmodels` optimizes when the smoothing level is fixed.
+    """
+    def __init__(self, smoother_config: SimpleExponentialSmootherConfig):
+        super().__init__(smoother_config=smoother_config)
+        # Weights giving the intercept of the linear regression on the first 10 observations (heuristic level)
+        self.heuristic_weights = np.linalg.pinv(np.c_[np.ones(10), np.arange(10) + 1])[0]
+
+    def smooth_out(self, data: Union[ndarray, pd.Series]) -> Union[ndarray, pd.Series]:
+        """
+        Smooths out the received data. Smoother takes into account the parameters saved in the configuration.
+        data:
+            data to smooth out. If it is a pd.Series, fitted values are returned as a pd.Series with the same index.
+        """
+        fitted = self.smooth_out_many([np.asarray(data, dtype=np.float64)])[0]
+        if isinstance(data, pd.Series):
+            return pd.Series(fitted, index=data.index)
+        return fitted
+
+    def smooth_out_many(self, data: List[ndarray]) -> List[ndarray]:
+        """
+        Smooths out several series (e.g. shapes on all buses) at once. Series may have different lengths.
+        """
+        alpha = self.smoother_config.smoothing_level
+        lengths = np.array([len(series) for series in data])
+        y = np.zeros((len(data), lengths.max(initial=0)))
+        for row, series in enumerate(data):
+            y[row, :len(series)] = series
+        mask = np.arange(y.shape[1]) < lengths[:, np.newaxis]
+
+        # Levels with zero initial level: l_t = alpha * y_t + (1 - alpha) * l_t-1, fitted value at t is l_t-1
+        levels = lfilter([alpha], [1., alpha - 1.], y, axis=1)
+        fitted_without_initial = np.zeros_like(y)
+        fitted_without_initial[:, 1:] = levels[:, :-1]
+        # Contribution of the initial level decays geometrically
+        decay = (1. - alpha) ** np.arange(y.shape[1])
+
+        if self.smoother_config.initial_level_construction is not None:
+            initial_levels = np.full(len(data), self.smoother_config.initial_level_construction, dtype=np.float64)
+        elif self.smoother_config.optimized:
+            # Least squares: errors are linear in the initial level
+            residuals = np.where(mask, y - fitted_without_initial, 0.)
+            decay_2d = np.where(mask, decay, 0.)
+            initial_levels = (residuals * decay_2d).sum(axis=1) / (decay_2d ** 2).sum(axis=1)
+        else:
+            if lengths.min(initial=10) < 10:
+                raise ValueError('Cannot use heuristic method with less than 10 observations.')
+            initial_levels = y[:, :10].dot(self.heuristic_weights)
+
+        fitted = fitted_without_initial + initial_levels[:, np.newaxis] * decay
+        return [fitted[row, :length] for row, length in enumerate(lengths)]
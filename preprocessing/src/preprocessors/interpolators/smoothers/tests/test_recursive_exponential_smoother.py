@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.preprocessors.interpolators.smoothers.recursive_exponential_smoother import RecursiveExponentialSmoother
+from src.preprocessors.interpolators.smoothers.simple_exponential_smoother import SimpleExponentialSmoother
+from src.preprocessors.interpolators.smoothers.simple_exponential_smoother_config import SimpleExponentialSmootherConfig
+
+
+def shapes():
+    rng = np.random.default_rng(0)
+    # Forward filled currents on the buses (1s grid), different lengths as the bus windows
+    return [np.repeat(rng.uniform(0, 800, size // 4 + 1), 4)[:size] + rng.normal(0, 5, size) for size in (161, 156, 164, 146)]
+
+
+@pytest.mark.parametrize("smoothing_level", [0.0, 0.4, 1.0])
+@pytest.mark.parametrize("optimized", [True, False])
+def test_recursive_exponential_smoother_equivalent_to_statsmodels(smoothing_level, optimized):
+    smoother_config = SimpleExponentialSmootherConfig()
+    smoother_config.smoothing_level = smoothing_level
+    smoother_config.optimized = optimized
+
+    data = shapes()
+    expected = [SimpleExponentialSmoother(smoother_config).smooth_out(series) for series in data]
+    actual = RecursiveExponentialSmoother(smoother_config).smooth_out_many(data)
+
+    for series, actual_series, expected_series in zip(data, actual, expected):
+        assert actual_series.shape == expected_series.shape
+        # statsmodels finds the optimal initial level numerically, here it is exact (its error decays over time)
+        np.testing.assert_allclose(actual_series, expected_series, rtol=1e-6, atol=1e-2)
+        assert np.sum((series - actual_series) ** 2) <= np.sum((series - expected_series) ** 2) * (1 + 1e-12)
+
+
+def test_recursive_exponential_smoother_keeps_series_index():
+    data = pd.Series(np.arange(20, dtype=float), index=pd.date_range("2020-01-01", periods=20, freq="1s"))
+
+    smoothed = RecursiveExponentialSmoother(SimpleExponentialSmootherConfig()).smooth_out(data)
+
+    assert isinstance(smoothed, pd.Series)
+    assert smoothed.index.equals(data.index)
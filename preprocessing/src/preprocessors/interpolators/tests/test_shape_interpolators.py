@@ -1,10 +1,16 @@
 from datetime import datetime
 
 import numpy as np
+import pandas as pd
+import pytest
+from scipy.interpolate import interp1d
 
 from src.domain.metadata import Metadata
 from src.domain.waveform import Waveform
+from src.preprocessors.interpolators.shape_interpolator import ShapeInterpolator
 from src.preprocessors.interpolators.simple_shape_interpolator import SimpleShapeInterpolator
+from src.preprocessors.interpolators.smoothers.recursive_exponential_smoother import RecursiveExponentialSmoother
+from src.preprocessors.interpolators.smoothers.simple_exponential_smoother_config import SimpleExponentialSmootherConfig
 from src.preprocessors.interpolators.simple_shape_interpolator_config import SimpleShapeInterpolatorConfig
 from src.preprocessors.interpolators.time_aware_shape_interpolator import TimeAwareShapeInterpolator
 from src.preprocessors.interpolators.time_aware_shape_interpolator_config import TimeAwareShapeInterpolatorConfig
@@ -81,4 +87,51 @@ def test_time_aware_shape_interpolator():
         [1, 1, 2, 3],
         [1, 1, 2, 3]
     ]
-    assert np.allclose(np.array(interpolated), np.array(expected_interpolated))
\ No newline at end of file
+    assert np.allclose(np.array(interpolated), np.array(expected_interpolated))
+
+
+def reference_time_aware_interpolation(interp_config, smoother, bus_to_extracted_waveforms, ktl_entry_time):
+    # Former per-bus implementation: pandas Series, 1s date range and two `interp1d` objects
+    interpolated_row = []
+    for bus in interp_config.shifts:
+        w = bus_to_extracted_waveforms[bus]
+        cutoff_start = ktl_entry_time + interp_config.shifts[bus][0]
+        cutoff_end = ktl_entry_time + interp_config.shifts[bus][1]
+        expanded_vals = np.append(np.insert(w.values, 0, w.values[0]), [w.values[-1]])
+        expanded_timestamps = np.append(np.insert(w.timestamps, 0, cutoff_start), [cutoff_end])
+        ts = pd.Series(expanded_vals, index=expanded_timestamps)
+        xnew = pd.date_range(ts.index[0], ts.index[-1], freq='1s')
+        ynew = interp1d(ts.index.view(int), ts.values, kind='previous')(xnew.view(int))
+        if smoother:
+            ynew = smoother.smooth_out(pd.Series(ynew, xnew)).values
+        interpolated_row.append(ShapeInterpolator.interpolate_simple(ynew, interp_config.no_interp_points[bus])[1])
+    return interpolated_row
+
+
+@pytest.mark.parametrize("smoother", [None, RecursiveExponentialSmoother(SimpleExponentialSmootherConfig())])
+def test_time_aware_shape_interpolator_same_as_reference(smoother):
+    rng = np.random.default_rng(0)
+    interp_config = TimeAwareShapeInterpolatorConfig.equal_number_of_interpolation_points(no_interp_points=32)
+    ktl_entry_time = np.datetime64("2020-06-10T00:41:43.750000", "ns")
+
+    bus_to_extracted_waveforms = {}
+    for bus, (start, end) in interp_config.shifts.items():
+        # Irregular readings (sent only when the value changes) with ms timestamps inside the bus window
+        window_ms = int((end - start) / np.timedelta64(1, 'ms'))
+        offsets = np.sort(rng.choice(np.arange(1000, window_ms - 1000), size=60, replace=False)).astype(
+            'timedelta64[ms]')
+        bus_to_extracted_waveforms[bus] = Waveform(bus, rng.uniform(0, 800, offsets.size),
+                                                   (ktl_entry_time + start + offsets).astype('datetime64[ns]'))
+
+    metadata = Metadata({
+        'timeOfEvent': '2020-06-10 00:41:43.750000', 'inOut': None, 'carBodyId': None, 'carBodyType': None,
+        'voltageProgramType': None, 'skidId': None, 'pendulumId': None, 'paintingCyclesCount': None,
+        'servicesCount': None
+    })
+
+    interpolated = TimeAwareShapeInterpolator(interp_config, smoother=smoother).interpolate(bus_to_extracted_waveforms,
+                                                                                            metadata)
+    expected = reference_time_aware_interpolation(interp_config, smoother, bus_to_extracted_waveforms, ktl_entry_time)
+
+    assert [len(bus_interpolated) for bus_interpolated in interpolated] == [32] * 4
+    np.testing.assert_allclose(np.array(interpolated), np.array(expected), rtol=1e-12, atol=1e-9)
@@ -1,13 +1,50 @@
 from datetime import datetime
-from typing import Mapping, List
+from functools import lru_cache
+from typing import Mapping, List, Tuple
 
 from src.domain.metadata import Metadata
 from src.preprocessors.interpolators.shape_interpolator import ShapeInterpolator
 from src.preprocessors.interpolators.time_aware_shape_interpolator_config import TimeAwareShapeInterpolatorConfig
 from src.preprocessors.interpolators.smoothers.basic_smoother import BasicSmoother
 import numpy as np
-import pandas as pd
-from scipy.interpolate import interp1d
+
+# Buses are resampled together: relative times of bus `i` are shifted by `i * BUS_TIME_OFFSET` nanoseconds,
+# so the readings of all buses form one sorted array. Must be longer than any bus window.
+BUS_TIME_OFFSET = np.int64(10 ** 15)  # ~11.5 days
+
+
+class ResamplingGrid:
+    """
+    Precomputed grids of all buses. Bus windows are constant offsets from the entry time, so the grids depend only on
+    the `shifts` and `no_interp_points` of the configuration.
+    """
+    def __init__(self, shifts: Tuple, no_interp_points: Tuple):
+        lengths = []
+        fill_times, lower, upper, weights = [], [], [], []
+        for i, ((start, end), points) in enumerate(zip(shifts, no_interp_points)):
+            # Fill grid: every second of the bus window (relative to its start)
+            length = int((end - start) // np.timedelta64(1, 's')) + 1
+            fill_times.append(i * BUS_TIME_OFFSET + np.arange(length, dtype=np.int64) * 10 ** 9)
+            # Linear resampling of the filled signal to `points` evenly spaced positions
+            positions = np.linspace(0, length - 1, points)
+            lower_index = np.minimum(np.floor(positions).astype(np.int64), max(length - 2, 0))
+            offset = sum(lengths)
+            lower.append(offset + lower_index)
+            upper.append(offset + np.minimum(lower_index + 1, length - 1))
+            weights.append(positions - lower_index)
+            lengths.append(length)
+
+        self.lengths = np.array(lengths)
+        self.fill_times = np.concatenate(fill_times)
+        self.lower = np.concatenate(lower)
+        self.upper = np.concatenate(upper)
+        self.weights = np.concatenate(weights)
+        self.split_points = np.cumsum(no_interp_points)[:-1]
+
+
+@lru_cache(maxsize=16)
+def get_resampling_grid(shifts: Tuple, no_interp_points: Tuple) -> ResamplingGrid:
+    return ResamplingGrid(shifts, no_interp_points)
 
 
 class TimeAwareShapeInterpolator(ShapeInterpolator):
@@ -21,10 +58,14 @@ class TimeAwareShapeInterpolator(ShapeInterpolator):
         Time-aware shape interpolation. Fills the gaps from left, right and in the middle, because is aware of proper
         time bounds of each waveform. Should be used only in combination with TimeBasedPreprocessor.
 
+        All buses are processed at once: readings are forward filled onto the 1s grid of each bus window
+        (one `np.searchsorted`), optionally smoothed and linearly resampled to `no_interp_points` (precomputed
+        indices and weights).
+
         Parameters
         ----------
         bus_to_extracted_waveform
-            Dictionary with extracted waveforms on each bus.
+            Dictionary with extracted waveforms on each bus. Readings should be sorted and within the bus windows.
         metadata
             Metadata associated with the shapes.
 
@@ -32,35 +73,31 @@ class TimeAwareShapeInterpolator(ShapeInterpolator):
         -------
         List of interpolated shapes on each bus.
         """
-        interpolated_row = []
+        buses = list(self.config.shifts)
+        grid = get_resampling_grid(tuple(self.config.shifts[bus] for bus in buses),
+                                   tuple(self.config.no_interp_points[bus] for bus in buses))
 
         dt = datetime.strptime(metadata.time_of_event, "%Y-%m-%d %H:%M:%S.%f")
-        ktl_entry_time = np.datetime64(dt)
+        ktl_entry_time = np.datetime64(dt, 'ns')
 
-        for bus in self.config.shifts:
-            # Cut to fit within bounds if necessary
+        times, values = [], []
+        for i, bus in enumerate(buses):
             w = bus_to_extracted_waveform[bus]
-
             cutoff_start = ktl_entry_time + self.config.shifts[bus][0]
-            cutoff_end = ktl_entry_time + self.config.shifts[bus][1]
-
-            expanded_vals = np.append(np.insert(w.values, 0, w.values[0]), [w.values[-1]])
-            expanded_timestamps = np.append(np.insert(w.timestamps, 0, cutoff_start), [cutoff_end])
-            ts = pd.Series(expanded_vals, index=expanded_timestamps)
-
-            # First interpolation (with a specified frequency of 1s, to fill all the gaps)
-            beg = ts.index[0]
-            end = ts.index[-1]
-            xnew = pd.date_range(beg, end, freq='1s')
-            f = interp1d(ts.index.view(int), ts.values, kind='previous')
-            ynew = f(xnew.view(int))
-
-            if self.smoother:
-                data_for_smoothing = pd.Series(ynew, xnew)
-                smoothed_data = self.smoother.smooth_out(data_for_smoothing)
-                xnew, ynew = smoothed_data.index, smoothed_data.values
-
-            # Second interpolation (with a specified number of interpolation points), performed evenly on filled signal
-            interpolated = self.interpolate_simple(ynew, self.config.no_interp_points[bus])[1]
-            interpolated_row.append(interpolated.tolist())
-        return interpolated_row
+            window_length = (self.config.shifts[bus][1] - self.config.shifts[bus][0]).astype('timedelta64[ns]')
+            relative_times = (np.asarray(w.timestamps, dtype='datetime64[ns]') - cutoff_start).astype(np.int64)
+            # Window bounds take the first and the last value (filling from left and right)
+            times.extend([[i * BUS_TIME_OFFSET], i * BUS_TIME_OFFSET + relative_times,
+                          [i * BUS_TIME_OFFSET + window_length.astype(np.int64)]])
+            values.extend([w.values[:1], w.values, w.values[-1:]])
+
+        # First interpolation: value of the last reading at or before each second of the grid
+        times, values = np.concatenate(times), np.concatenate(values).astype(np.float64)
+        filled = values[np.searchsorted(times, grid.fill_times, side='right') - 1]
+
+        if self.smoother:
+            filled = np.concatenate(self.smoother.smooth_out_many(np.split(filled, np.cumsum(grid.lengths)[:-1])))
+
+        # Second interpolation (with a specified number of interpolation points), performed evenly on filled signal
+        interpolated = filled[grid.lower] + grid.weights * (filled[grid.upper] - filled[grid.lower])
+        return [bus_interpolated.tolist() for bus_interpolated in np.split(interpolated, grid.split_points)]
@@ -0,0 +1,50 @@
+import logging
+from typing import Mapping
+
+from src.domain.metadata import Metadata
+from src.domain.preprocessing_result import PreprocessingPayload
+from src.domain.waveform import Waveform
+from src.preprocessors.features_extractors.basic_feature_extractor import BasicFeatureExtractor
+from src.preprocessors.histograms_calculators.histograms_calculator import HistogramsCalculator
+from src.preprocessors.interpolators.shape_interpolator import ShapeInterpolator
+
+
+class PayloadPipeline:
+    """
+    Calculates prediction features of a painting: interpolated shapes, histograms and tsfresh features of each bus.
+    The pipeline is created once and reused for all paintings.
+    """
+    def __init__(self, interpolator: ShapeInterpolator, histograms_calculator: HistogramsCalculator,
+                 feature_extractor: BasicFeatureExtractor):
+        self.interpolator = interpolator
+        self.histograms_calculator = histograms_calculator
+        self.feature_extractor = feature_extractor
+
+    def construct_payload(self, metadata: Metadata,
+                          bus_to_extracted_waveform: Mapping[str, Waveform]) -> PreprocessingPayload:
+        """
+        Constructs PreprocessingPayload from preprocessed data.
+        Parameters
+        ----------
+        metadata
+            Metadata which describes a painting.
+        bus_to_extracted_waveform
+            Dictionary with extracted waveforms.
+
+        Returns
+        -------
+        PreprocessingPayload
+            PreprocessingPayload with prediction features.
+        """
+        logging.info("Interpolating shapes.")
+        interpolation_features = self.interpolator.interpolate(bus_to_extracted_waveform, metadata)
+        logging.info("Calculating histograms.")
+        histogram_features = self.histograms_calculator.calculate_histograms(bus_to_extracted_waveform)
+        logging.info("Calculating tsfresh features.")
+        tsfresh_features = self.feature_extractor.extract_features(bus_to_extracted_waveform)
+        custom_features = []
+        return PreprocessingPayload(metadata,
+                                    histogram_features,
+                                    tsfresh_features,
+                                    custom_features,
+                                    interpolation_features)
@@ -1,15 +1,20 @@
 import abc
-import logging
-from typing import Mapping
+from typing import List, Mapping, Optional
+
+import numpy as np
 
 from src.domain.metadata import Metadata
 from src.domain.preprocessing_result import PreprocessingResult, PreprocessingPayload
 from src.domain.waveform import Waveform
 from src.preprocessors.histograms_calculators.histograms_calculator import HistogramsCalculatorConfig, \
     HistogramsCalculator
+from src.preprocessors.payload_pipeline import PayloadPipeline
 from src.preprocessors.interpolators.time_aware_shape_interpolator import TimeAwareShapeInterpolator
 from src.preprocessors.interpolators.time_aware_shape_interpolator_config import TimeAwareShapeInterpolatorConfig
+from src.preprocessors.features_extractors.basic_feature_extractor import BasicFeatureExtractor
+from src.preprocessors.features_extractors.numpy_tsfresh_feature_extractor import NumpyTsfreshFeatureExtractor
 from src.preprocessors.features_extractors.tsfresh_feature_extractor import TsfreshFeatureExtractor, TsfreshConfig
+from src.preprocessors.interpolators.smoothers.recursive_exponential_smoother import RecursiveExponentialSmoother
 from src.preprocessors.interpolators.smoothers.simple_exponential_smoother import SimpleExponentialSmoother
 from src.preprocessors.interpolators.smoothers.simple_exponential_smoother_config import SimpleExponentialSmootherConfig
 from src.config_reader import config
@@ -20,10 +25,43 @@ class Preprocessor:
     Preprocessor class: takes metadata and trends associated with a painting and preprocesses it.
     Features needed for prediction are additionally calculated after performing the preprocessing of data.
     """
+    def __init__(self):
+        self.payload_pipeline: Optional[PayloadPipeline] = None
+
     @abc.abstractmethod
     def preprocess(self, metadata: Metadata, trends: Mapping) -> PreprocessingResult:
         pass
 
+    @abc.abstractmethod
+    def required_coverage(self, metadata: Metadata) -> Mapping[str, np.datetime64]:
+        """
+        Describes which readings have to be available before the painting can be preprocessed.
+
+        Parameters
+        ----------
+        metadata
+            Metadata which describes a painting.
+
+        Returns
+        -------
+        Mapping
+            Dictionary: trend name -> time up to which the readings of the trend are needed.
+        """
+        pass
+
+    @property
+    @abc.abstractmethod
+    def required_trends(self) -> Mapping[str, List[str]]:
+        """
+        Describes which trends are used by the preprocessor, only these trends are read from the database.
+
+        Returns
+        -------
+        Mapping
+            Dictionary: measurement -> names of its trends.
+        """
+        pass
+
     def construct_payload(self, metadata: Metadata,
                           bus_to_extracted_waveform: Mapping[str, Waveform]) -> PreprocessingPayload:
         """
@@ -40,27 +78,31 @@ class Preprocessor:
         PreprocessingPayload
             PreprocessingPayload with prediction features.
         """
-        logging.info("Interpolating shapes.")
+        if self.payload_pipeline is None:
+            self.payload_pipeline = self.create_payload_pipeline()
+        return self.payload_pipeline.construct_payload(metadata, bus_to_extracted_waveform)
+
+    def create_payload_pipeline(self) -> PayloadPipeline:
+        """
+        Creates the interpolator, histograms calculator and feature extractor, they are reused for all paintings.
+        """
         interpolator_config = TimeAwareShapeInterpolatorConfig.equal_number_of_interpolation_points(
             no_interp_points=config['general']['interpolation-points'])
-        smoother = self.get_smoother_if_required()
-        interpolator = TimeAwareShapeInterpolator(interpolator_config, smoother=smoother)
-        interpolation_features = interpolator.interpolate(bus_to_extracted_waveform, metadata)
-        logging.info("Calculating histograms.")
-        histogram_features = HistogramsCalculator(HistogramsCalculatorConfig()).calculate_histograms(
-            bus_to_extracted_waveform)
-        logging.info("Calculating tsfresh features.")
-        tsfresh_features = TsfreshFeatureExtractor(TsfreshConfig()).extract_features(bus_to_extracted_waveform)
-        custom_features = []
-        return PreprocessingPayload(metadata,
-                                    histogram_features,
-                                    tsfresh_features,
-                                    custom_features,
-                                    interpolation_features)
+        interpolator = TimeAwareShapeInterpolator(interpolator_config, smoother=self.get_smoother_if_required())
+        return PayloadPipeline(interpolator, HistogramsCalculator(HistogramsCalculatorConfig()),
+                               self.get_feature_extractor())
 
     @staticmethod
     def get_smoother_if_required():
         smoother = None
         if config['general']['smoother'] == 'SimpleExponentialSmoothing':
             smoother = SimpleExponentialSmoother(SimpleExponentialSmootherConfig())
+        elif config['general']['smoother'] == 'RecursiveExponentialSmoothing':
+            smoother = RecursiveExponentialSmoother(SimpleExponentialSmootherConfig())
         return smoother
+
+    @staticmethod
+    def get_feature_extractor() -> BasicFeatureExtractor:
+        if config['general']['feature-extractor'] == 'Tsfresh':
+            return TsfreshFeatureExtractor(TsfreshConfig())
+        return NumpyTsfreshFeatureExtractor(TsfreshConfig())
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from src.domain.waveform import Waveform
+from src.preprocessors.features_extractors.numpy_tsfresh_feature_extractor import NumpyTsfreshFeatureExtractor
+from src.preprocessors.features_extractors.tsfresh_feature_extractor import TsfreshFeatureExtractor, TsfreshConfig
+
+
+def painting_waveform(rng, size, maximum):
+    # Shape similar to the current on a bus during painting: ramp up, plateau with noise, ramp down.
+    # Sensor precision, but float64 as read from Influx
+    ramp = size // 4
+    shape = np.concatenate([np.linspace(3, maximum, ramp), np.full(size - 2 * ramp, maximum), np.linspace(maximum, 3, ramp)])
+    return (shape + rng.normal(0, maximum / 50, size)).astype(np.float32).astype(np.float64)
+
+
+def waveforms():
+    rng = np.random.default_rng(0)
+    yield "painting", {f"K{i}": painting_waveform(rng, 120 + 10 * i, 400 + 100 * i) for i in range(1, 5)}
+    yield "random_walk", {f"K{i}": np.cumsum(rng.normal(0, 1, 300 * i)) for i in range(1, 5)}
+    yield "decimals", {f"K{i}": np.round(rng.uniform(0, 10 ** i, 150), 1) for i in range(1, 5)}
+    yield "plateaus", {f"K{i}": np.repeat(rng.integers(0, 800, 12), 10 + i).astype(float) for i in range(1, 5)}
+    yield "constant", {"K1": np.full(50, 7.), "K2": np.zeros(30), "K3": np.full(3, 1.), "K4": np.ones(21)}
+    yield "short", {"K1": np.array([5.]), "K2": np.array([1, 2]), "K3": np.array([1, 2, 3]),
+                    "K4": np.array([4, 1, 3, 2])}
+
+
+@pytest.mark.parametrize("name, bus_to_values", list(waveforms()))
+def test_numpy_tsfresh_feature_extractor_parity_with_tsfresh(name, bus_to_values):
+    bus_to_extracted_waveform = {
+        bus: Waveform(bus, values, np.datetime64("2020-01-01T00:00:00") + np.arange(values.size).astype("timedelta64[s]"))
+        for bus, values in bus_to_values.items()
+    }
+
+    expected = TsfreshFeatureExtractor(TsfreshConfig()).extract_features(bus_to_extracted_waveform)
+    actual = NumpyTsfreshFeatureExtractor(TsfreshConfig()).extract_features(bus_to_extracted_waveform)
+
+    assert len(actual) == 4
+    assert all(len(bus_features) == 26 for bus_features in actual)
+    np.testing.assert_allclose(np.array(actual), np.array(expected), rtol=1e-7, atol=1e-9, equal_nan=True)
@@ -0,0 +1,45 @@
+import numpy as np
+
+from src.domain.metadata import Metadata
+from src.domain.waveform import Waveform
+from src.preprocessors.features_extractors.numpy_tsfresh_feature_extractor import NumpyTsfreshFeatureExtractor
+from src.preprocessors.features_extractors.tsfresh_feature_extractor_config import TsfreshConfig
+from src.preprocessors.histograms_calculators.histograms_calculator import HistogramsCalculator, \
+    HistogramsCalculatorConfig
+from src.preprocessors.interpolators.smoothers.recursive_exponential_smoother import RecursiveExponentialSmoother
+from src.preprocessors.interpolators.smoothers.simple_exponential_smoother_config import SimpleExponentialSmootherConfig
+from src.preprocessors.interpolators.time_aware_shape_interpolator import TimeAwareShapeInterpolator
+from src.preprocessors.interpolators.time_aware_shape_interpolator_config import TimeAwareShapeInterpolatorConfig
+from src.preprocessors.payload_pipeline import PayloadPipeline
+
+
+def painting():
+    metadata = Metadata({
+        'timeOfEvent': '2021-07-06 10:00:00.000', 'inOut': 'in', 'carBodyId': 1, 'carBodyType': 'A',
+        'voltageProgramType': 1, 'skidId': 1, 'pendulumId': 1, 'paintingCyclesCount': 1, 'servicesCount': 1
+    })
+    entry_time = np.datetime64('2021-07-06T10:00:00', 'ns')
+    rng = np.random.default_rng(0)
+    bus_to_extracted_waveform = {}
+    for bus, (start, end) in TimeAwareShapeInterpolatorConfig.equal_number_of_interpolation_points(32).shifts.items():
+        seconds = np.sort(rng.choice(np.arange(start.astype(int), end.astype(int)), size=60, replace=False))
+        bus_to_extracted_waveform[bus] = Waveform(bus, rng.uniform(0, 800, seconds.size),
+                                                  entry_time + seconds.astype('timedelta64[s]'))
+    return metadata, bus_to_extracted_waveform
+
+
+def pipeline():
+    interpolator = TimeAwareShapeInterpolator(TimeAwareShapeInterpolatorConfig.equal_number_of_interpolation_points(32),
+                                              smoother=RecursiveExponentialSmoother(SimpleExponentialSmootherConfig()))
+    return PayloadPipeline(interpolator, HistogramsCalculator(HistogramsCalculatorConfig()),
+                           NumpyTsfreshFeatureExtractor(TsfreshConfig()))
+
+
+def test_reused_pipeline_gives_the_same_payload():
+    metadata, bus_to_extracted_waveform = painting()
+    expected = pipeline().construct_payload(metadata, bus_to_extracted_waveform).to_dict()
+
+    reused_pipeline = pipeline()
+    for _ in range(2):
+        actual = reused_pipeline.construct_payload(metadata, bus_to_extracted_waveform).to_dict()
+        np.testing.assert_equal(actual, expected)
@@ -1,4 +1,4 @@
-from typing import Mapping
+from typing import List, Mapping
 
 import numpy as np
 
@@ -15,6 +15,7 @@ class TimeBasedPreprocessor(Preprocessor):
     Preprocessor based on time. Extracts shapes from buses in predefined timeframes.
     """
     def __init__(self):
+        super().__init__()
         self.shifts = {
             "K1": (np.timedelta64(5, 's'), np.timedelta64(2 * 60 + 46, 's')),
             "K2": (np.timedelta64(2 * 60 + 29, 's'), np.timedelta64(5 * 60 + 5, 's')),
@@ -29,6 +30,14 @@ class TimeBasedPreprocessor(Preprocessor):
         }
         self.current_trends_measurement_name = "CurrentTrends"
 
+    @property
+    def required_trends(self) -> Mapping[str, List[str]]:
+        return {self.current_trends_measurement_name: list(self.bus_to_trend_name.values())}
+
+    def required_coverage(self, metadata: Metadata) -> Mapping[str, np.datetime64]:
+        ktl_entry_time = np.datetime64(datetime.strptime(metadata.time_of_event, "%Y-%m-%d %H:%M:%S.%f"))
+        return {trend_name: ktl_entry_time + self.shifts[bus][1] for bus, trend_name in self.bus_to_trend_name.items()}
+
     def preprocess(self, metadata: Metadata, trends: Mapping) -> PreprocessingResult:
         # Get KTL entry time
         ktl_entry_time = metadata.time_of_event
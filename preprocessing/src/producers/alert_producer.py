@@ -1,5 +1,5 @@
 from src.domain.preprocessing_result import PreprocessingResult, PreprocessingStatus
-from src.producers.basic_producer import BasicProducer
+from kafka_utils.producer import BasicProducer
 from src.config_reader import config
 from typing import Dict
 from datetime import datetime
@@ -8,7 +8,7 @@ from typing import Mapping
 
 class AlertProducer(BasicProducer):
     def __init__(self):
-        super().__init__(config["kafka"]["alerts-topic"])
+        super().__init__(config["kafka"]["alerts-topic"], config["kafka"])
 
     @property
     def alerts_trigger_list(self):
@@ -24,4 +24,4 @@ class AlertProducer(BasicProducer):
 
     def produce(self, preprocessing_result: PreprocessingResult):
         prepared_alert = self.extract_relevant_information(preprocessing_result)
-        self.producer.send(self.topic_name, prepared_alert)
\ No newline at end of file
+        self.send(prepared_alert)
\ No newline at end of file
@@ -1,11 +1,16 @@
 from src.domain.preprocessing_result import PreprocessingResult
-from src.producers.basic_producer import BasicProducer
+from kafka_utils.producer import BasicProducer
+from kafka_utils.serialization import MSGPACK
 from src.config_reader import config
 
 
 class PreprocessingResultProducer(BasicProducer):
     def __init__(self):
-        super().__init__(config["kafka"]["preprocessing-results-topic"])
+        super().__init__(config["kafka"]["preprocessing-results-topic"], config["kafka"],
+                         wire_format=config["kafka"]["preprocessing-results-format"])
 
     def produce(self, preprocessing_result: PreprocessingResult):
-        self.producer.send(self.topic_name, preprocessing_result.to_dict())
\ No newline at end of file
+        if self.wire_format == MSGPACK:
+            self.send(preprocessing_result.to_binary_dict())
+        else:
+            self.send(preprocessing_result.to_dict())
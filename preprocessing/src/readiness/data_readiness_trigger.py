@@ -0,0 +1,75 @@
+import logging
+from time import monotonic
+from typing import Mapping
+
+import numpy as np
+
+from src.readiness.trends_watermark import TrendsWatermark
+
+
+class DataReadinessTrigger:
+    """
+    Decides when the trends required to preprocess a painting are available. Data is considered ready as soon as
+    the watermark of every required trend reaches the end of the time window the preprocessor needs for it.
+    If that does not happen within `timeout` seconds (e.g. a trend did not change its value, so no new readings were
+    sent), the data is considered ready anyway and the preprocessing works with what is available.
+    """
+    def __init__(self, watermark: TrendsWatermark, timeout: float, poll_interval: float):
+        """
+
+        Parameters
+        ----------
+        watermark
+            Source of the newest readings timestamps.
+        timeout
+            Maximum time (in seconds) to wait for the data.
+        poll_interval
+            Time (in seconds) between consecutive watermark checks.
+        """
+        self.watermark = watermark
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+    def is_covered(self, required_coverage: Mapping[str, np.datetime64]) -> bool:
+        """
+        Checks if the watermark covers required time windows.
+
+        Parameters
+        ----------
+        required_coverage
+            Dictionary: trend name -> end of the time window required by the preprocessor.
+
+        Returns
+        -------
+        bool
+            True if all required trends have readings at least up to the end of their windows.
+        """
+        if not required_coverage:
+            return True
+        time_from = min(required_coverage.values())
+        latest_timestamps = self.watermark.latest_timestamps(list(required_coverage.keys()), time_from)
+        return all(trend_name in latest_timestamps and latest_timestamps[trend_name] >= window_end
+                   for trend_name, window_end in required_coverage.items())
+
+    def is_ready(self, required_coverage: Mapping[str, np.datetime64], waiting_since: float) -> bool:
+        """
+        Checks if the painting can be preprocessed: the watermark covers required time windows or the timeout passed.
+
+        Parameters
+        ----------
+        required_coverage
+            Dictionary: trend name -> end of the time window required by the preprocessor.
+        waiting_since
+            Time (`time.monotonic()`) when waiting for the data started.
+
+        Returns
+        -------
+        bool
+            True if the preprocessing should be started.
+        """
+        if self.is_covered(required_coverage):
+            return True
+        if monotonic() - waiting_since >= self.timeout:
+            logging.warning(f"Data not covered by the watermark after {self.timeout} seconds, proceeding anyway.")
+            return True
+        return False
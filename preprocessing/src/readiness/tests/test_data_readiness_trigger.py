@@ -0,0 +1,43 @@
+from time import monotonic
+
+import numpy as np
+
+from src.readiness.data_readiness_trigger import DataReadinessTrigger
+from src.readiness.trends_watermark import SharedTrendsWatermark
+
+
+def test_shared_trends_watermark_keeps_newest_timestamp():
+    watermark = SharedTrendsWatermark(["current_on_busbar_1", "current_on_busbar_2"])
+
+    watermark.update("current_on_busbar_1", np.datetime64("2020-01-01T00:00:05"))
+    watermark.update("current_on_busbar_1", np.datetime64("2020-01-01T00:00:03"))  # late reading, ignored
+    watermark.update("unknown_trend", np.datetime64("2020-01-01T00:00:10"))  # not watched, ignored
+
+    latest = watermark.latest_timestamps(["current_on_busbar_1", "current_on_busbar_2"],
+                                         np.datetime64("2020-01-01T00:00:00"))
+
+    assert latest == {"current_on_busbar_1": np.datetime64("2020-01-01T00:00:05")}
+
+
+def test_data_readiness_trigger_waits_for_all_trends():
+    watermark = SharedTrendsWatermark(["current_on_busbar_1", "current_on_busbar_2"])
+    trigger = DataReadinessTrigger(watermark, timeout=60, poll_interval=0)
+    required_coverage = {
+        "current_on_busbar_1": np.datetime64("2020-01-01T00:02:46"),
+        "current_on_busbar_2": np.datetime64("2020-01-01T00:05:05"),
+    }
+
+    watermark.update("current_on_busbar_1", np.datetime64("2020-01-01T00:03:00"))
+    watermark.update("current_on_busbar_2", np.datetime64("2020-01-01T00:05:00"))
+    assert not trigger.is_covered(required_coverage)
+    assert not trigger.is_ready(required_coverage, waiting_since=monotonic())
+    assert trigger.is_ready(required_coverage, waiting_since=monotonic() - 60)  # timeout passed
+
+    watermark.update("current_on_busbar_2", np.datetime64("2020-01-01T00:05:05"))
+    assert trigger.is_covered(required_coverage)
+    assert trigger.is_ready(required_coverage, waiting_since=monotonic())
+
+
+def test_data_readiness_trigger_nothing_required():
+    trigger = DataReadinessTrigger(SharedTrendsWatermark([]), timeout=0, poll_interval=0)
+    assert trigger.is_covered({})
@@ -0,0 +1,95 @@
+import abc
+from multiprocessing import Array
+from typing import List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.db.shared_trends_buffer import SharedTrendsBuffer
+from src.db.ts_repository import TimeSeriesRepository
+
+
+class TrendsWatermark:
+    """
+    Watermark of the trends: timestamp of the newest reading received for each trend.
+    All readings of a trend older than its watermark are considered to be available for preprocessing.
+    """
+    @abc.abstractmethod
+    def latest_timestamps(self, trend_names: List[str], time_from: np.datetime64) -> Mapping[str, np.datetime64]:
+        """
+        Returns watermarks of the given trends.
+
+        Parameters
+        ----------
+        trend_names
+            Names of the trends to check.
+        time_from
+            Readings older than this time may be ignored - the caller is not interested in them.
+
+        Returns
+        -------
+        Mapping
+            Dictionary: trend name -> timestamp of the newest reading. Trends without any reading are not included.
+        """
+        pass
+
+
+class InfluxDbTrendsWatermark(TrendsWatermark):
+    """
+    Watermark taken from the time series repository, i.e. newest readings which were already persisted.
+    """
+    def __init__(self, ts_repo: TimeSeriesRepository, measurement: str):
+        self.ts_repo = ts_repo
+        self.measurement = measurement
+
+    def latest_timestamps(self, trend_names: List[str], time_from: np.datetime64) -> Mapping[str, np.datetime64]:
+        return self.ts_repo.get_latest_timestamps(self.measurement, trend_names, pd.Timestamp(time_from).to_pydatetime())
+
+
+class SharedTrendsWatermark(TrendsWatermark):
+    """
+    Watermark kept in shared memory and updated from the trends Kafka stream (see `CurrentTrendsConsumer`).
+    The memory is allocated before forking, so it is visible to every process processing a painting.
+    Timestamps are stored as int64 nanoseconds since epoch, 0 means that nothing was received yet.
+    """
+    def __init__(self, trend_names: List[str]):
+        self.trend_names = list(trend_names)
+        self.trend_to_index = {trend_name: i for i, trend_name in enumerate(self.trend_names)}
+        self.timestamps = Array('q', len(self.trend_names))
+
+    def update(self, trend_name: str, timestamp: np.datetime64):
+        index = self.trend_to_index.get(trend_name)
+        if index is None:
+            return
+        timestamp_ns = int(timestamp.astype('datetime64[ns]').astype(np.int64))
+        with self.timestamps.get_lock():
+            if timestamp_ns > self.timestamps[index]:
+                self.timestamps[index] = timestamp_ns
+
+    def latest_timestamps(self, trend_names: List[str], time_from: np.datetime64) -> Mapping[str, np.datetime64]:
+        result = {}
+        for trend_name in trend_names:
+            timestamp = self.get(trend_name)
+            if timestamp is not None:
+                result[trend_name] = timestamp
+        return result
+
+    def get(self, trend_name: str) -> Optional[np.datetime64]:
+        timestamp_ns = self.timestamps[self.trend_to_index[trend_name]]
+        return np.datetime64(timestamp_ns, 'ns') if timestamp_ns else None
+
+
+class BufferedTrendsWatermark(TrendsWatermark):
+    """
+    Watermark taken from the shared memory buffer of the newest readings (see `SharedTrendsBuffer`).
+    """
+    def __init__(self, trends_buffer: SharedTrendsBuffer):
+        self.trends_buffer = trends_buffer
+
+    def latest_timestamps(self, trend_names: List[str], time_from: np.datetime64) -> Mapping[str, np.datetime64]:
+        result = {}
+        for trend_name in trend_names:
+            timestamp = self.trends_buffer.latest_timestamp(trend_name)
+            if timestamp is not None:
+                result[trend_name] = timestamp
+        return result
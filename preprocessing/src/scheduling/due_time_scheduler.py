@@ -0,0 +1,108 @@
+import heapq
+import itertools
+import logging
+from threading import Condition
+from time import monotonic
+from typing import Callable, List, Mapping, Tuple
+
+import numpy as np
+
+from src.domain.metadata import Metadata
+from src.readiness.data_readiness_trigger import DataReadinessTrigger
+
+
+class ScheduledMetadata:
+    """
+    Painting waiting for its data: metadata together with the readings it requires and the function to call once
+    the painting is handled.
+    """
+    def __init__(self, metadata: Metadata, required_coverage: Mapping[str, np.datetime64], waiting_since: float,
+                 on_done: Callable[[], None]):
+        self.metadata = metadata
+        self.required_coverage = required_coverage
+        self.waiting_since = waiting_since
+        self.on_done = on_done
+
+
+class DueTimeScheduler:
+    """
+    Keeps paintings waiting for their data in an in-memory heap ordered by due time (the time of the next readiness
+    check). Once the readiness trigger reports the data of a painting as ready, the painting is dispatched (e.g. to
+    the workers pool), otherwise it is checked again after the poll interval of the trigger.
+    Waiting paintings cost only a heap entry, no matter how many car bodies are in the paint bath.
+    """
+    def __init__(self, readiness_trigger: DataReadinessTrigger,
+                 dispatch: Callable[[Metadata, Callable[[], None]], None]):
+        """
+
+        Parameters
+        ----------
+        readiness_trigger
+            Trigger deciding whether the data of a painting is ready.
+        dispatch
+            Function called with metadata of a painting whose data is ready and the function to call once
+            the painting is handled (see 'schedule').
+        """
+        self.readiness_trigger = readiness_trigger
+        self.dispatch = dispatch
+        self.heap: List[Tuple[float, int, ScheduledMetadata]] = []
+        self.counter = itertools.count()  # Tie-breaker, metadata objects are not comparable
+        self.condition = Condition()
+
+    def schedule(self, metadata: Metadata, required_coverage: Mapping[str, np.datetime64],
+                 on_done: Callable[[], None] = lambda: None):
+        """
+        Adds the painting to the heap, it is due immediately.
+
+        Parameters
+        ----------
+        metadata
+            Metadata of the painting.
+        required_coverage
+            Newest reading required from each trend.
+        on_done
+            Function passed to 'dispatch' with the painting, e.g. marking its message as handled.
+        """
+        now = monotonic()
+        self.push(now, ScheduledMetadata(metadata, required_coverage, waiting_since=now, on_done=on_done))
+
+    def push(self, due_time: float, entry: ScheduledMetadata):
+        with self.condition:
+            heapq.heappush(self.heap, (due_time, next(self.counter), entry))
+            self.condition.notify()
+
+    def pop_due(self) -> ScheduledMetadata:
+        """
+        Blocks until the earliest entry is due and removes it from the heap.
+        """
+        with self.condition:
+            while True:
+                if self.heap:
+                    time_to_due = self.heap[0][0] - monotonic()
+                    if time_to_due <= 0:
+                        return heapq.heappop(self.heap)[2]
+                    self.condition.wait(timeout=time_to_due)
+                else:
+                    self.condition.wait()
+
+    def run(self):
+        """
+        Main loop of the scheduler, meant to be run in a separate thread.
+        """
+        while True:
+            entry = self.pop_due()
+            try:
+                ready = self.readiness_trigger.is_ready(entry.required_coverage, entry.waiting_since)
+            except Exception as e:
+                logging.error(f"Could not check readiness of painting {entry.metadata.car_body_id}: {e}")
+                ready = monotonic() - entry.waiting_since >= self.readiness_trigger.timeout
+
+            if ready:
+                logging.info(f"Data of painting {entry.metadata.car_body_id} is ready, dispatching.")
+                self.dispatch(entry.metadata, entry.on_done)
+            else:
+                self.push(monotonic() + self.readiness_trigger.poll_interval, entry)
+
+    def __len__(self):
+        with self.condition:
+            return len(self.heap)
@@ -0,0 +1,64 @@
+import logging
+from multiprocessing import Pool
+from multiprocessing.util import Finalize
+from typing import Callable, Optional
+
+from src.db.buffered_trends_repository import BufferedTrendsRepository
+from src.db.influxdb_repository import InfluxDbRepository
+from src.db.shared_trends_buffer import SharedTrendsBuffer
+from src.domain.metadata import Metadata
+from src.preprocessors.preprocessor import Preprocessor
+from src.single_row_metadata_processor import SingleRowMetadataProcessor, SingleRowMetadataProcessorConfig
+from src.utils import exit_on_sigterm
+
+# Processor of the worker process, created once by the pool initializer
+worker_metadata_row_processor: Optional[SingleRowMetadataProcessor] = None
+
+
+def init_worker(processor_config: SingleRowMetadataProcessorConfig, preprocessor: Preprocessor,
+                trends_buffer: Optional[SharedTrendsBuffer]):
+    """
+    Initializes worker process: each worker has its own Influx client and Kafka producers, only the trends buffer
+    (if any) is shared with the parent process. The producers are flushed when the worker exits, also on SIGTERM.
+    """
+    global worker_metadata_row_processor
+    ts_repo = InfluxDbRepository()
+    if trends_buffer is not None:
+        ts_repo = BufferedTrendsRepository(trends_buffer, measurement=preprocessor.current_trends_measurement_name,
+                                           fallback=ts_repo)
+    worker_metadata_row_processor = SingleRowMetadataProcessor(config=processor_config,
+                                                               preprocessor=preprocessor,
+                                                               ts_repo=ts_repo)
+    exit_on_sigterm()
+    Finalize(None, worker_metadata_row_processor.close_producers, exitpriority=10)
+
+
+def process_metadata_row(metadata: Metadata):
+    worker_metadata_row_processor.produce_processed_metadata_row(metadata)
+
+
+class PreprocessingWorkersPool:
+    """
+    Fixed-size pool of processes preprocessing paintings whose data is ready.
+    The number of workers caps the number of paintings preprocessed concurrently, further paintings wait in the queue.
+    The pool should be created before any thread is started in the parent process.
+    """
+    def __init__(self, workers: int, processor_config: SingleRowMetadataProcessorConfig, preprocessor: Preprocessor,
+                 trends_buffer: Optional[SharedTrendsBuffer] = None):
+        self.pool = Pool(processes=workers, initializer=init_worker,
+                         initargs=(processor_config, preprocessor, trends_buffer))
+
+    def submit(self, metadata: Metadata, on_done: Callable[[], None] = lambda: None):
+        """
+        Queues the painting, 'on_done' is called (in a thread of this process) once it is preprocessed or failed.
+        """
+        def log_error(error: BaseException):
+            logging.error(f"Preprocessing of painting failed: {error}")
+            on_done()
+
+        self.pool.apply_async(process_metadata_row, args=(metadata,), callback=lambda _: on_done(),
+                              error_callback=log_error)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
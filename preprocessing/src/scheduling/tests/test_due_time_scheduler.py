@@ -0,0 +1,59 @@
+from queue import Queue
+from threading import Thread
+
+import numpy as np
+
+from src.domain.metadata import Metadata
+from src.readiness.data_readiness_trigger import DataReadinessTrigger
+from src.readiness.trends_watermark import SharedTrendsWatermark
+from src.scheduling.due_time_scheduler import DueTimeScheduler
+
+
+def get_metadata(car_body_id):
+    return Metadata({
+        'timeOfEvent': '2020-01-01 00:00:00.00000', 'inOut': 'IN', 'carBodyId': car_body_id, 'carBodyType': None,
+        'voltageProgramType': None, 'skidId': None, 'pendulumId': None
+    })
+
+
+def test_due_time_scheduler_dispatches_paintings_once_data_is_ready():
+    watermark = SharedTrendsWatermark(["current_on_busbar_1"])
+    trigger = DataReadinessTrigger(watermark, timeout=60, poll_interval=0.01)
+    dispatched = Queue()
+    scheduler = DueTimeScheduler(readiness_trigger=trigger, dispatch=lambda metadata, on_done: dispatched.put(metadata))
+    Thread(target=scheduler.run, daemon=True).start()
+
+    scheduler.schedule(get_metadata("late"), {"current_on_busbar_1": np.datetime64("2020-01-01T00:05:00")})
+    scheduler.schedule(get_metadata("early"), {"current_on_busbar_1": np.datetime64("2020-01-01T00:02:00")})
+    scheduler.schedule(get_metadata("filtered"), {})
+
+    assert dispatched.get(timeout=1).car_body_id == "filtered"
+
+    watermark.update("current_on_busbar_1", np.datetime64("2020-01-01T00:03:00"))
+    assert dispatched.get(timeout=1).car_body_id == "early"
+
+    watermark.update("current_on_busbar_1", np.datetime64("2020-01-01T00:05:00"))
+    assert dispatched.get(timeout=1).car_body_id == "late"
+    assert len(scheduler) == 0
+
+
+def test_due_time_scheduler_dispatches_paintings_after_timeout():
+    trigger = DataReadinessTrigger(SharedTrendsWatermark(["current_on_busbar_1"]), timeout=0.05, poll_interval=0.01)
+    dispatched = Queue()
+    scheduler = DueTimeScheduler(readiness_trigger=trigger, dispatch=lambda metadata, on_done: dispatched.put(metadata))
+    Thread(target=scheduler.run, daemon=True).start()
+
+    scheduler.schedule(get_metadata("never_covered"), {"current_on_busbar_1": np.datetime64("2020-01-01T00:05:00")})
+
+    assert dispatched.get(timeout=1).car_body_id == "never_covered"
+
+
+def test_due_time_scheduler_dispatches_paintings_with_their_on_done():
+    trigger = DataReadinessTrigger(SharedTrendsWatermark(["current_on_busbar_1"]), timeout=60, poll_interval=0.01)
+    handled = Queue()
+    scheduler = DueTimeScheduler(readiness_trigger=trigger, dispatch=lambda metadata, on_done: on_done())
+    Thread(target=scheduler.run, daemon=True).start()
+
+    scheduler.schedule(get_metadata("filtered"), {}, on_done=lambda: handled.put("done"))
+
+    assert handled.get(timeout=1) == "done"
@@ -0,0 +1,34 @@
+import argparse
+import timeit
+
+import numpy as np
+
+from src.domain.waveform import Waveform
+from src.preprocessors.features_extractors.numpy_tsfresh_feature_extractor import NumpyTsfreshFeatureExtractor
+from src.preprocessors.features_extractors.tsfresh_feature_extractor import TsfreshFeatureExtractor, TsfreshConfig
+
+
+def generate_waveforms(size: int):
+    rng = np.random.default_rng(0)
+    timestamps = np.datetime64("2021-07-06T00:00:00") + np.arange(size).astype("timedelta64[s]")
+    return {f"K{i}": Waveform(f"K{i}", 300 + 50 * rng.standard_normal(size), timestamps) for i in range(1, 5)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-sizes', help='Numbers of readings per bus.', default=[160, 500, 2000], nargs='+', type=int)
+    parser.add_argument('-repeat', help='Number of repetitions.', default=5, type=int)
+    args = vars(parser.parse_args())
+
+    extractors = {
+        "tsfresh": TsfreshFeatureExtractor(TsfreshConfig()),
+        "numpy": NumpyTsfreshFeatureExtractor(TsfreshConfig()),
+    }
+    for size in args['sizes']:
+        waveforms = generate_waveforms(size)
+        times = {name: min(timeit.repeat(lambda: extractor.extract_features(waveforms), number=1,
+                                         repeat=args['repeat']))
+                 for name, extractor in extractors.items()}
+        print(f"Readings per bus: {size}, "
+              f"tsfresh: {times['tsfresh'] * 1000:.1f} ms, numpy: {times['numpy'] * 1000:.1f} ms "
+              f"({times['tsfresh'] / times['numpy']:.1f}x)")
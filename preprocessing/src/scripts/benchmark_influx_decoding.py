@@ -0,0 +1,79 @@
+import argparse
+import timeit
+from datetime import datetime, timedelta, timezone
+from io import BytesIO, StringIO
+
+import pandas as pd
+from influxdb_client.client.flux_csv_parser import FluxCsvParser, FluxSerializationMode
+
+from src.db.flux_csv_decoder import decode_flux_csv, split_trends
+
+trends = {"CurrentTrends": ["current_on_busbar_1", "current_on_busbar_2", "current_on_busbar_3", "current_on_busbar_4"]}
+
+
+def generate_readings(rows: int):
+    start = datetime(2021, 7, 6, tzinfo=timezone.utc)
+    trend_names = trends["CurrentTrends"]
+    for i in range(rows):
+        yield start + timedelta(milliseconds=250 * i), float(i % 1000), "CurrentTrends", trend_names[i % len(trend_names)]
+
+
+def generate_flux_csv(rows: int, annotated: bool = False) -> str:
+    lines = []
+    if annotated:  # Default dialect of the client, used by `QueryApi.query`
+        lines += ["#datatype,string,long,dateTime:RFC3339,double,string,string",
+                  "#group,false,false,false,false,true,true",
+                  "#default,_result,,,,,"]
+    lines.append(",result,table,_time,_value,_measurement,trend_name")
+    trend_names = trends["CurrentTrends"]
+    for time, value, measurement, trend_name in generate_readings(rows):
+        lines.append(f",_result,{trend_names.index(trend_name)},{time.strftime('%Y-%m-%dT%H:%M:%S.%fZ')},{value},"
+                     f"{measurement},{trend_name}")
+    return "\r\n".join(lines) + "\r\n"
+
+
+def parse_flux_tables(annotated_csv: bytes):
+    """
+    Parsing of the response done by `QueryApi.query`: a FluxRecord object is created for every row.
+    """
+    with FluxCsvParser(response=BytesIO(annotated_csv), serialization_mode=FluxSerializationMode.tables) as parser:
+        list(parser.generator())
+        return parser.table_list()
+
+
+def decode_flux_tables(tables):
+    """
+    Previous decoding: a Python loop over the FluxRecord objects of each trend (after `parse_flux_tables`).
+    """
+    result = {}
+    for measurement, trend_names in trends.items():
+        sub_res = {}
+        for trend_name in trend_names:
+            res = {"dt": [], "value": []}
+            for table in tables:
+                for record in table.records:
+                    if record.values["trend_name"] == trend_name:
+                        res["dt"].append(record.get_time())
+                        res["value"].append(record.get_value())
+            sub_res[trend_name] = pd.DataFrame.from_dict(res).set_index('dt').sort_index()
+        result[measurement] = sub_res
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-rows', help='Number of rows of the query result.', default=100000, type=int)
+    parser.add_argument('-repeat', help='Number of repetitions.', default=5, type=int)
+    args = vars(parser.parse_args())
+
+    annotated_flux_csv = generate_flux_csv(args['rows'], annotated=True).encode()
+    flux_csv = generate_flux_csv(args['rows'])
+
+    records_time = min(timeit.repeat(lambda: decode_flux_tables(parse_flux_tables(annotated_flux_csv)),
+                                     number=1, repeat=args['repeat']))
+    csv_time = min(timeit.repeat(lambda: split_trends(decode_flux_csv(StringIO(flux_csv)), trends),
+                                 number=1, repeat=args['repeat']))
+
+    print(f"Rows: {args['rows']}")
+    print(f"FluxRecord parsing and loop: {records_time * 1000:.1f} ms")
+    print(f"Columnar CSV decoding: {csv_time * 1000:.1f} ms ({records_time / csv_time:.1f}x)")
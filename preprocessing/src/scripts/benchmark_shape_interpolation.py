@@ -0,0 +1,68 @@
+import argparse
+import timeit
+
+import numpy as np
+import pandas as pd
+from scipy.interpolate import interp1d
+
+from src.domain.metadata import Metadata
+from src.domain.waveform import Waveform
+from src.preprocessors.interpolators.shape_interpolator import ShapeInterpolator
+from src.preprocessors.interpolators.smoothers.recursive_exponential_smoother import RecursiveExponentialSmoother
+from src.preprocessors.interpolators.smoothers.simple_exponential_smoother_config import SimpleExponentialSmootherConfig
+from src.preprocessors.interpolators.time_aware_shape_interpolator import TimeAwareShapeInterpolator
+from src.preprocessors.interpolators.time_aware_shape_interpolator_config import TimeAwareShapeInterpolatorConfig
+
+time_of_event = "2021-07-06 00:41:43.750000"
+
+
+def generate_waveforms(config: TimeAwareShapeInterpolatorConfig, readings: int):
+    rng = np.random.default_rng(0)
+    ktl_entry_time = np.datetime64(pd.Timestamp(time_of_event), "ns")
+    result = {}
+    for bus, (start, end) in config.shifts.items():
+        window_ms = int((end - start) / np.timedelta64(1, 'ms'))
+        offsets = np.sort(rng.choice(window_ms, size=readings, replace=False)).astype('timedelta64[ms]')
+        result[bus] = Waveform(bus, rng.uniform(0, 800, readings), ktl_entry_time + start + offsets)
+    return result
+
+
+def interpolate_per_bus(config, smoother, bus_to_extracted_waveform):
+    """
+    Previous implementation: pandas Series, 1s date range and two `interp1d` objects per bus.
+    """
+    interpolated_row = []
+    ktl_entry_time = np.datetime64(pd.Timestamp(time_of_event))
+    for bus in config.shifts:
+        w = bus_to_extracted_waveform[bus]
+        expanded_vals = np.append(np.insert(w.values, 0, w.values[0]), [w.values[-1]])
+        expanded_timestamps = np.append(np.insert(w.timestamps, 0, ktl_entry_time + config.shifts[bus][0]),
+                                        [ktl_entry_time + config.shifts[bus][1]])
+        ts = pd.Series(expanded_vals, index=expanded_timestamps)
+        xnew = pd.date_range(ts.index[0], ts.index[-1], freq='1s')
+        ynew = interp1d(ts.index.view(int), ts.values, kind='previous')(xnew.view(int))
+        if smoother:
+            ynew = smoother.smooth_out(pd.Series(ynew, xnew)).values
+        interpolated_row.append(ShapeInterpolator.interpolate_simple(ynew, config.no_interp_points[bus])[1].tolist())
+    return interpolated_row
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-readings', help='Number of readings per bus.', default=150, type=int)
+    parser.add_argument('-repeat', help='Number of repetitions.', default=20, type=int)
+    args = vars(parser.parse_args())
+
+    config = TimeAwareShapeInterpolatorConfig.equal_number_of_interpolation_points(no_interp_points=32)
+    waveforms = generate_waveforms(config, args['readings'])
+    metadata = Metadata({'timeOfEvent': time_of_event, 'inOut': None, 'carBodyId': None, 'carBodyType': None,
+                         'voltageProgramType': None, 'skidId': None, 'pendulumId': None})
+
+    for smoother in [None, RecursiveExponentialSmoother(SimpleExponentialSmootherConfig())]:
+        interpolator = TimeAwareShapeInterpolator(config, smoother=smoother)
+        per_bus_time = min(timeit.repeat(lambda: interpolate_per_bus(config, smoother, waveforms),
+                                         number=1, repeat=args['repeat'])) * 1000
+        fused_time = min(timeit.repeat(lambda: interpolator.interpolate(waveforms, metadata),
+                                       number=1, repeat=args['repeat'])) * 1000
+        print(f"Smoother: {type(smoother).__name__ if smoother else None}, per bus (pandas, interp1d): "
+              f"{per_bus_time:.3f} ms, fused: {fused_time:.3f} ms ({per_bus_time / fused_time:.1f}x)")
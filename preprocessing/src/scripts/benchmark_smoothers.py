@@ -0,0 +1,33 @@
+import argparse
+import timeit
+
+import numpy as np
+
+from src.preprocessors.interpolators.smoothers.recursive_exponential_smoother import RecursiveExponentialSmoother
+from src.preprocessors.interpolators.smoothers.simple_exponential_smoother import SimpleExponentialSmoother
+from src.preprocessors.interpolators.smoothers.simple_exponential_smoother_config import SimpleExponentialSmootherConfig
+
+# Lengths of the bus windows on the 1s grid (see TimeBasedPreprocessor.shifts)
+bus_lengths = [162, 157, 165, 147]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-repeat', help='Number of repetitions.', default=20, type=int)
+    args = vars(parser.parse_args())
+
+    rng = np.random.default_rng(0)
+    shapes = [300 + 50 * rng.standard_normal(length) for length in bus_lengths]
+    statsmodels_smoother = SimpleExponentialSmoother(SimpleExponentialSmootherConfig())
+    recursive_smoother = RecursiveExponentialSmoother(SimpleExponentialSmootherConfig())
+
+    def measure(function):
+        return min(timeit.repeat(function, number=1, repeat=args['repeat'])) * 1000
+
+    statsmodels_time = measure(lambda: [statsmodels_smoother.smooth_out(shape) for shape in shapes]) / len(shapes)
+    recursive_time = measure(lambda: [recursive_smoother.smooth_out(shape) for shape in shapes]) / len(shapes)
+    all_buses_time = measure(lambda: recursive_smoother.smooth_out_many(shapes))
+
+    print(f"statsmodels fit: {statsmodels_time:.3f} ms per bus")
+    print(f"lfilter: {recursive_time:.3f} ms per bus ({statsmodels_time / recursive_time:.1f}x)")
+    print(f"lfilter, all buses in one call: {all_buses_time:.3f} ms ({all_buses_time / len(shapes):.3f} ms per bus)")
@@ -0,0 +1,46 @@
+import argparse
+import timeit
+
+import numpy as np
+from kafka_utils.serialization import JSON, MSGPACK, serialize, deserialize
+
+from src.domain.metadata import Metadata
+from src.domain.preprocessing_result import PreprocessingResult, PreprocessingStatus, PreprocessingPayload, RawData
+from src.domain.waveform import Waveform
+
+
+def generate_preprocessing_result(size: int) -> PreprocessingResult:
+    rng = np.random.default_rng(0)
+    metadata = Metadata({
+        'timeOfEvent': '2021-07-06 10:00:00.000', 'inOut': 'in', 'carBodyId': 1, 'carBodyType': 'A',
+        'voltageProgramType': 1, 'skidId': 1, 'pendulumId': 1, 'paintingCyclesCount': 1, 'servicesCount': 1
+    })
+    waveforms = {f"K{i}": Waveform(f"K{i}", 300 + 50 * rng.standard_normal(size),
+                                   np.datetime64('2021-07-06T10:00:00', 'ns') + np.arange(size).astype('timedelta64[s]'))
+                 for i in range(1, 5)}
+    payload = PreprocessingPayload(metadata,
+                                   histograms=[rng.uniform(size=20).tolist() for _ in waveforms],
+                                   tsfresh_features=[rng.uniform(size=26).tolist() for _ in waveforms],
+                                   custom_features=[],
+                                   interpolation_features=[rng.uniform(size=32).tolist() for _ in waveforms])
+    return PreprocessingResult(PreprocessingStatus.CORRECT, payload, RawData(waveforms))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-sizes', help='Numbers of readings per bus.', default=[160, 1600], nargs='+', type=int)
+    parser.add_argument('-repeat', help='Number of repetitions.', default=5, type=int)
+    args = vars(parser.parse_args())
+
+    encoders = {
+        JSON: lambda result: serialize(result.to_dict(), JSON),
+        MSGPACK: lambda result: serialize(result.to_binary_dict(), MSGPACK),
+    }
+    for size in args['sizes']:
+        result = generate_preprocessing_result(size)
+        for wire_format, encode in encoders.items():
+            message = encode(result)
+            encoding = min(timeit.repeat(lambda: encode(result), number=1, repeat=args['repeat']))
+            decoding = min(timeit.repeat(lambda: deserialize(message), number=1, repeat=args['repeat']))
+            print(f"Readings per bus: {size}, {wire_format}: {len(message) / 1024:.1f} KiB, "
+                  f"encoding: {encoding * 1000:.2f} ms, decoding: {decoding * 1000:.2f} ms")
@@ -1,12 +1,19 @@
+from src.batch.batch_preprocessor import BatchPreprocessor
 from src.domain.metadata import Metadata
-from src.preprocessors.preprocessor import Preprocessor
-from src.preprocessors.time_based_preprocessor import TimeBasedPreprocessor
+from src.filters.cage_filter import CageFilter
+from src.preprocessors.features_extractors.numpy_tsfresh_feature_extractor import NumpyTsfreshFeatureExtractor
+from src.preprocessors.features_extractors.tsfresh_feature_extractor_config import TsfreshConfig
+from src.preprocessors.histograms_calculators.histograms_calculator import HistogramsCalculator, \
+    HistogramsCalculatorConfig
+from src.preprocessors.interpolators.smoothers.recursive_exponential_smoother import RecursiveExponentialSmoother
+from src.preprocessors.interpolators.smoothers.simple_exponential_smoother import SimpleExponentialSmoother
+from src.preprocessors.interpolators.smoothers.simple_exponential_smoother_config import SimpleExponentialSmootherConfig
+from src.preprocessors.interpolators.time_aware_shape_interpolator import TimeAwareShapeInterpolator
+from src.preprocessors.interpolators.time_aware_shape_interpolator_config import TimeAwareShapeInterpolatorConfig
+from src.preprocessors.payload_pipeline import PayloadPipeline
+from trend_utils.trend_cache import load_trend, load_trend_frame
 import pandas as pd
-import glob
 import numpy as np
-import simplejson as json
-from pathlib import Path
-from multiprocessing import Process
 import os
 import argparse
 
@@ -40,130 +47,113 @@ OUTPUT_PATHS = [DATA_PATH + "/processed/{}/20200911",
 
 winter_times = [(pd.to_datetime("2020-10-25 02:00"), pd.to_datetime("2021-03-28 02:00"))]
 
-proc_names = [str(i) for i in range(1, len(METADATA_PATHS) + 1)]
+smoothers = {
+    'SimpleExponentialSmoothing': SimpleExponentialSmoother,
+    'RecursiveExponentialSmoothing': RecursiveExponentialSmoother,
+}
 
 
 class TrendReader:
     @staticmethod
     def read(base_directory_path,
              trend_name):
-        df_list = []
-        folders = glob.glob(f"{base_directory_path}/*", recursive=True)
+        # Loaded from the binary cache of the trend, converted from the CSV files when they change
+        return load_trend_frame(base_directory_path, trend_name)
 
-        # Iterate through folders and collect individual DataFrames into a list to later concatenate them all
-        for folder in folders:
-            datestr = folder[folder.rfind("/") + 1:]
-            df = pd.read_csv(f'{folder}/{trend_name}.csv', sep=";", header=None)[[0, 1]]
-            df[0] += f' {datestr}'
-            df_list.append(df)
-
-        # Concatenation of collected DataFrames
-        df = pd.concat(df_list)
-        df[0] = pd.to_datetime(df[0], format='%H:%M:%S %Y%m%d')
-        df = df.sort_values(0)
-        df.columns = ['dt', 'value']
-        return df
+    @staticmethod
+    def read_arrays(base_directory_path, trend_name):
+        """
+        Timestamps (datetime64[ns]) and values of the trend, memory-mapped from the cache.
+        """
+        times, values = load_trend(base_directory_path, trend_name)
+        return times.view('datetime64[ns]'), values
 
 
 class PreprocessingRunner:
-    def __init__(self, no_interp_points, smoother_name, json_id, metadata_path, trends_path, output_path, process_name):
+    def __init__(self, no_interp_points, smoother_name, metadata_path, trends_path, output_path, workers=None):
         self.smoother_name = smoother_name
         self.no_interp_points = no_interp_points
-        self.json_id = json_id
         self.metadata_path = metadata_path
         self.trends_path = trends_path
         self.output_path = output_path
-        self.process_name = process_name
+        self.workers = workers
 
     @staticmethod
-    def int_like(s):
-        try:
-            int(s)
-            return True
-        except ValueError:
-            return False
-
-    def preprocess(self):
-        # Read metadata
-        print(f"Process: {self.process_name} reading metadata...")
+    def int_or_default(column: pd.Series) -> np.ndarray:
+        return pd.to_numeric(column, errors='coerce').fillna(-1).astype(np.int64).values
+
+    def create_batch_preprocessor(self) -> BatchPreprocessor:
+        interpolator_config = TimeAwareShapeInterpolatorConfig.equal_number_of_interpolation_points(
+            no_interp_points=self.no_interp_points)
+        smoother_class = smoothers.get(self.smoother_name)
+        smoother = smoother_class(SimpleExponentialSmootherConfig()) if smoother_class else None
+        pipeline = PayloadPipeline(TimeAwareShapeInterpolator(interpolator_config, smoother=smoother),
+                                   HistogramsCalculator(HistogramsCalculatorConfig()),
+                                   NumpyTsfreshFeatureExtractor(TsfreshConfig()))
+        return BatchPreprocessor(pipeline, interpolator_config.shifts, metadata_filters=[CageFilter()])
+
+    def read_metadata(self):
         metadata_df = pd.read_excel(self.metadata_path, sheet_name="Arkusz1", engine="openpyxl")
         metadata_df['Punkt czasu'] = pd.to_datetime(metadata_df['Punkt czasu'])
         metadata_df = metadata_df.sort_values('Punkt czasu')
-
-        # Read trends
-        print(f"Process: {self.process_name} reading trends...")
-        trends = {"CurrentTrends": {}}
+        # Check if INOUT is in columns:
+        if "IN/OUT" in metadata_df.columns:
+            metadata_df = metadata_df[metadata_df["IN/OUT"] == "IN"]
+
+        # Winter time: -120 + 4 + 60 mins, summer time: -120 + 4 mins
+        event_times = metadata_df['Punkt czasu'].values
+        winter = np.zeros(len(metadata_df), dtype=bool)
+        for start, end in winter_times:
+            winter |= (event_times > start.to_datetime64()) & (event_times < end.to_datetime64())
+        shifts = np.where(winter, 6985 - 3600, 6985).astype('timedelta64[s]')
+        times_of_event = pd.DatetimeIndex(event_times - shifts).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+        columns = zip(times_of_event, metadata_df["Numer Karoserii"].astype(str), metadata_df["Typ podstawowy"],
+                      metadata_df["Rodzaj programu napiecia KTL"].astype(str),
+                      metadata_df["ID Skida"].astype(np.int64), self.int_or_default(metadata_df["Numer wahadla"]),
+                      self.int_or_default(metadata_df["Licznik cyklow pracy"]),
+                      self.int_or_default(metadata_df["Licznik konserwacji"]))
+        return [Metadata({
+            "timeOfEvent": time_of_event,
+            "inOut": "IN",
+            "carBodyId": car_body_id,
+            "carBodyType": car_body_type,
+            "voltageProgramType": voltage_program_type,
+            "skidId": int(skid_id),
+            "pendulumId": int(pendulum_id),
+            "paintingCyclesCount": int(painting_cycles_count),
+            "servicesCount": int(services_count)
+        }) for time_of_event, car_body_id, car_body_type, voltage_program_type, skid_id, pendulum_id,
+            painting_cycles_count, services_count in columns]
+
+    def read_trends(self):
+        trends = {}
         for i in range(1, 5):
-            trend_values_df = TrendReader.read(self.trends_path, f"L1VGL1.C811KS_1HS_K{i}.AA.R2323_AVCuB")
-            trends["CurrentTrends"][f"current_on_busbar_{i}"] = trend_values_df.set_index('dt').sort_index()
-
-        # Run preprocessing
-        print(f"Process: {self.process_name} start preprocessing...")
-        try:
-            for row in metadata_df.iterrows():
-                # Check if "Punkt czasu" is winter time:
-                if any([start < row[1]["Punkt czasu"] < end for start, end in winter_times]):  # -120 + 4 + 60 mins
-                    time_of_event = (row[1]["Punkt czasu"] - np.timedelta64(6985 - 3600, 's')).strftime(
-                        "%Y-%m-%d %H:%M:%S.%f")
-                else:  # Summer time (-120 + 4 mins)
-                    time_of_event = (row[1]["Punkt czasu"] - np.timedelta64(6985, 's')).strftime("%Y-%m-%d %H:%M:%S.%f")
-
-                # Check if INOUT is in columns:
-                if "IN/OUT" in metadata_df.columns:
-                    if row[1]["IN/OUT"] != "IN":
-                        continue
-
-                metadata = Metadata({
-                    "timeOfEvent": time_of_event,
-                    "inOut": "IN",
-                    "carBodyId": str(row[1]["Numer Karoserii"]),
-                    "carBodyType": row[1]["Typ podstawowy"],
-                    "voltageProgramType": str(row[1]["Rodzaj programu napiecia KTL"]),
-                    "skidId": int(row[1]["ID Skida"]),
-                    "pendulumId": int(row[1]["Numer wahadla"]) if self.int_like(row[1]["Numer wahadla"]) else -1,
-                    "paintingCyclesCount": int(row[1]["Licznik cyklow pracy"]) if self.int_like(
-                        row[1]["Licznik cyklow pracy"]) else -1,
-                    "servicesCount": int(row[1]["Licznik konserwacji"]) if self.int_like(
-                        row[1]["Licznik konserwacji"]) else -1
-                })
-
-                # Init preprocessor
-                cfg = {
-                    'general': {
-                        'interpolation-points': self.no_interp_points,
-                        'smoother': self.smoother_name
-                    }
-                }
-                preprocessor: Preprocessor = TimeBasedPreprocessor(cfg=cfg)
-                pr_result = preprocessor.preprocess(metadata, trends)
-
-                # Save preprocessing result
-                json_serialized = json.dumps(pr_result.to_dict())
-                Path(f"{self.output_path}").mkdir(parents=True, exist_ok=True)
-                with open(f"{self.output_path}/{self.json_id}.json", "w", encoding="utf-8") as f:
-                    f.write(json_serialized)
-                self.json_id += 1
-
-                if self.json_id % 50 == 0:
-                    print(f"Process: {self.process_name} just saved JSON with id: {self.json_id}")
-        except Exception as e:
-            print(f"Error in process #{self.process_name}")
-            print(e)
+            trends[f"K{i}"] = TrendReader.read_arrays(self.trends_path, f"L1VGL1.C811KS_1HS_K{i}.AA.R2323_AVCuB")
+        return trends
 
+    def preprocess(self):
+        print(f"{self.output_path}: reading metadata...")
+        metadata = self.read_metadata()
+        print(f"{self.output_path}: reading trends...")
+        trends = self.read_trends()
+        print(f"{self.output_path}: preprocessing {len(metadata)} paintings...")
+        paths = self.create_batch_preprocessor().preprocess_to_shards(self.output_path, "paintings", metadata,
+                                                                      trends, workers=self.workers)
+        print(f"{self.output_path}: written {len(paths)} shards.")
 
-if __name__ == '__main__':
-    procs = []
 
+if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('-points', help='defined number of interpolation points.', default=16, type=int)
     parser.add_argument('-dir', help='Output directory.', default='06072021', type=str)
     parser.add_argument('-smoother', help='Smoother class name for data smoothing', type=str, default=None)
+    parser.add_argument('-workers', help='Number of processes, the number of CPUs by default.', type=int,
+                        default=None)
     args = vars(parser.parse_args())
     OUTPUT_PATHS = [out_path.format(args['dir']) for out_path in OUTPUT_PATHS]
 
-    for proc_name, meta_path, trend_path, out_path in zip(proc_names, METADATA_PATHS, TRENDS_PATHS, OUTPUT_PATHS):
-        prep_runner = PreprocessingRunner(args['points'], args['smoother'], 0, meta_path, trend_path,out_path, proc_name)
-        procs.append(Process(target=prep_runner.preprocess))
-
-    for proc in procs:
-        proc.start()
+    # Folders are preprocessed one after another, each of them by all processes
+    for meta_path, trend_path, out_path in zip(METADATA_PATHS, TRENDS_PATHS, OUTPUT_PATHS):
+        PreprocessingRunner(args['points'], args['smoother'], meta_path, trend_path, out_path,
+                            args['workers']).preprocess()
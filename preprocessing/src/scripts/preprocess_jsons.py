@@ -1,93 +1,40 @@
 import glob
-import pandas as pd
 import os
 import simplejson as json
-import itertools
-import numpy as np
-from pathlib import Path
-import joblib
 import argparse
 
+from dataset_utils.feature_shards import list_shards, read_shard
+from src.batch.feature_dataset import FeatureDataset, batch_shard_to_columns, results_to_columns
+
 DATA_PATH = os.environ["DATA_PATH"]
 
 base_path = DATA_PATH + "/processed/{}"
-output_path = DATA_PATH + "/processed/{}_dfs"
-
-
-def read_jsons_into_dataframes(base_path, num_interpolation_points):
-    metadata, histograms, interpolations, tsfresh = [], [], [], []
-    raw_data = {}
-
-    # Read data into lists
-    subfolders = glob.glob(f"{base_path}/*/")
-    for subfolder in subfolders:
-        json_files = glob.glob(f"{subfolder}*.json")
-        for filepath in json_files:
-            if Path(filepath).stat().st_size < 20000:  # Skip small files (probably bad extraction anyway)
-                continue
-            with open(filepath) as f:
-                pr_result = json.load(f)
-
-                # Prepare rows
-                histograms_row = list(itertools.chain(*pr_result['payload']['histograms']))
-                interpolations_row = list(itertools.chain(*pr_result['payload']['interpolationFeatures']))
-                tsfresh_row = list(itertools.chain(*pr_result['payload']['tsfreshFeatures']))
-                metadata_row = [
-                    pr_result['payload']['metadata']['timeOfEvent'],
-                    pr_result['payload']['metadata']['inOut'],
-                    pr_result['payload']['metadata']['carBodyId'],
-                    pr_result['payload']['metadata']['carBodyType'],
-                    pr_result['payload']['metadata']['voltageProgramType'],
-                    pr_result['payload']['metadata']['skidId'],
-                    pr_result['payload']['metadata']['pendulumId'],
-                    pr_result['payload']['metadata']['paintingCyclesCount'],
-                    pr_result['payload']['metadata']['servicesCount']
-                ]
-
-                # Append rows if conditions met
-                if (len(histograms_row), len(interpolations_row), len(tsfresh_row)) == (60, 4*num_interpolation_points, 104):
-                    histograms.append(histograms_row)
-                    interpolations.append(interpolations_row)
-                    tsfresh.append(tsfresh_row)
-                    metadata.append(metadata_row)
-                    raw_data[pr_result['payload']['metadata']['timeOfEvent']] = {
-                        "values": pr_result["rawData"]["values"],
-                        "times": pr_result["rawData"]["times"]
-                    }
-
-    # Construct numpy arrays
-    metadata_array, histograms_array, interpolations_array, tsfresh_array = np.array(metadata), np.array(
-        histograms), np.array(interpolations), np.array(tsfresh)
-
-    # Construct dataframes
-    metadata_df = pd.DataFrame(data=metadata_array,
-                               index=pd.to_datetime(metadata_array[:, 0]),
-                               columns=['timeOfEvent',
-                                        'inOut',
-                                        'carBodyId',
-                                        'carBodyType',
-                                        'voltageProgramType',
-                                        'skidId',
-                                        'pendulumId',
-                                        'paintingCyclesCount',
-                                        'servicesCount'
-                                        ])
-    histograms_df = pd.DataFrame(data=histograms_array,
-                                 index=pd.to_datetime(metadata_array[:, 0]))
-
-    interpolations_df = pd.DataFrame(data=interpolations_array,
-                                     index=pd.to_datetime(metadata_array[:, 0]))
-
-    tsfresh_df = pd.DataFrame(data=tsfresh_array,
-                              index=pd.to_datetime(metadata_array[:, 0]))
-
-    return metadata_df, histograms_df, interpolations_df, tsfresh_df, raw_data
-
-
-def save(obj, filename, directory_path):
-    dir_path = f"{directory_path}"
-    Path(dir_path).mkdir(parents=True, exist_ok=True)
-    joblib.dump(obj, f"{dir_path}/{filename}")
+output_path = DATA_PATH + "/processed/{}_dataset"
+
+
+def read_results(json_files):
+    results = []
+    for filepath in json_files:
+        with open(filepath) as f:
+            results.append(json.load(f))
+    return results
+
+
+def build_dataset(base_path, dataset, num_interpolation_points, chunk_size=1000):
+    """
+    Appends preprocessing results of all subfolders of `base_path` to the dataset: shards written by
+    `preprocess_batch.py` and JSON files (one per painting) of older runs. Paintings already in the dataset are skipped.
+    """
+    widths = {"histograms": 60, "interpolationFeatures": 4 * num_interpolation_points, "tsfreshFeatures": 104}
+    for subfolder in sorted(glob.glob(f"{base_path}/*/")):
+        appended = 0
+        for shard_path in list_shards(subfolder):
+            appended += dataset.append(*batch_shard_to_columns(read_shard(shard_path)))
+        json_files = sorted(glob.glob(f"{subfolder}*.json"))
+        for start in range(0, len(json_files), chunk_size):
+            results = read_results(json_files[start:start + chunk_size])
+            appended += dataset.append(*results_to_columns(results, widths))
+        print(f"{subfolder}: appended {appended} paintings.")
 
 
 if __name__ == '__main__':
@@ -98,17 +45,4 @@ if __name__ == '__main__':
     base_path = base_path.format(args['dir'])
     output_path = output_path.format(args['dir'])
 
-    metadata_df, histograms_df, interpolations_df, tsfresh_df, raw_data = read_jsons_into_dataframes(base_path,
-                                                                                                     args['points'])
-
-    # Deduplication
-    metadata_df = metadata_df.loc[~metadata_df.index.duplicated(keep='last')]
-    histograms_df = histograms_df.loc[~histograms_df.index.duplicated(keep='last')]
-    interpolations_df = interpolations_df.loc[~interpolations_df.index.duplicated(keep='last')]
-    tsfresh_df = tsfresh_df.loc[~tsfresh_df.index.duplicated(keep='last')]
-
-    save(metadata_df, "metadata_df", output_path)
-    save(histograms_df, "histograms_df", output_path)
-    save(interpolations_df, "interpolations_df", output_path)
-    save(tsfresh_df, "tsfresh_df", output_path)
-    save(raw_data, "raw_data_dict", output_path)
+    build_dataset(base_path, FeatureDataset(output_path), args['points'])
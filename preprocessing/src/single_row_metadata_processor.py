@@ -1,5 +1,4 @@
 import logging
-from time import sleep
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
@@ -9,11 +8,10 @@ from src.domain.metadata import Metadata
 from src.filters.metadata_filter import MetadataFilter
 from src.domain.preprocessing_result import PreprocessingResult, PreprocessingPayload, RawData
 from src.preprocessors.preprocessor import Preprocessor
-from src.db.influxdb_repository import InfluxDbRepository
+from src.db.ts_repository import TimeSeriesRepository
 from src.producers.alert_producer import AlertProducer
 from src.producers.preprocessing_result_producer import PreprocessingResultProducer
 from src.domain.preprocessing_result import PreprocessingResult, PreprocessingStatus
-from src.config_reader import config as module_config
 
 
 class SingleRowMetadataProcessorConfig:
@@ -27,7 +25,19 @@ class SingleRowMetadataProcessorConfig:
 
 class SingleRowMetadataProcessor:
     def __init__(self, config: SingleRowMetadataProcessorConfig, preprocessor: Preprocessor,
-                 ts_repo: InfluxDbRepository):
+                 ts_repo: Optional[TimeSeriesRepository] = None):
+        """
+
+        Parameters
+        ----------
+        config
+            Configuration of the processor.
+        preprocessor
+            Preprocessor applied to the paintings.
+        ts_repo
+            Repository the trends are read from. Not needed in the process which only schedules the paintings
+            (see `add_winter_time_shift_if_required` and `required_coverage`).
+        """
         self.config = config
         self.preprocessor = preprocessor
         self.ts_repo = ts_repo
@@ -35,13 +45,17 @@ class SingleRowMetadataProcessor:
         self.alert_producer: Optional[AlertProducer] = None
 
     def produce_processed_metadata_row(self, metadata: Metadata):
-        # Required for using kafka in multiprocessing
-        self.create_producers()
-        self.add_winter_time_shift_if_required(metadata)
-        self.wait_till_data_save_in_influxd()
+        """
+        Preprocesses the painting and sends the result. Time of the event should be already shifted
+        (see `add_winter_time_shift_if_required`) and the trends should be available (see `required_coverage`).
+        """
+        # Producers are created in the worker process (kafka clients cannot be shared with forked processes),
+        # they are reused for the next paintings and closed when the worker exits
+        if self.pr_producer is None:
+            self.create_producers()
 
         # Apply filters based on type of painting (e.g. cage)
-        filtering_results = [filter.apply(metadata) for filter in self.config.metadata_filters]
+        filtering_results = self.apply_filters(metadata)
 
         if self.any_filter_is_fired(filtering_results):
             first_fired_filter = self.get_first_fired_up_filter(filtering_results)
@@ -60,8 +74,6 @@ class SingleRowMetadataProcessor:
 
         self.pr_producer.produce(pr_result)
         self.produce_alert_if_required(pr_result)
-        # Required for using kafka in multiprocessing
-        self.close_producers()
 
     def create_producers(self):
         self.pr_producer = PreprocessingResultProducer()
@@ -87,9 +99,17 @@ class SingleRowMetadataProcessor:
                 metadata.time_of_event = (metadata.time_of_event - np.timedelta64(6985, 's')).strftime(
                     "%Y-%m-%d %H:%M:%S.%f")
 
-    def wait_till_data_save_in_influxd(self):
-        logging.info("Received metadata, starting to sleep.")
-        sleep(module_config["general"]["sleep-time"])
+    def required_coverage(self, metadata: Metadata) -> Mapping[str, np.datetime64]:
+        """
+        Returns readings needed to process the painting: trend name -> time up to which the readings are needed.
+        Filtered paintings are not preprocessed, so they do not need any readings.
+        """
+        if self.any_filter_is_fired(self.apply_filters(metadata)):
+            return {}
+        return self.preprocessor.required_coverage(metadata)
+
+    def apply_filters(self, metadata: Metadata) -> List[bool]:
+        return [filter.apply(metadata) for filter in self.config.metadata_filters]
 
     def get_first_fired_up_filter(self, filtering_results: List) -> MetadataFilter:
         return self.config.metadata_filters[np.argwhere(filtering_results)[0]]
@@ -106,15 +126,21 @@ class SingleRowMetadataProcessor:
                                    raw_data=raw_data)
 
     def get_trends_based_on_received_metadata(self, metadata: Metadata) -> Mapping[str, Mapping[str, pd.DataFrame]]:
-        logging.info("Querying influx.")
+        logging.info("Querying trends.")
         time_from = datetime.strptime(metadata.time_of_event, "%Y-%m-%d %H:%M:%S.%f")
         time_to = datetime.strptime(metadata.time_of_event, "%Y-%m-%d %H:%M:%S.%f") + timedelta(minutes=10)
-        return self.ts_repo.get_trends_values(time_from, time_to)
+        return self.ts_repo.get_trends_values(time_from, time_to, self.preprocessor.required_trends)
 
     def produce_alert_if_required(self, pr_result: PreprocessingResult):
         if pr_result.status in self.alert_producer.alerts_trigger_list:
             self.alert_producer.produce(pr_result)
 
     def close_producers(self):
-        self.pr_producer.close()
-        self.alert_producer.close()
+        """
+        Sends the buffered messages and closes the producers (if they were created).
+        """
+        if self.pr_producer is not None:
+            logging.info("Flushing and closing producers.")
+            self.pr_producer.close()
+            self.alert_producer.close()
+            self.pr_producer, self.alert_producer = None, None
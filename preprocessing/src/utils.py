@@ -1,4 +1,6 @@
 import logging
+import signal
+import sys
 from src.config_reader import config
 
 
@@ -23,3 +25,15 @@ def set_up_logger():
         logger.setLevel(logging.DEBUG)
     else:
         logger.setLevel(logging.INFO)
+
+
+def exit_on_sigterm():
+    """
+    Handles SIGTERM (sent by `docker stop` and `Pool.terminate`) as `sys.exit`, so that `finally` blocks and
+    `multiprocessing` finalizers (e.g. flushing the Kafka producers) are run before the process exits.
+    """
+    def exit_gracefully(signum, frame):
+        logging.info("Received SIGTERM, shutting down.")
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, exit_gracefully)
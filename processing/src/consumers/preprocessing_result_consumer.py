@@ -1,10 +1,13 @@
-from src.consumers.basic_consumer import BasicConsumer
+from kafka_utils.consumer import BasicConsumer
+from src.config_reader import config
 
 
 class PreprocessingResultConsumer(BasicConsumer):
     def __init__(self, topic_name):
-        super().__init__(topic_name)
+        super().__init__(topic_name, config["kafka"], group_id='group2')
 
     def consume(self):
-        for message in self.consumer:
-            yield message
+        yield from self.messages()
+
+    def consume_batches(self):
+        yield from self.batches()
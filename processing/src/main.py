@@ -1,34 +1,70 @@
 import logging
+from typing import Dict, List, Optional
 
 import requests
-import simplejson as json
 from src.consumers.preprocessing_result_consumer import PreprocessingResultConsumer
 from src.utils import set_up_logger
 from src.config_reader import config
+from kafka_utils.serialization import MIMETYPES, serialize
 from src.domain.painting_prediction import PaintingPrediction
 from src.producers.anomaly_alert_producer import alert_producer
 
 JWT = None
 
 
-def get_prediction():
+def post_to_prediction_api(endpoint: str, message: Dict) -> Optional[requests.Response]:
+    wire_format = config['general']['prediction-api-format']
+    prediction_response = requests.post(f"{config['general']['prediction-api-url']}/{endpoint}",
+                                        data=serialize(message, wire_format),
+                                        headers={'Content-type': MIMETYPES[wire_format], 'Accept': 'text/plain'})
+    logging.debug(f"Prediction API response text: {prediction_response.text}")
+    return prediction_response if prediction_response else None
+
+
+def get_prediction(pr_result: Dict) -> Optional[Dict]:
     """
     This function is responsible for passing correctly processed data (CORRECT status) to the prediction module,
     and the obtained prediction results are returned.
     """
-    prediction_response = None
-    if pr_result_json.value['status'] == 'CORRECT':
+    prediction_result = None
+    if pr_result['status'] == 'CORRECT':
         logging.info("Sending preprocessing result to Prediction Api")
-        prediction_response = requests.post(f"{config['general']['prediction-api-url']}/predict",
-                                            data=json.dumps(pr_result_json.value),
-                                            headers={'Content-type': 'application/json', 'Accept': 'text/plain'})
-        logging.debug(f"Prediction API response text: {prediction_response.text}")
-        logging.debug(f"Prediction API response json: {prediction_response.json()}")
+        prediction_response = post_to_prediction_api('predict', pr_result)
+        prediction_result = prediction_response.json() if prediction_response else None
+        logging.debug(f"Prediction API response json: {prediction_result}")
+
+    return prediction_result
 
-    return prediction_response
+
+def get_predictions(pr_results: List[Dict]) -> List[Optional[Dict]]:
+    """
+    Batch version of 'get_prediction': correctly processed data of all the preprocessing results are passed to
+    the prediction module in one request. If the request fails, the paintings are sent one by one ('get_prediction'),
+    so that a failure of the batch is not reported as anomalies of all its paintings.
+    """
+    prediction_results = [None] * len(pr_results)
+    correct = [i for i, pr_result in enumerate(pr_results) if pr_result['status'] == 'CORRECT']
+    if correct:
+        logging.info(f"Sending {len(correct)} preprocessing results to Prediction Api")
+        batch_results = None
+        try:
+            prediction_response = post_to_prediction_api(
+                'predict_batch', {'preprocessingResults': [pr_results[i] for i in correct]})
+            if prediction_response:
+                batch_results = prediction_response.json()['predictionResults']
+        except (requests.RequestException, ValueError, KeyError, TypeError) as error:
+            logging.warning(f"Batch request to Prediction Api failed: {error}")
+        if batch_results is not None and len(batch_results) == len(correct):
+            for i, prediction_result in zip(correct, batch_results):
+                prediction_results[i] = prediction_result
+        else:
+            logging.warning(f"Sending {len(correct)} preprocessing results to Prediction Api one by one")
+            for i in correct:
+                prediction_results[i] = get_prediction(pr_results[i])
+    return prediction_results
 
 
-def construct_painting_prediction():
+def construct_painting_prediction(pr_result: Dict, prediction_result: Optional[Dict]) -> Dict:
     """
     This function is responsible for the preparation of complete data in order to transfer them to the backend module,
     where they are then saved to the database and any anomalies are handled.
@@ -36,18 +72,17 @@ def construct_painting_prediction():
     interference on the frontend side - here they are treated as fixed constants.
     """
     painting_prediction = dict()
-    prediction_result = prediction_response.json() if prediction_response else {}
-    painting_prediction['predictionResult'] = prediction_result
-    painting_prediction['preprocessingResult'] = pr_result_json.value
+    painting_prediction['predictionResult'] = prediction_result or {}
+    painting_prediction['preprocessingResult'] = pr_result
     painting_prediction['humanResult'] = {}
-    painting_prediction['problematicPainting'] = prediction_result['anomaly'] if prediction_response else True
+    painting_prediction['problematicPainting'] = prediction_result['anomaly'] if prediction_result else True
     painting_prediction['humanVerified'] = False
-    time_of_event = pr_result_json.value['payload']['metadata']['timeOfEvent']
+    time_of_event = pr_result['payload']['metadata']['timeOfEvent']
     painting_prediction['dateModified'] = time_of_event
     return painting_prediction
 
 
-def raise_alert_if_problematic_painting():
+def raise_alert_if_problematic_painting(painting_prediction: Dict):
     """
     This method is checking the necessity of raising an alert and if true, alarm about painting incorrectness is sending.
     """
@@ -66,12 +101,20 @@ if __name__ == '__main__':
     # Connect to topic
     pr_consumer = PreprocessingResultConsumer(topic_name=config['kafka']['preprocessing-results-topic'])
 
-    for pr_result_json in pr_consumer.consume():
-        logging.info("Received Preprocessing Result")
-        logging.debug(f"Preprocessing result: {pr_result_json}")
+    if config['general'].get('prediction-api-batching'):
+        # One request to prediction module per poll of preprocessing results
+        for pr_results_json in pr_consumer.consume_batches():
+            logging.info(f"Received {len(pr_results_json)} Preprocessing Results")
+            pr_results = [pr_result_json.value for pr_result_json in pr_results_json]
+            for pr_result, prediction_result in zip(pr_results, get_predictions(pr_results)):
+                raise_alert_if_problematic_painting(construct_painting_prediction(pr_result, prediction_result))
+    else:
+        for pr_result_json in pr_consumer.consume():
+            logging.info("Received Preprocessing Result")
+            logging.debug(f"Preprocessing result: {pr_result_json}")
 
-        # POST preprocessing result to prediction module and get the score (if preprocessing status isCORRECT)
-        prediction_response = get_prediction()
+            # POST preprocessing result to prediction module and get the score (if preprocessing status isCORRECT)
+            prediction_result = get_prediction(pr_result_json.value)
 
-        painting_prediction = construct_painting_prediction()
-        raise_alert_if_problematic_painting()
+            painting_prediction = construct_painting_prediction(pr_result_json.value, prediction_result)
+            raise_alert_if_problematic_painting(painting_prediction)
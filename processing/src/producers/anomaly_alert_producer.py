@@ -1,6 +1,6 @@
 import logging
 
-from src.producers.basic_producer import BasicProducer
+from kafka_utils.producer import BasicProducer
 from src.domain.painting_prediction import PaintingPrediction
 from src.config_reader import config
 from typing import Dict
@@ -8,11 +8,11 @@ from typing import Dict
 
 class AnomalyAlertProducer(BasicProducer):
     def __init__(self):
-        super().__init__(config["kafka"]["alerts-topic"])
+        super().__init__(config["kafka"]["alerts-topic"], config["kafka"])
 
     def produce(self, pp: PaintingPrediction):
         prepared_alert = self.extract_relevant_information(pp)
-        self.producer.send(self.topic_name, prepared_alert)
+        self.send(prepared_alert)
         logging.info(prepared_alert)
 
     def extract_relevant_information(self, pp: PaintingPrediction) -> Dict:
@@ -0,0 +1,64 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from trend_utils.trend_cache import load_trend, load_trend_frame
+
+TREND = "L1VGL1.C811KS_1HS_K1.AA.R2323_AVCuB"
+
+
+def write_day(base_directory, datestr, seconds, values):
+    os.makedirs(os.path.join(base_directory, datestr), exist_ok=True)
+    with open(os.path.join(base_directory, datestr, f"{TREND}.csv"), "w") as f:
+        for second, value in zip(seconds, values):
+            f.write(f'"{second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}";"{value}";"192";""\n')
+
+
+def read_csv_files(base_directory):
+    # Reading of the trends before the cache
+    df_list = []
+    for folder in glob.glob(f"{base_directory}/*", recursive=True):
+        datestr = folder[folder.rfind("/") + 1:]
+        df = pd.read_csv(f'{folder}/{TREND}.csv', sep=";", header=None)[[0, 1]]
+        df[0] += f' {datestr}'
+        df_list.append(df)
+    df = pd.concat(df_list)
+    df[0] = pd.to_datetime(df[0], format='%H:%M:%S %Y%m%d')
+    df = df.sort_values(0)
+    df.columns = ['dt', 'value']
+    return df
+
+
+def test_cached_trend_is_the_same_as_parsed_csv_files(tmp_path):
+    rng = np.random.default_rng(0)
+    write_day(str(tmp_path), "20210402", np.arange(0, 86400, 7), rng.uniform(0, 800, 12343))
+    write_day(str(tmp_path), "20210401", np.arange(5, 86400, 11), rng.uniform(0, 800, 7855))
+
+    expected = read_csv_files(str(tmp_path))
+    for _ in range(2):  # Converted, then loaded from the cache
+        actual = load_trend_frame(str(tmp_path), TREND)
+        np.testing.assert_array_equal(actual['dt'].values, expected['dt'].values)
+        np.testing.assert_array_equal(actual['value'].values, expected['value'].values)
+
+    times, values = load_trend(str(tmp_path), TREND)
+    assert isinstance(times, np.memmap) and times.dtype == np.int64 and values.dtype == np.float64
+
+
+def test_cache_is_invalidated_when_csv_files_change(tmp_path):
+    write_day(str(tmp_path), "20210401", [1, 2], [10., 20.])
+    _, values = load_trend(str(tmp_path), TREND)
+    np.testing.assert_array_equal(values, [10., 20.])
+
+    write_day(str(tmp_path), "20210401", [1, 2], [30., 40.])
+    csv_path = os.path.join(str(tmp_path), "20210401", f"{TREND}.csv")
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    _, values = load_trend(str(tmp_path), TREND)
+    np.testing.assert_array_equal(values, [30., 40.])
+
+    write_day(str(tmp_path), "20210402", [1], [50.])
+    times, values = load_trend(str(tmp_path), TREND)
+    np.testing.assert_array_equal(values, [30., 40., 50.])
+    assert times[-1] == np.datetime64("2021-04-02T00:00:01", "ns").astype(np.int64)
@@ -0,0 +1,131 @@
+import glob
+import json
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Cache inside the directory of the trends, hidden from the glob of the day folders
+CACHE_DIRECTORY_NAME = ".trend_cache"
+
+
+def day_folders(base_directory_path: str) -> Dict[str, np.datetime64]:
+    """
+    Folders of the trends (one per day, named `%Y%m%d`) -> the day.
+    """
+    folders = {}
+    for folder in sorted(glob.glob(f"{base_directory_path}/*")):
+        if os.path.isdir(folder):
+            datestr = os.path.basename(folder)
+            folders[folder] = np.datetime64(f"{datestr[:4]}-{datestr[4:6]}-{datestr[6:8]}", 'ns')
+    return folders
+
+
+def source_files(base_directory_path: str, trend_name: str) -> Dict[str, Tuple[int, int]]:
+    """
+    CSV files of the trend -> their modification time (ns) and size, which invalidate the cache.
+    """
+    sources = {}
+    for folder in day_folders(base_directory_path):
+        stat = os.stat(f"{folder}/{trend_name}.csv")
+        sources[os.path.relpath(f"{folder}/{trend_name}.csv", base_directory_path)] = (stat.st_mtime_ns, stat.st_size)
+    return sources
+
+
+def parse_trend(base_directory_path: str, trend_name: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parses the CSV files of the trend (`%H:%M:%S;value` rows in a folder per day).
+
+    Returns
+    -------
+    Tuple
+        Sorted timestamps of the readings (int64 nanoseconds since the epoch) and their values (float64).
+    """
+    times, values = [], []
+    for folder, day in day_folders(base_directory_path).items():
+        df = pd.read_csv(f'{folder}/{trend_name}.csv', sep=";", header=None, usecols=[0, 1])
+        times.append((day + pd.to_timedelta(df[0]).values).view(np.int64))
+        values.append(df[1].values.astype(np.float64))
+    if not times:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.float64)
+    times, values = np.concatenate(times), np.concatenate(values)
+    order = np.argsort(times, kind='stable')
+    return times[order], values[order]
+
+
+def cache_paths(cache_directory: str, trend_name: str) -> Tuple[str, str, str]:
+    prefix = os.path.join(cache_directory, trend_name)
+    return f"{prefix}.times.npy", f"{prefix}.values.npy", f"{prefix}.sources.json"
+
+
+def save_array(path: str, array: np.ndarray):
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "wb") as f:
+        np.save(f, array, allow_pickle=False)
+    os.replace(temporary_path, path)
+
+
+def load_trend(base_directory_path: str, trend_name: str,
+               cache_directory: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Loads the trend from the binary cache, converting its CSV files first if they have changed since they were
+    cached (or were never cached). The arrays are memory-mapped read-only, so processes reading the same trend share
+    its pages.
+
+    Parameters
+    ----------
+    base_directory_path
+        Directory with a folder of CSV files per day.
+    trend_name
+        Name of the CSV files of the trend.
+    cache_directory
+        Directory of the cache, `.trend_cache` in `base_directory_path` by default.
+
+    Returns
+    -------
+    Tuple
+        Sorted timestamps of the readings (int64 nanoseconds since the epoch) and their values (float64).
+    """
+    cache_directory = cache_directory or os.path.join(base_directory_path, CACHE_DIRECTORY_NAME)
+    times_path, values_path, sources_path = cache_paths(cache_directory, trend_name)
+    sources = {file: list(source) for file, source in source_files(base_directory_path, trend_name).items()}
+    try:
+        with open(sources_path) as f:
+            cached_sources = json.load(f)
+    except (OSError, ValueError):
+        cached_sources = None
+
+    if cached_sources != sources:
+        logging.info(f"Converting trend {trend_name} from {len(sources)} CSV files.")
+        times, values = parse_trend(base_directory_path, trend_name)
+        os.makedirs(cache_directory, exist_ok=True)
+        # Sources are written last: they mark the arrays as complete
+        save_array(times_path, times)
+        save_array(values_path, values)
+        temporary_path = f"{sources_path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(sources, f)
+        os.replace(temporary_path, sources_path)
+    return np.load(times_path, mmap_mode='r'), np.load(values_path, mmap_mode='r')
+
+
+def load_trend_frame(base_directory_path: str, trend_name: str, cache_directory: Optional[str] = None) -> pd.DataFrame:
+    """
+    The trend as a DataFrame with `dt` and `value` columns, sorted by `dt` (see `load_trend`).
+    """
+    times, values = load_trend(base_directory_path, trend_name, cache_directory)
+    return pd.DataFrame({'dt': times.view('datetime64[ns]'), 'value': values})
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Converts trends to the binary cache (or checks it is up to date).")
+    parser.add_argument('directory', help='Directory with a folder of CSV files per day.')
+    parser.add_argument('trends', nargs='+', help='Names of the trends.')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    for trend in args.trends:
+        load_trend(args.directory, trend)